@@ -7,8 +7,12 @@ from lumibot.traders import Trader
 from lumibot.entities import TradingFee
 import alpaca_trade_api as alpaca
 import os
+import sys
 from ccxt.base.types import TradingFees
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from strategy_helpers import MarketSnapshot
+
 #Environment variables 
 from dotenv import load_dotenv
 load_dotenv
@@ -86,18 +90,17 @@ class DiversifiedLeverage(Strategy):
         """Rebalance the portfolio and create orders"""
 
         orders = []
+        # Prices and positions for the whole portfolio in one batch each
+        snapshot = MarketSnapshot(self, [asset.get("symbol") for asset in self.parameters["portfolio"]])
         for asset in self.parameters["portfolio"]:
             # Get all of our variables from portfolio
             symbol = asset.get("symbol")
             weight = asset.get("weight")
-            last_price = self.get_last_price(symbol)
+            last_price = snapshot.last_price(symbol)
 
             # Get how many shares we already own
             # (including orders that haven't been executed yet)
-            position = self.get_position(symbol)
-            quantity = 0
-            if position is not None:
-                quantity = float(position.quantity)
+            quantity = snapshot.quantity(symbol)
 
             # Calculate how many shares we need to buy or sell
             shares_value = self.portfolio_value * weight
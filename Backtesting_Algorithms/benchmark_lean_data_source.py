@@ -0,0 +1,64 @@
+"""
+Benchmark LeanDataBacktesting against YahooDataBacktesting on DiversifiedLeverage
+
+Download the portfolio's daily bars into the Lean store first, e.g.
+    cd data_pipeline && python main.py --source alpaca --resolution daily \
+        --equity-symbols TQQQ UPRO UDOW TMF UGL DIG --start-date 2023-12-01 --end-date 2024-09-12
+"""
+
+import time
+from datetime import datetime
+
+from lumibot.backtesting import YahooDataBacktesting
+from lumibot.entities import TradingFee
+
+from Diversified_leverage import DiversifiedLeverage
+from lean_data_source import LeanDataBacktesting, LeanEquityStore
+
+
+def time_backtest(datasource_class, backtesting_start, backtesting_end, trading_fee):
+    """Run one DiversifiedLeverage backtest and return (seconds, result)"""
+    started = time.perf_counter()
+    result = DiversifiedLeverage.backtest(
+        datasource_class,
+        backtesting_start,
+        backtesting_end,
+        benchmark_asset=None,
+        risk_free_rate=0.0,
+        buy_trading_fees=[trading_fee],
+        sell_trading_fees=[trading_fee],
+        show_plot=False,
+        show_tearsheet=False,
+        save_tearsheet=False,
+        show_indicators=False,
+        show_progress_bar=False,
+        quiet_logs=True,
+    )
+    return time.perf_counter() - started, result
+
+
+if __name__ == "__main__":
+    backtesting_start = datetime(2024, 1, 1)
+    backtesting_end = datetime(2024, 9, 12)
+    trading_fee = TradingFee(percent_fee=0.005)
+
+    symbols = [asset["symbol"] for asset in DiversifiedLeverage.parameters["portfolio"]]
+    store = LeanEquityStore()
+    missing = [symbol for symbol in symbols if not store.source_files(symbol, 'daily')]
+    if missing:
+        raise SystemExit(f"Missing daily Lean data for {missing}, see the module docstring")
+
+    # First Lean run builds the index, the second one reads it through mmap
+    timings = {}
+    timings["yahoo"], yahoo_result = time_backtest(YahooDataBacktesting, backtesting_start, backtesting_end, trading_fee)
+    timings["lean (cold index)"], _ = time_backtest(LeanDataBacktesting, backtesting_start, backtesting_end, trading_fee)
+    timings["lean (warm index)"], lean_result = time_backtest(LeanDataBacktesting, backtesting_start, backtesting_end, trading_fee)
+
+    print("\nData source             Seconds")
+    for name, seconds in timings.items():
+        print(f"{name:<22} {seconds:8.2f}")
+    print(f"Speed-up (warm index): {timings['yahoo'] / timings['lean (warm index)']:.1f}x")
+
+    # Yahoo prices are split/dividend adjusted differently from raw Lean bars, so expect close but not equal
+    for key in ["total_return", "cagr", "sharpe"]:
+        print(f"{key:<14} yahoo={yahoo_result.get(key)}  lean={lean_result.get(key)}")
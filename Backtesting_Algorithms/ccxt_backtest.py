@@ -1,18 +1,27 @@
 
-from datetime import datetime
+import os
+import sys
+from datetime import datetime, timedelta
 from lumibot.entities import Asset, Order
 from lumibot.strategies import Strategy
-from lumibot.backtesting import CcxtBacktesting
-from pandas import DataFrame
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from indicators import BollingerBands
+from ccxt_ohlcv_cache import CachedCcxtBacktesting
+
+BAR_DURATIONS = {"day": timedelta(days=1), "minute": timedelta(minutes=1)}
 
 class CcxtBacktestingExampleStrategy(Strategy):
     def initialize(self, asset:tuple[Asset,Asset] = None,
-                cash_at_risk:float=.25,window:int=21):
+                cash_at_risk:float=.25,window:int=21,timestep:str="day"):
         if asset is None:
             raise ValueError("You must provide a valid asset pair")
+        if timestep not in BAR_DURATIONS:
+            raise ValueError(f"timestep must be one of {list(BAR_DURATIONS)}")
         # for crypto, market is 24/7
         self.set_market("24/7")
-        self.sleeptime = "1D"
+        self.timestep = timestep
+        self.sleeptime = "1D" if timestep == "day" else "1M"
         self.asset = asset
         self.base, self.quote = asset
         self.window = window
@@ -20,6 +29,9 @@ class CcxtBacktestingExampleStrategy(Strategy):
         self.last_trade = None
         self.order_quantity = 0.0
         self.cash_at_risk = cash_at_risk
+        # Rolling band state, fed only with bars that closed since the last iteration
+        self.bands = BollingerBands(self.window, num_std=2.0)
+        self.last_bar_dt = None
 
     def _position_sizing(self):
         cash = self.get_cash()
@@ -27,31 +39,39 @@ class CcxtBacktestingExampleStrategy(Strategy):
         quantity = round(cash * self.cash_at_risk / last_price,0)
         return cash, last_price, quantity
 
-    def _get_historical_prices(self):
-        return self.get_historical_prices(asset=self.asset,length=None,
-                                    timestep="day",quote=self.quote).df
+    def _get_historical_prices(self, length):
+        return self.get_historical_prices(asset=self.asset,length=length,
+                                    timestep=self.timestep,quote=self.quote).df
+
+    def _update_bbands(self, current_dt):
+        """Feed the bars closed before current_dt into the band state and return the latest %B"""
+        bars_missing = None
+        if self.last_bar_dt is not None:
+            bars_missing = int((current_dt - self.last_bar_dt) / BAR_DURATIONS[self.timestep])
 
-    def _get_bbands(self,history_df:DataFrame):
-        num_std_dev = 2.0
-        close = 'close'
+        if bars_missing is None or bars_missing > self.window:
+            # First iteration (or a long gap): load the state from the last window of bars
+            history_df = self._get_historical_prices(self.window + 1)
+            history_df = history_df[history_df.index < current_dt]
+            if not history_df.empty:
+                self.bands = BollingerBands(self.window, num_std=2.0)
+                self.bands.warm(history_df['close'].to_numpy())
+        else:
+            history_df = self._get_historical_prices(bars_missing + 1)
+            history_df = history_df[(history_df.index > self.last_bar_dt) & (history_df.index < current_dt)]
+            if not history_df.empty:
+                self.bands.update_many(history_df['close'].to_numpy())
 
-        df = DataFrame(index=history_df.index)
-        df[close] = history_df[close]
-        df['bbm'] = df[close].rolling(window=self.window).mean()
-        df['bbu'] = df['bbm'] + df[close].rolling(window=self.window).std() * num_std_dev
-        df['bbl'] = df['bbm'] - df[close].rolling(window=self.window).std() * num_std_dev
-        df['bbb'] = (df['bbu'] - df['bbl']) / df['bbm']
-        df['bbp'] = (df[close] - df['bbl']) / (df['bbu'] - df['bbl'])
-        return df
+        if not history_df.empty:
+            self.last_bar_dt = history_df.index[-1]
+        return self.bands.value[0]
 
     def on_trading_iteration(self):
         # During the backtest, we get the current time with self.get_datetime().
         # The time interval is self.sleeptime.
         current_dt = self.get_datetime()
         cash, last_price, quantity = self._position_sizing()
-        history_df = self._get_historical_prices()
-        bbands = self._get_bbands(history_df)
-        prev_bbp = bbands[bbands.index < current_dt].tail(1).bbp.values[0]
+        prev_bbp = self._update_bbands(current_dt)
 
         if prev_bbp < -0.13 and cash > 0 and self.last_trade != Order.OrderSide.BUY and quantity > 0.0:
             order = self.create_order(self.base,
@@ -84,15 +104,13 @@ asset = (Asset(symbol=base_symbol, asset_type="crypto"),
 exchange_id = "kraken"  #"kucoin" #"bybit" #"okx" #"bitmex" # "binance"
 
 
-# CcxtBacktesting default data download limit is 50,000
-# If you want to change the maximum data download limit, you can do so by using 'max_data_download_limit'.
+# Bars are read through the local OHLCV cache, only ranges missing from it are downloaded
 kwargs = {
-    # "max_data_download_limit":10000, # optional
     "exchange_id":exchange_id,
 }
-CcxtBacktesting.MIN_TIMESTEP = "day"
+CachedCcxtBacktesting.MIN_TIMESTEP = "day"
 results, strat_obj = CcxtBacktestingExampleStrategy.run_backtest(
-    CcxtBacktesting,
+    CachedCcxtBacktesting,
     start_date,
     end_date,
     benchmark_asset=f"{base_symbol}/{quote_symbol}",
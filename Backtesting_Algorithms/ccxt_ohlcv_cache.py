@@ -0,0 +1,225 @@
+"""
+Read-through disk cache for CCXT OHLCV bars
+
+Bars are stored per exchange / symbol / timeframe as compressed columnar .npz
+files, one file per covered time range. A request reads what is on disk, fetches
+only the uncovered gaps from the exchange and merges the touching ranges back
+into one file, so re-running a crypto backtest reads from disk and always sees
+the same bars.
+"""
+
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from lumibot.backtesting import CcxtBacktesting
+from lumibot.data_sources import DataSourceBacktesting
+
+logger = logging.getLogger(__name__)
+
+DATA_ROOT = os.environ.get("LEAN_DATA_ROOT", os.path.join(os.path.dirname(__file__), '..', 'data'))
+CCXT_CACHE_PATH = os.environ.get("CCXT_CACHE_PATH", os.path.join(DATA_ROOT, 'crypto', 'ccxt_cache'))
+
+TIMEFRAME_MS = {"1m": 60_000, "1h": 3_600_000, "1d": 86_400_000}
+COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+
+
+def _to_ms(value):
+    """Milliseconds since epoch for a datetime; naive datetimes are taken as UTC"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return int(timestamp.value // 1_000_000)
+
+
+def _gaps(ranges, start, end):
+    """Parts of [start, end) not covered by the sorted, disjoint (start, end) ranges"""
+    gaps = []
+    for range_start, range_end in ranges:
+        if range_end <= start:
+            continue
+        if range_start >= end:
+            break
+        if range_start > start:
+            gaps.append((start, range_start))
+        start = max(start, range_end)
+    if start < end:
+        gaps.append((start, end))
+    return gaps
+
+
+class CcxtOhlcvCache:
+    """
+    OHLCV cache keyed by exchange, symbol, timeframe and time range
+
+    The exchange is a ccxt exchange instance, or an exchange id that is only turned
+    into one when a gap has to be fetched, so fully cached runs never go online.
+    Anything with .id and .fetch_ohlcv(symbol, timeframe, since, limit) works, e.g. a
+    stub in tests.
+    """
+
+    def __init__(self, exchange, cache_path=CCXT_CACHE_PATH, page_limit=1000):
+        self._exchange = exchange
+        self.exchange_id = exchange if isinstance(exchange, str) else exchange.id
+        self.cache_path = cache_path
+        self.page_limit = page_limit
+
+    @property
+    def exchange(self):
+        if isinstance(self._exchange, str):
+            import ccxt
+            self._exchange = getattr(ccxt, self._exchange)({'enableRateLimit': True})
+        return self._exchange
+
+    def _directory(self, symbol, timeframe):
+        return os.path.join(self.cache_path, self.exchange_id, symbol.replace('/', '_').upper(), timeframe)
+
+    def ranges(self, symbol, timeframe):
+        """Covered (start_ms, end_ms) ranges on disk, end exclusive, sorted by start"""
+        directory = self._directory(symbol, timeframe)
+        if not os.path.isdir(directory):
+            return []
+        ranges = []
+        for name in os.listdir(directory):
+            if name.endswith('.npz'):
+                start, end = name[:-len('.npz')].split('_')
+                ranges.append((int(start), int(end)))
+        return sorted(ranges)
+
+    def _path(self, symbol, timeframe, start, end):
+        return os.path.join(self._directory(symbol, timeframe), f"{start}_{end}.npz")
+
+    def _read(self, symbol, timeframe, start, end):
+        with np.load(self._path(symbol, timeframe, start, end)) as columns:
+            return {column: columns[column] for column in COLUMNS}
+
+    def _write(self, symbol, timeframe, start, end, columns):
+        path = self._path(symbol, timeframe, start, end)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **columns)
+        os.replace(tmp_path, path)
+
+    def _fetch(self, symbol, timeframe, start, end):
+        """Page through fetch_ohlcv for [start, end) and return the bars as columns"""
+        step = TIMEFRAME_MS[timeframe]
+        pages = []
+        since = start
+        while since < end:
+            candles = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=self.page_limit)
+            if not candles:
+                # Nothing listed yet at `since` (or a hole at the exchange), move on one page
+                since += self.page_limit * step
+                continue
+            page = np.asarray(candles, dtype=float)[:, :len(COLUMNS)]
+            pages.append(page)
+            since = max(int(page[-1, 0]) + step, since + step)
+
+        if not pages:
+            bars = np.empty((0, len(COLUMNS)))
+        else:
+            bars = np.concatenate(pages)
+            bars = bars[(bars[:, 0] >= start) & (bars[:, 0] < end)]
+        logger.info(f"Fetched {len(bars)} {timeframe} bars for {symbol} from {self.exchange_id}")
+        columns = {column: bars[:, i] for i, column in enumerate(COLUMNS)}
+        columns['time'] = columns['time'].astype(np.int64)
+        return columns
+
+    def _merge(self, pieces):
+        """Concatenate column dicts, sort by time and keep the last copy of a bar"""
+        columns = {column: np.concatenate([piece[column] for piece in pieces]) for column in COLUMNS}
+        order = np.argsort(columns['time'], kind='stable')
+        times = columns['time'][order]
+        keep = np.append(times[1:] != times[:-1], True)
+        return {column: values[order][keep] for column, values in columns.items()}
+
+    def fill(self, symbol, timeframe, start, end):
+        """
+        Make sure [start, end) is on disk, fetching only the gaps
+
+        Returns:
+        tuple: (start_ms, end_ms) of the range file that now covers the request
+        """
+        ranges = self.ranges(symbol, timeframe)
+        gaps = _gaps(ranges, start, end)
+        if not gaps:
+            return next((s, e) for s, e in ranges if s <= start and e >= end)
+
+        # Existing ranges overlapping or touching the request become part of one new file
+        touching = [(s, e) for s, e in ranges if s <= end and e >= start]
+        pieces = [self._read(symbol, timeframe, s, e) for s, e in touching]
+        pieces += [self._fetch(symbol, timeframe, gap_start, gap_end) for gap_start, gap_end in gaps]
+        merged_start = min([start] + [s for s, _ in touching])
+        merged_end = max([end] + [e for _, e in touching])
+
+        self._write(symbol, timeframe, merged_start, merged_end, self._merge(pieces))
+        for s, e in touching:
+            if (s, e) != (merged_start, merged_end):
+                os.remove(self._path(symbol, timeframe, s, e))
+        return merged_start, merged_end
+
+    def get_ohlcv(self, symbol, timeframe, start, end):
+        """
+        OHLCV bars opening between start and end (inclusive), read through the cache
+
+        Only bars that have closed by now are cached, so a later run cannot pick up a
+        bar that was still forming.
+
+        Parameters:
+        symbol (str): Unified CCXT symbol, e.g. BTC/USDT
+        timeframe (str): 1m, 1h or 1d
+        start (datetime): First bar time, naive datetimes are UTC
+        end (datetime): Last bar time, naive datetimes are UTC
+
+        Returns:
+        pandas.DataFrame: open, high, low, close, volume and missing (always 0), indexed by UTC-naive datetime
+        """
+        if timeframe not in TIMEFRAME_MS:
+            raise ValueError(f"Unsupported timeframe {timeframe}. Use one of {list(TIMEFRAME_MS)}")
+        step = TIMEFRAME_MS[timeframe]
+        start_ms, end_ms = _to_ms(start), _to_ms(end)
+        # Align to whole bars; the range end is exclusive and stops at the last closed bar
+        range_start = start_ms // step * step
+        range_end = min(end_ms // step * step + step, int(time.time() * 1000) // step * step)
+
+        columns = {column: np.empty(0) for column in COLUMNS}
+        if range_start < range_end:
+            covered = self.fill(symbol, timeframe, range_start, range_end)
+            columns = self._read(symbol, timeframe, *covered)
+
+        times = columns['time'].astype(np.int64)
+        mask = (times >= start_ms) & (times <= end_ms)
+        df = pd.DataFrame({column: columns[column][mask].astype(float) for column in COLUMNS[1:]},
+                          index=pd.DatetimeIndex(times[mask].astype('datetime64[ms]').astype('datetime64[ns]'),
+                                                 name='datetime'))
+        df['missing'] = 0
+        return df
+
+    def download_ohlcv(self, symbol, timeframe, start, end, limit=None):
+        """Same call as lumibot's CcxtCacheDB.download_ohlcv, so the cache can stand in for it"""
+        return self.get_ohlcv(symbol, timeframe, start, end)
+
+
+class CachedCcxtBacktesting(CcxtBacktesting):
+    """
+    CcxtBacktesting that reads bars through CcxtOhlcvCache
+
+    Pass exchange_id as usual, or exchange= a ccxt exchange instance (or stub). The
+    exchange is only contacted for ranges missing from cache_path.
+    """
+
+    def __init__(self, datetime_start, datetime_end, exchange=None, cache_path=CCXT_CACHE_PATH, **kwargs):
+        exchange_id = kwargs.pop("exchange_id", "binance")
+        kwargs.pop("max_data_download_limit", None)
+        auto_adjust = kwargs.pop("auto_adjust", False)
+        # CcxtBacktestingData.__init__ connects to the exchange to set up its own
+        # duckdb cache, so set up the same attributes here without it
+        DataSourceBacktesting.__init__(self, datetime_start, datetime_end, **kwargs)
+        self.name = exchange_id
+        self.auto_adjust = auto_adjust
+        self._data_store = {}
+        self._download_start_dt_prebuffer = 300
+        self.cache_db = CcxtOhlcvCache(exchange if exchange is not None else exchange_id, cache_path)
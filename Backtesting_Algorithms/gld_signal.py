@@ -1,81 +1,149 @@
+import os
+import sys
 import pandas as pd
 import yfinance as yf
 import numpy as np
 import plotly.graph_objects as go
 from yahoofinancials import YahooFinancials
 
-def gld_signal(ticker_list, start_date, end_date):
-    for ticker_input in ticker_list:
-        data = yf.download(ticker_input, start_date, end_date)
-        print(data)
-        if 'Close' not in data.columns.get_level_values(0):
-            print(f"Error: 'Close' column not found for {ticker_input}. Skipping this ticker.")
-            continue
-        
-        gld = pd.DataFrame(data['Close'])
-        gld['9-day'] = gld['Close'].rolling(9).mean()
-        gld['21-day'] = gld['Close'].rolling(21).mean()
-        gld['Signal'] = np.where(np.logical_and(gld['9-day'] > gld['21-day'],
-                                gld['9-day'].shift(1) < gld['21-day'].shift(1)),
-                                "BUY", None)
-        gld['Signal'] = np.where(np.logical_and(gld['9-day'] < gld['21-day'],
-                                gld['9-day'].shift(1) > gld['21-day'].shift(1)),
-                                "SELL", gld['Signal'])
-
-        def signal(df, start=start_date, end=end_date):
-            df = pd.DataFrame(yf.download(ticker_input, start, end)['Close'])
-            df['9-day'] = df['Close'].rolling(9).mean()
-            df['21-day'] = df['Close'].rolling(21).mean()
-            df['Signal'] = np.where(np.logical_and(df['9-day'] > df['21-day'],
-                                    df['9-day'].shift(1) < df['21-day'].shift(1)),
-                                    "BUY", None)
-            df['Signal'] = np.where(np.logical_and(df['9-day'] < df['21-day'],
-                                    df['9-day'].shift(1) > df['21-day'].shift(1)),
-                                    "SELL", df['Signal'])
-            return df, df.iloc[-1].Signal
-
-        def plot_signals(df):
-            fig = go.Figure()
-
-            fig.add_trace(go.Scatter(x=df.index, y=df['Close'], mode='lines', name='Close Price'))
-            fig.add_trace(go.Scatter(x=df.index, y=df['9-day'], mode='lines', name='9-day MA'))
-            fig.add_trace(go.Scatter(x=df.index, y=df['21-day'], mode='lines', name='21-day MA'))
-
-            buy_signals = df[df['Signal'] == 'BUY']
-            sell_signals = df[df['Signal'] == 'SELL']
-
-            fig.add_trace(go.Scatter(x=buy_signals.index, y=buy_signals['Close'], mode='markers', name='BUY Signal', marker=dict(color='green', size=10, symbol='triangle-up')))
-            fig.add_trace(go.Scatter(x=sell_signals.index, y=sell_signals['Close'], mode='markers', name='SELL Signal', marker=dict(color='red', size=10, symbol='triangle-down')))
-
-            fig.update_layout(title=f'{ticker_input} Trading Signals', xaxis_title='Date', yaxis_title='Price')
-            fig.show()
-
-        def backtest(df):
-            initial_balance = 10000
-            balance = initial_balance
-            position = 0
-            for i in range(1, len(df)):
-                if df['Signal'].iloc[i] == 'BUY' and position == 0:
-                    position = balance / df['Close'].iloc[i]
-                    balance = 0
-                elif df['Signal'].iloc[i] == 'SELL' and position > 0:
-                    balance = position * df['Close'].iloc[i]
-                    position = 0
-            final_balance = balance + (position * df['Close'].iloc[-1])
-            return final_balance
-
-        print(gld)
-        print("-" * 10)
-        print(gld.iloc[-1].Signal)
-        print(f"Saving the {ticker_input} GLD csv")
-        gld.to_csv(f'{ticker_input}_GLD_.csv')
-        data, sig = signal(gld)
-        print(data)
-        print(sig)
-        plot_signals(gld)
-        final_balance = backtest(gld)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from indicators import sma, ma_crossover
+
+BUY, SELL = 1, -1
+
+
+def download_closes(ticker_list, start_date, end_date):
+    """Download closes for every ticker in one batched request, as a (date, ticker) frame"""
+    data = yf.download(list(ticker_list), start_date, end_date, progress=False)
+    if data is None or 'Close' not in data.columns.get_level_values(0):
+        print("Error: 'Close' column not found in the download.")
+        return pd.DataFrame()
+
+    closes = data['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(ticker_list[0])
+    missing = [ticker for ticker in ticker_list if ticker not in closes.columns or closes[ticker].isna().all()]
+    for ticker in missing:
+        print(f"Error: 'Close' column not found for {ticker}. Skipping this ticker.")
+    return closes.drop(columns=missing, errors='ignore')
+
+
+def _compact(closes):
+    """
+    Move each ticker's NaNs (other markets' trading days) to the end of its column
+
+    Rolling windows then run over each ticker's own bars, exactly as when the ticker is
+    downloaded on its own. Returns the compacted array and the row order to undo it.
+    """
+    values = closes.to_numpy(dtype=float)
+    order = np.argsort(np.isnan(values), axis=0, kind='stable')
+    return np.take_along_axis(values, order, axis=0), order
+
+
+def _expand(compact, order, like):
+    """Undo _compact() for an array computed on the compacted closes"""
+    out = np.empty_like(compact)
+    np.put_along_axis(out, order, compact, axis=0)
+    return pd.DataFrame(out, index=like.index, columns=like.columns)
+
+
+def crossover_signals(closes, fast=9, slow=21):
+    """
+    9/21-day MA crossover signals for a (date, ticker) frame of closes
+
+    Returns:
+    tuple: (signals, fast_ma, slow_ma) frames; signals are int8, BUY=1, SELL=-1, 0 otherwise
+    """
+    compact, order = _compact(closes)
+    signals = ma_crossover(compact, fast, slow, strict=True)
+    # NaN rows after compaction belong to no bar
+    signals[np.isnan(compact)] = 0
+    return (_expand(signals, order, closes).astype(np.int8),
+            _expand(sma(compact, fast), order, closes),
+            _expand(sma(compact, slow), order, closes))
+
+
+def backtest_signals(closes, signals, initial_balance=10000):
+    """
+    All-in on BUY, all-out on SELL, for every ticker at once
+
+    The position after each bar is the last non-zero signal so far, and the balance is
+    the cumulative product of the returns earned while long.
+
+    Returns:
+    pandas.Series: Final balance per ticker
+    """
+    compact, order = _compact(closes)
+    compact_signals = np.take_along_axis(signals.to_numpy(), order, axis=0)
+
+    last_signal = pd.DataFrame(np.where(compact_signals != 0, compact_signals, np.nan)).ffill().to_numpy()
+    long = last_signal == BUY
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.nan_to_num(compact[1:] / compact[:-1] - 1)
+    growth = np.cumprod(1 + long[:-1] * returns, axis=0)
+    final = growth[-1] if len(growth) else np.ones(compact.shape[1])
+    return pd.Series(initial_balance * final, index=closes.columns, name='final_balance')
+
+
+def plot_signals(df, ticker_input):
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(x=df.index, y=df['Close'], mode='lines', name='Close Price'))
+    fig.add_trace(go.Scatter(x=df.index, y=df['9-day'], mode='lines', name='9-day MA'))
+    fig.add_trace(go.Scatter(x=df.index, y=df['21-day'], mode='lines', name='21-day MA'))
+
+    buy_signals = df[df['Signal'] == 'BUY']
+    sell_signals = df[df['Signal'] == 'SELL']
+
+    fig.add_trace(go.Scatter(x=buy_signals.index, y=buy_signals['Close'], mode='markers', name='BUY Signal', marker=dict(color='green', size=10, symbol='triangle-up')))
+    fig.add_trace(go.Scatter(x=sell_signals.index, y=sell_signals['Close'], mode='markers', name='SELL Signal', marker=dict(color='red', size=10, symbol='triangle-down')))
+
+    fig.update_layout(title=f'{ticker_input} Trading Signals', xaxis_title='Date', yaxis_title='Price')
+    fig.show()
+
+
+def ticker_frame(closes, signals, fast_ma, slow_ma, ticker):
+    """Per-ticker Close / 9-day / 21-day / Signal frame, as saved to {ticker}_GLD_.csv"""
+    df = pd.DataFrame({
+        'Close': closes[ticker],
+        '9-day': fast_ma[ticker],
+        '21-day': slow_ma[ticker],
+        'Signal': signals[ticker].map({BUY: 'BUY', SELL: 'SELL', 0: None}),
+    }).dropna(subset=['Close'])
+    return df
+
+
+def gld_signal(ticker_list, start_date, end_date, save_csv=False, plot=False):
+    """
+    Run the 9/21-day MA crossover signal and backtest over many tickers at once
+
+    Returns:
+    pandas.DataFrame: Last signal and final balance per ticker
+    """
+    closes = download_closes(ticker_list, start_date, end_date)
+    if closes.empty:
+        return pd.DataFrame(columns=['last_signal', 'final_balance'])
+
+    signals, fast_ma, slow_ma = crossover_signals(closes)
+    final_balances = backtest_signals(closes, signals)
+
+    if save_csv or plot:
+        for ticker_input in closes.columns:
+            gld = ticker_frame(closes, signals, fast_ma, slow_ma, ticker_input)
+            if save_csv:
+                print(f"Saving the {ticker_input} GLD csv")
+                gld.to_csv(f'{ticker_input}_GLD_.csv')
+            if plot:
+                plot_signals(gld, ticker_input)
+
+    last_signal = signals.where(closes.notna()).ffill().iloc[-1].map({BUY: 'BUY', SELL: 'SELL', 0: None})
+    summary = pd.DataFrame({'last_signal': last_signal, 'final_balance': final_balances})
+    for ticker_input, final_balance in final_balances.items():
         print(f"Final balance after backtesting {ticker_input}: ${final_balance:.2f}")
+    return summary
+
 
-# List of ticker symbols to test
-ticker_list = ['AIR.PA', 'AAPL', 'MSFT']
-gld_signal(ticker_list, '2020-01-01', '2024-08-31')
\ No newline at end of file
+if __name__ == "__main__":
+    # List of ticker symbols to test
+    ticker_list = ['AIR.PA', 'AAPL', 'MSFT']
+    print(gld_signal(ticker_list, '2020-01-01', '2024-08-31', save_csv=True, plot=True))
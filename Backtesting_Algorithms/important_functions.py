@@ -5,9 +5,13 @@ from lumibot.entities import Asset
 from lumibot.strategies.strategy import Strategy
 from lumibot.traders import Trader
 import os
+import sys
 from dotenv import load_dotenv
 load_dotenv()
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from indicators import rsi, macd, ema
+
 MY_KRAKEN_API_KEY = os.environ.get("KRAKEN_API_KEY")
 MY_KRAKEN_SECRET_KEY = os.environ.get("KRAKEN_API_SECRET_KEY")
                                 
@@ -52,19 +56,17 @@ class ImportantFunctions(Strategy):
             # TECHNICAL ANALYSIS
             ############################
 
-            # Use pandas_ta to calculate the 20 period RSI
-            rsi = df.ta.rsi(length=20)
-            current_rsi = rsi.iloc[-1]
+            # Calculate the 20 period RSI
+            current_rsi = rsi(df["close"], length=20).iloc[-1]
             self.log_message(f"RSI for {base} was {current_rsi}")
 
-            # Use pandas_ta to calculate the MACD
-            macd = df.ta.macd()
-            current_macd = macd.iloc[-1]
+            # Calculate the MACD (12, 26, 9)
+            macd_line, signal_line, histogram = macd(df["close"])
+            current_macd = (macd_line.iloc[-1], signal_line.iloc[-1], histogram.iloc[-1])
             self.log_message(f"MACD for {base} was {current_macd}")
 
-            # Use pandas_ta to calculate the 55 EMA
-            ema = df.ta.ema(length=55)
-            current_ema = ema.iloc[-1]
+            # Calculate the 55 EMA
+            current_ema = ema(df["close"], length=55).iloc[-1]
             self.log_message(f"EMA for {base} was {current_ema}")
 
         ###########################
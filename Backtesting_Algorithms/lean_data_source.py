@@ -0,0 +1,210 @@
+"""
+Offline Lumibot data source backed by the local Lean data store
+
+Serves equity bars from the zips data_pipeline/ writes under DATA_ROOT/equity/usa/
+instead of downloading them from Yahoo, so backtests run without network access.
+Each symbol's zips are parsed once into a numpy index file that later runs open
+with mmap.
+"""
+
+import glob
+import logging
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+from lumibot.backtesting import YahooDataBacktesting
+from lumibot.entities import Asset
+
+logger = logging.getLogger(__name__)
+
+# Same layout and encoding as data_pipeline/config.py
+DATA_ROOT = os.environ.get("LEAN_DATA_ROOT", os.path.join(os.path.dirname(__file__), '..', 'data'))
+EQUITY_DATA_PATH = os.path.join(DATA_ROOT, 'equity', 'usa')
+LEAN_PRICE_MULTIPLIER = 10000  # Lean uses deci-cents for equity prices
+LEAN_TIMEZONE_EQUITY = 'America/New_York'
+
+# One record per bar; time is nanoseconds since epoch in exchange-local time
+BAR_DTYPE = np.dtype([
+    ('time', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+])
+
+SUPPORTED_RESOLUTIONS = ['daily', 'minute']
+
+
+def _read_lean_csv(zip_path):
+    """Read the single CSV inside a Lean zip, skipping an optional header row"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_file:
+        csv_files = [f for f in zip_file.namelist() if f.endswith('.csv')]
+        if not csv_files:
+            return None
+        with zip_file.open(csv_files[0]) as csv_file:
+            df = pd.read_csv(csv_file, header=None, names=['time', 'open', 'high', 'low', 'close', 'volume'],
+                             usecols=range(6), dtype=str)
+    df = df[df['time'] != 'Time']
+    return df
+
+
+def _to_records(times, df):
+    """Convert parsed times and scaled price strings into a BAR_DTYPE array"""
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records['time'] = times
+    for column in ['open', 'high', 'low', 'close']:
+        records[column] = df[column].to_numpy(dtype='f8') / LEAN_PRICE_MULTIPLIER
+    records['volume'] = df['volume'].to_numpy(dtype='f8')
+    return records
+
+
+class LeanEquityStore:
+    """Read-only view of the Lean equity store with a persistent numpy index"""
+
+    def __init__(self, equity_path=EQUITY_DATA_PATH, index_path=None):
+        self.equity_path = equity_path
+        self.index_path = index_path or os.path.join(equity_path, '.index')
+        self._frames = {}
+
+    def source_files(self, symbol, resolution):
+        """List the Lean zips holding a symbol's bars for a resolution"""
+        symbol = symbol.lower()
+        if resolution == 'daily':
+            path = os.path.join(self.equity_path, 'daily', f"{symbol}.zip")
+            return [path] if os.path.exists(path) else []
+        if resolution == 'minute':
+            return sorted(glob.glob(os.path.join(self.equity_path, 'minute', symbol, '*_trade.zip')))
+        raise ValueError(f"Unsupported resolution {resolution}. Use one of {SUPPORTED_RESOLUTIONS}")
+
+    def _index_file(self, symbol, resolution):
+        return os.path.join(self.index_path, resolution, f"{symbol.lower()}.npy")
+
+    def _parse(self, files, resolution):
+        """Parse Lean zips into one sorted BAR_DTYPE array"""
+        chunks = []
+        for path in files:
+            df = _read_lean_csv(path)
+            if df is None or df.empty:
+                continue
+            if resolution == 'daily':
+                times = pd.to_datetime(df['time'], format='%Y%m%d %H:%M').to_numpy(dtype='datetime64[ns]')
+            else:
+                # Minute files store milliseconds since midnight, the date is in the file name
+                day = np.datetime64(pd.Timestamp(os.path.basename(path)[:8]), 'ns')
+                times = day + df['time'].to_numpy(dtype='i8').astype('timedelta64[ms]')
+            chunks.append(_to_records(times.astype('datetime64[ns]').astype('i8'), df))
+
+        if not chunks:
+            return np.empty(0, dtype=BAR_DTYPE)
+        records = np.concatenate(chunks)
+        records = records[np.argsort(records['time'], kind='stable')]
+        # Keep the last bar when the same timestamp appears in more than one file
+        keep = np.append(records['time'][1:] != records['time'][:-1], True)
+        return records[keep]
+
+    def build_index(self, symbol, resolution='daily'):
+        """(Re)build the numpy index for a symbol if any source zip is newer than it"""
+        files = self.source_files(symbol, resolution)
+        if not files:
+            return None
+
+        index_file = self._index_file(symbol, resolution)
+        newest_source = max(os.path.getmtime(path) for path in files)
+        if os.path.exists(index_file) and os.path.getmtime(index_file) >= newest_source:
+            return index_file
+
+        records = self._parse(files, resolution)
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        tmp_file = f"{index_file}.{os.getpid()}.tmp.npy"
+        np.save(tmp_file, records)
+        os.replace(tmp_file, index_file)
+        logger.info(f"Indexed {len(records)} {resolution} bars for {symbol} from {len(files)} file(s)")
+        return index_file
+
+    def load_bars(self, symbol, resolution='daily'):
+        """Return the memory-mapped BAR_DTYPE array for a symbol, or None if it is not stored"""
+        index_file = self.build_index(symbol, resolution)
+        if index_file is None:
+            return None
+        return np.load(index_file, mmap_mode='r')
+
+    def get_frame(self, symbol, resolution='daily'):
+        """Return a symbol's bars as a DataFrame indexed by exchange-local timestamps"""
+        key = (symbol.upper(), resolution)
+        if key in self._frames:
+            return self._frames[key]
+
+        records = self.load_bars(symbol, resolution)
+        if records is None or len(records) == 0:
+            return None
+
+        index = pd.DatetimeIndex(records['time'].astype('datetime64[ns]')).tz_localize(LEAN_TIMEZONE_EQUITY)
+        df = pd.DataFrame({column: np.asarray(records[column]) for column in ['open', 'high', 'low', 'close', 'volume']},
+                          index=index)
+        self._frames[key] = df
+        return df
+
+
+class LeanDataBacktesting(YahooDataBacktesting):
+    """
+    Drop-in replacement for YahooDataBacktesting that never touches the network
+
+    Bars come from the Lean store written by data_pipeline/. Daily ("day") and
+    minute timesteps are supported. For a fully offline run also pass
+    benchmark_asset=None and a fixed risk_free_rate to Strategy.backtest(), since
+    Lumibot fetches both from Yahoo outside of the data source.
+    """
+
+    # SOURCE stays "YAHOO" so the backtesting broker fills orders exactly as it does for Yahoo bars
+    RESOLUTIONS = {"1d": "daily", "1m": "minute"}
+
+    def __init__(self, datetime_start, datetime_end, equity_path=EQUITY_DATA_PATH, **kwargs):
+        super().__init__(datetime_start, datetime_end, **kwargs)
+        self.name = "lean"
+        self.lean_store = LeanEquityStore(equity_path)
+
+    @classmethod
+    def build_index(cls, symbols, resolution='daily', equity_path=EQUITY_DATA_PATH):
+        """Index symbols up front, e.g. before forking parallel backtests"""
+        store = LeanEquityStore(equity_path)
+        for symbol in symbols:
+            store.build_index(symbol, resolution)
+
+    def _get_source_symbol_data(self, asset, timestep):
+        if isinstance(asset, str):
+            asset = Asset(symbol=asset)
+
+        interval = self._parse_source_timestep(timestep, reverse=True)
+        store_key = self._store_key(asset, interval)
+        if store_key in self._data_store:
+            return self._data_store[store_key]
+
+        resolution = self.RESOLUTIONS.get(interval)
+        if resolution is None:
+            logger.error(f"Lean store has no {timestep} bars, supported timesteps are day and minute")
+            return None
+
+        df = self.lean_store.get_frame(asset.symbol, resolution)
+        if df is None or df.empty:
+            logger.error(
+                f"Lean store has no {resolution} data for {asset.symbol} under {self.lean_store.equity_path}. "
+                f"Download it with data_pipeline/main.py first."
+            )
+            return None
+
+        # YahooData expects corporate action columns; Lean store bars carry none
+        df = df.assign(dividend=0.0, stock_splits=0.0)
+        return self._append_data(asset, df, interval)
+
+    def _pull_source_bars(
+        self, assets, length, timestep=YahooDataBacktesting.MIN_TIMESTEP, timeshift=None, quote=None,
+        include_after_hours=False
+    ):
+        """Pull bars for a list of assets from the local store only"""
+        return {
+            asset: self._pull_source_symbol_bars(asset, length, timestep=timestep, timeshift=timeshift)
+            for asset in assets
+        }
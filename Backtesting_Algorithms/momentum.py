@@ -7,6 +7,11 @@ import os
 import alpaca_trade_api as alpaca
 import logging
 import asyncio
+import sys
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from indicators import roc
 
 #Environment variables 
 from dotenv import load_dotenv
@@ -102,12 +107,13 @@ class Momentum(Strategy):
 
     def get_assets_momentums(self):
         momentums = []
-        start_date = self.get_round_day(timeshift=self.period + 1)
-        end_date = self.get_round_day(timeshift=1)
         data = self.get_bars(self.symbols, self.period + 2, timestep="day")
+        closes = pd.concat({asset.symbol: bars_set.df["close"] for asset, bars_set in data.items()}, axis=1)
+        # Return over the last period days for every symbol in one pass
+        returns = roc(closes, self.period).iloc[-1]
         for asset, bars_set in data.items():
             symbol = asset.symbol
-            symbol_momentum = bars_set.get_momentum(start=start_date, end=end_date)
+            symbol_momentum = returns[symbol]
             self.log_message(
                 "%s has a return value of %.2f%% over the last %d day(s)."
                 % (symbol, 100 * symbol_momentum, self.period)
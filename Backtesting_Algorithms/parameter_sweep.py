@@ -0,0 +1,226 @@
+"""
+Parallel parameter sweeps for Lumibot backtests
+
+Runs one backtest per parameter combination in a process pool and collects the
+tearsheet metrics of every run into a single results table.
+"""
+
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+from lumibot.backtesting import YahooDataBacktesting
+from lumibot.tools import YahooHelper
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Metrics returned by Strategy.backtest() that end up in the results table
+METRIC_COLUMNS = ["total_return", "cagr", "volatility", "sharpe", "max_drawdown", "max_drawdown_date", "romad"]
+
+# Reports are written once per sweep (the results table), not once per run
+QUIET_BACKTEST_KWARGS = {
+    "show_plot": False,
+    "show_tearsheet": False,
+    "save_tearsheet": False,
+    "show_indicators": False,
+    "show_progress_bar": False,
+    "quiet_logs": True,
+}
+
+
+def expand_grid(param_grid):
+    """
+    Expand a parameter grid into a list of parameter dictionaries
+
+    Parameters:
+    param_grid (dict or list): Either {"name": [values, ...]} which is expanded as a
+        cartesian product, or an explicit list of parameter dictionaries
+
+    Returns:
+    list: One parameter dictionary per backtest
+    """
+    if isinstance(param_grid, (list, tuple)):
+        return [dict(params) for params in param_grid]
+
+    names = list(param_grid.keys())
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in param_grid.values()]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def collect_symbols(*parameter_sets):
+    """Find every ticker referenced by "symbol"/"symbols" entries in the given parameters"""
+    symbols = set()
+
+    def _walk(value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key == "symbol" and isinstance(item, str):
+                    symbols.add(item)
+                elif key == "symbols" and isinstance(item, (list, tuple, dict)):
+                    symbols.update(s for s in item if isinstance(s, str))
+                else:
+                    _walk(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                _walk(item)
+
+    for params in parameter_sets:
+        _walk(params)
+    return sorted(symbols)
+
+
+def warm_price_cache(symbols, interval="1d"):
+    """
+    Download daily bars once into Lumibot's local Yahoo cache
+
+    Every worker process reads the same pickles from LUMIBOT_CACHE_FOLDER afterwards,
+    so N parallel backtests cost one download per symbol instead of N.
+    """
+    if not symbols:
+        return
+    logger.info(f"Warming local price cache for {len(symbols)} symbols")
+    try:
+        YahooHelper.get_symbols_data(list(symbols), interval=interval)
+    except Exception as e:
+        logger.warning(f"Could not warm price cache, workers will fetch on demand: {e}")
+
+
+def flatten_metrics(result):
+    """Turn the dict returned by Strategy.backtest() into flat table columns"""
+    row = dict.fromkeys(METRIC_COLUMNS)
+    if not result:
+        return row
+
+    for key in ["total_return", "cagr", "volatility", "sharpe", "romad"]:
+        row[key] = result.get(key)
+
+    max_drawdown = result.get("max_drawdown")
+    if isinstance(max_drawdown, dict):
+        row["max_drawdown"] = max_drawdown.get("drawdown")
+        row["max_drawdown_date"] = max_drawdown.get("date")
+    else:
+        row["max_drawdown"] = max_drawdown
+    return row
+
+
+def _run_single_backtest(run_id, strategy_class, datasource_class, backtesting_start, backtesting_end,
+                         parameters, backtest_kwargs):
+    """Worker entry point: run one backtest and return its metrics row"""
+    row = {"run_id": run_id, "error": None}
+    started = datetime.now()
+    try:
+        result = strategy_class.backtest(
+            datasource_class,
+            backtesting_start,
+            backtesting_end,
+            name=f"{strategy_class.__name__}_sweep_{run_id}",
+            parameters=parameters,
+            **backtest_kwargs,
+        )
+        row.update(flatten_metrics(result))
+    except Exception as e:
+        row.update(flatten_metrics(None))
+        row["error"] = str(e)
+    row["runtime_seconds"] = (datetime.now() - started).total_seconds()
+    return row
+
+
+def run_parameter_sweep(strategy_class, param_grid, backtesting_start, backtesting_end,
+                        datasource_class=YahooDataBacktesting, symbols=None, max_workers=None,
+                        results_file=None, **backtest_kwargs):
+    """
+    Backtest a Lumibot strategy over a parameter grid in parallel
+
+    Parameters:
+    strategy_class (type): Lumibot Strategy subclass, importable from a module
+    param_grid (dict or list): Grid accepted by expand_grid()
+    backtesting_start (datetime): Start of the backtest window
+    backtesting_end (datetime): End of the backtest window
+    datasource_class (type): Backtesting data source, defaults to YahooDataBacktesting
+    symbols (list): Tickers to pre-load into the shared price cache or Lean index. Defaults to the
+        symbols found in the grid, the strategy's default parameters and the benchmark
+    max_workers (int): Size of the process pool, defaults to all cores
+    results_file (str): Optional CSV path for the results table
+    **backtest_kwargs: Extra arguments for Strategy.backtest (fees, benchmark_asset, ...)
+
+    Returns:
+    pandas.DataFrame: One row per parameter combination with its tearsheet metrics
+    """
+    parameter_sets = expand_grid(param_grid)
+    if not parameter_sets:
+        raise ValueError("Parameter grid is empty")
+
+    kwargs = dict(QUIET_BACKTEST_KWARGS)
+    kwargs.update(backtest_kwargs)
+
+    if symbols is None:
+        symbols = collect_symbols(getattr(strategy_class, "parameters", {}), *parameter_sets)
+        benchmark = kwargs.get("benchmark_asset", "SPY")
+        if isinstance(benchmark, str):
+            symbols.append(benchmark)
+    symbols = sorted(set(symbols))
+
+    if datasource_class is YahooDataBacktesting:
+        warm_price_cache(symbols)
+    elif hasattr(datasource_class, "build_index"):
+        # Offline sources (LeanDataBacktesting) index their store once instead of once per worker
+        datasource_class.build_index(symbols)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_workers = min(max_workers, len(parameter_sets))
+    logger.info(f"Running {len(parameter_sets)} backtests of {strategy_class.__name__} on {max_workers} workers")
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_run_single_backtest, run_id, strategy_class, datasource_class,
+                            backtesting_start, backtesting_end, params, kwargs): run_id
+            for run_id, params in enumerate(parameter_sets)
+        }
+        for future in as_completed(futures):
+            row = future.result()
+            if row["error"]:
+                logger.error(f"Run {row['run_id']} failed: {row['error']}")
+            else:
+                logger.info(f"Run {row['run_id']} finished: sharpe={row['sharpe']}, total_return={row['total_return']}")
+            rows.append(row)
+
+    metrics = pd.DataFrame(rows).set_index("run_id").sort_index()
+    params = pd.DataFrame(parameter_sets)
+    params.index.name = "run_id"
+    results = params.join(metrics)
+
+    if results_file:
+        results.to_csv(results_file)
+        logger.info(f"Saved sweep results to {results_file}")
+
+    return results
+
+
+if __name__ == "__main__":
+    from lumibot.entities import TradingFee
+    from Diversified_leverage import DiversifiedLeverage
+
+    trading_fee = TradingFee(percent_fee=0.005)
+    base_portfolio = DiversifiedLeverage.parameters["portfolio"]
+    equal_weight = [{"symbol": asset["symbol"], "weight": 1 / len(base_portfolio)} for asset in base_portfolio]
+
+    results = run_parameter_sweep(
+        DiversifiedLeverage,
+        {
+            "portfolio": [base_portfolio, equal_weight],
+            "rebalance_period": [1, 2, 4, 8, 16],
+        },
+        datetime(2024, 1, 1),
+        datetime(2024, 9, 12),
+        benchmark_asset="SPY",
+        buy_trading_fees=[trading_fee],
+        sell_trading_fees=[trading_fee],
+        results_file="diversified_leverage_sweep.csv",
+    )
+    print(results.drop(columns=["portfolio"]).sort_values("sharpe", ascending=False))
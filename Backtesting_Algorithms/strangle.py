@@ -1,13 +1,43 @@
 import datetime
 import logging
 import time
-from itertools import cycle
 
-import pandas as pd
-from yfinance import Ticker, download
+import numpy as np
+from yfinance import Ticker
 
 from lumibot.strategies.strategy import Strategy
 
+# How long fetched earnings dates are reused before refetching
+EARNINGS_TTL = datetime.timedelta(days=1)
+
+
+def select_strikes(strikes, last_price):
+    """
+    Strikes for the strangle: the nearest strike above and below the price
+
+    Same choice as walking the sorted strikes: the put is the highest strike below
+    last_price (0 if there is none) and the call the lowest strike above it, falling
+    back to the put strike when no strike is above.
+
+    Returns:
+    tuple: (call_strike, put_strike)
+    """
+    strikes = np.asarray(strikes, dtype=float)
+    below = strikes[strikes < last_price]
+    above = strikes[strikes > last_price]
+    put_strike = float(below.max()) if len(below) else 0
+    call_strike = float(above.min()) if len(above) else put_strike
+    return call_strike, put_strike
+
+
+def select_expiration(expirations, today, max_days):
+    """Last expiration in chain order that is less than max_days away, or None"""
+    if not expirations:
+        return None
+    days = (np.array(expirations, dtype='datetime64[D]') - np.datetime64(today, 'D')).astype(int)
+    candidates = np.flatnonzero(days < max_days)
+    return expirations[candidates[-1]] if len(candidates) else None
+
 
 class Strangle(Strategy):
     """Strategy Description: Strangle
@@ -68,36 +98,40 @@ class Strangle(Strategy):
             "UBER",
         ]
 
+        # Earnings dates by symbol, as (fetched_at, value)
+        self.earnings_cache = dict()
+
         # Underlying Asset Objects.
         self.trading_pairs = dict()
+        self.next_asset = 0
         for symbol in self.symbols_universe:
             self.create_trading_pair(symbol)
 
     def before_starting_trading(self):
         """Create the option assets object for each underlying. """
-        self.asset_gen = self.asset_cycle(self.trading_pairs.keys())
+        # Every underlying's price from one get_last_prices call.
+        try:
+            underlying_prices = self.get_last_prices(list(self.trading_pairs))
+        except Exception as e:
+            logging.warning(f"Unable to get price data for the universe: {e}")
+            underlying_prices = {}
 
         for asset, options in self.trading_pairs.items():
             try:
-                if not options["chains"]:
-                    options["chains"] = self.get_chains(asset)
+                options["chains"] = self.get_chains(asset)
             except Exception as e:
                 logging.info(f"Error: {e}")
                 continue
 
-            try:
-                last_price = self.get_last_price(asset)
-                options["price_underlying"] = last_price
-                assert last_price != 0
-            except:
+            last_price = underlying_prices.get(asset)
+            if not last_price:
                 logging.warning(f"Unable to get price data for {asset.symbol}.")
                 options["price_underlying"] = 0
                 continue
+            options["price_underlying"] = last_price
 
             # Get dates from the options chain.
-            options["expirations"] = self.get_expiration(
-                options["chains"], exchange=self.exchange
-            )
+            options["expirations"] = self.get_expiration(options["chains"])
 
             # Find the first date that meets the minimum days requirement.
             options["expiration_date"] = self.get_expiration_date(
@@ -111,7 +145,10 @@ class Strangle(Strategy):
                 options["buy_call_strike"],
                 options["buy_put_strike"],
             ) = self.call_put_strike(
-                options["price_underlying"], asset.symbol, options["expiration_date"]
+                options["price_underlying"],
+                asset.symbol,
+                options["expiration_date"],
+                chains=options["chains"],
             )
 
             if not options["buy_call_strike"] or not options["buy_put_strike"]:
@@ -143,19 +180,18 @@ class Strangle(Strategy):
         filled_assets = [p.asset for p in positions]
         trade_cash = self.portfolio_value / (self.max_trades * 2)
 
-        # Sell positions:
-        for asset, options in self.trading_pairs.items():
-            if (
-                options["call"] not in filled_assets
-                and options["put"] not in filled_assets
-            ):
-                continue
-
-            if options["status"] > 1:
-                continue
-
-            last_price = self.get_last_price(asset)
-            if last_price == 0:
+        # Sell positions, pricing every held underlying with one get_last_prices call:
+        held = [
+            asset
+            for asset, options in self.trading_pairs.items()
+            if (options["call"] in filled_assets or options["put"] in filled_assets)
+            and options["status"] <= 1
+        ]
+        held_prices = self.get_last_prices(held) if held else {}
+        for asset in held:
+            options = self.trading_pairs[asset]
+            last_price = held_prices.get(asset)
+            if not last_price:
                 continue
 
             # The sell signal will be the maximum percent movement of original price
@@ -192,47 +228,64 @@ class Strangle(Strategy):
         if self.total_trades >= self.max_trades:
             return
 
-        for _ in range(len(self.trading_pairs.keys())):
+        # Walk the universe from where the last iteration stopped.
+        assets = list(self.trading_pairs.keys())
+        start = self.next_asset % len(assets) if assets else 0
+        rotation = assets[start:] + assets[:start]
+        held_symbols = {p.symbol for p in positions}
+        candidates = [
+            asset
+            for asset in rotation
+            if self.trading_pairs[asset]["status"] == 0
+            # Check for symbol in positions.
+            and asset.symbol not in held_symbols
+            # Check if options already traded.
+            and self.trading_pairs[asset]["call"] not in filled_assets
+            and self.trading_pairs[asset]["put"] not in filled_assets
+        ]
+
+        # Get the latest prices for every candidate's stock and options in one call
+        # (the data source may still look them up one by one).
+        quote_assets = [
+            a
+            for asset in candidates
+            for a in (asset, self.trading_pairs[asset]["call"], self.trading_pairs[asset]["put"])
+            if a is not None
+        ]
+        try:
+            quotes = self.get_last_prices(quote_assets) if quote_assets else {}
+        except Exception as e:
+            logging.info(f"Failed to get price data for the candidates: {e}")
+            quotes = {}
+
+        for i, asset in enumerate(rotation):
             if self.total_trades >= self.max_trades:
                 break
+            self.next_asset = start + i + 1
 
-            asset = next(self.asset_gen)
-            options = self.trading_pairs[asset]
-            if options["status"] > 0:
-                continue
-
-            # Check for symbol in positions.
-            if len([p.symbol for p in positions if p.symbol == asset.symbol]) > 0:
-                continue
-            # Check if options already traded.
-            if options["call"] in filled_assets or options["put"] in filled_assets:
+            if asset not in candidates:
                 continue
+            options = self.trading_pairs[asset]
 
-            # Get the latest prices for stock and options.
-            try:
-                print(asset, options["call"], options["put"])
-                asset_prices = self.get_last_prices(
-                    [asset, options["call"], options["put"]]
-                )
-                assert len(asset_prices) == 3
-            except:
+            asset_prices = [quotes.get(a) for a in (asset, options["call"], options["put"])]
+            if any(price is None for price in asset_prices):
                 logging.info(f"Failed to get price data for {asset.symbol}")
                 continue
 
-            options["price_underlying"] = asset_prices[asset]
-            options["price_call"] = asset_prices[options["call"]]
-            options["price_put"] = asset_prices[options["put"]]
+            (
+                options["price_underlying"],
+                options["price_call"],
+                options["price_put"],
+            ) = asset_prices
 
             # Check to make sure date is not too close to earnings.
-            print(f"Getting earnings date for {asset.symbol}")
-            edate_df = Ticker(asset.symbol).calendar
-            if edate_df is None:
+            edate = self.earnings_date(asset.symbol)
+            if edate is None:
                 print(
                     f"There was no calendar information for {asset.symbol} so it "
                     f"was not traded."
                 )
                 continue
-            edate = edate_df.iloc[0, 0].date()
             current_date = datetime.datetime.now().date()
             days_to_earnings = (edate - current_date).days
             if days_to_earnings > self.days_to_earnings_min:
@@ -319,18 +372,26 @@ class Strangle(Strategy):
             "status": 0,
         }
 
-    def asset_cycle(self, assets):
-        # Used to cycle through the assets for investing, prevents starting
-        # at the beginning of the asset list on each iteration.
-        for asset in cycle(assets):
-            yield asset
-
-    def call_put_strike(self, last_price, symbol, expiration_date):
+    def earnings_date(self, symbol):
+        """Next earnings date from the yfinance calendar, refetched once older than EARNINGS_TTL"""
+        now = datetime.datetime.now()
+        cached = self.earnings_cache.get(symbol)
+        if cached is None or now - cached[0] > EARNINGS_TTL:
+            print(f"Getting earnings date for {symbol}")
+            calendar = Ticker(symbol).calendar
+            if isinstance(calendar, dict):
+                # Newer yfinance returns the calendar as a dict of lists
+                edate = (calendar.get("Earnings Date") or [None])[0]
+            elif calendar is None or calendar.empty:
+                edate = None
+            else:
+                edate = calendar.iloc[0, 0].date()
+            cached = self.earnings_cache[symbol] = (now, edate)
+        return cached[1]
+
+    def call_put_strike(self, last_price, symbol, expiration_date, chains=None):
         """Returns strikes for pair."""
 
-        buy_call_strike = 0
-        buy_put_strike = 0
-
         asset = self.create_asset(
             symbol,
             asset_type="option",
@@ -339,28 +400,12 @@ class Strangle(Strategy):
             multiplier=100,
         )
 
-        strikes = self.get_strikes(asset)
+        # Passing the chains fetched before trading saves get_strikes from fetching them again
+        strikes = self.get_strikes(asset, chains)
 
-        for strike in strikes:
-            if strike < last_price:
-                buy_put_strike = strike
-                buy_call_strike = strike
-            elif strike > last_price and buy_call_strike < last_price:
-                buy_call_strike = strike
-            elif strike > last_price and buy_call_strike > last_price:
-                break
-
-        return buy_call_strike, buy_put_strike
+        return select_strikes(strikes, last_price)
 
     def get_expiration_date(self, expirations):
         """Expiration date that is closest to, but less than max days to expriry. """
-        expiration_date = None
-        # Expiration
         current_date = datetime.datetime.now().date()
-        for expiration in expirations:
-            ex_date = expiration
-            net_days = (ex_date - current_date).days
-            if net_days < self.max_days_expiry:
-                expiration_date = expiration
-
-        return expiration_date
\ No newline at end of file
+        return select_expiration(expirations, current_date, self.max_days_expiry)
\ No newline at end of file
@@ -7,6 +7,11 @@ from lumibot.backtesting import YahooDataBacktesting
 from dotenv import load_dotenv
 load_dotenv()
 
+import sys
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from strategy_helpers import MarketSnapshot
+
 from datetime import datetime
 
 # Populate the ALPACA_CONFIG dictionary
@@ -16,10 +21,37 @@ ALPACA_CONFIG = {
     'BASE_URL': os.environ.get('BASE_URL')
 }
 
+# Number of recent prints kept per symbol, the swing check only looks at the last 3
+HISTORY_LENGTH = 3
+
+
+def last_prints(history, counts, n=HISTORY_LENGTH):
+    """
+    Last n prints of every symbol from a (symbols, HISTORY_LENGTH) ring, oldest first
+
+    Parameters:
+    history (numpy.ndarray): Ring buffer, row i holds symbol i's prints at slot count % HISTORY_LENGTH
+    counts (numpy.ndarray): Number of prints written per symbol
+
+    Returns:
+    numpy.ndarray: (symbols, n) array, NaN where a symbol has fewer than n prints
+    """
+    length = history.shape[1]
+    slots = (counts[:, None] - n + np.arange(n)) % length
+    prints = np.take_along_axis(history, slots, axis=1)
+    prints[counts < n] = np.nan
+    return prints
+
+
+def swing_highs(history, counts, min_prints=HISTORY_LENGTH + 1):
+    """Symbols whose last three prints are strictly rising, as one vectorized comparison"""
+    prints = last_prints(history, counts, 3)
+    with np.errstate(invalid='ignore'):
+        rising = (prints[:, 2] > prints[:, 1]) & (prints[:, 1] > prints[:, 0])
+    return rising & (counts >= min_prints)
+
+
 class SwingHigh(Strategy):
-    data = {}  # Dictionary to store last price data for each symbol
-    order_numbers = {}  # Dictionary to store order numbers for each symbol
-    shares_per_ticker = {}  # Dictionary to specify the number of shares per ticker
 
     def initialize(self):
          
@@ -61,24 +93,37 @@ class SwingHigh(Strategy):
             }
             
         self.shares_per_ticker = self.symbols  # Directly assign the dictionary
+        self.order_numbers = {}  # Dictionary to store order numbers for each symbol
         self.sleeptime = "10S"  # Set the sleep time to 10 seconds
+
+        # Bounded per-instance price history: one ring row per symbol
+        self.symbol_list = list(self.symbols)
+        self.history = np.full((len(self.symbol_list), HISTORY_LENGTH), np.nan)
+        self.history_counts = np.zeros(len(self.symbol_list), dtype=np.int64)
     
     def on_trading_iteration(self):
-        for symbol in self.symbols:
-            if symbol not in self.data:
-                self.data[symbol] = []
+        # One batched price request and one positions listing for all symbols
+        snapshot = MarketSnapshot(self, self.symbol_list)
+        prices = np.array([snapshot.last_price(symbol) for symbol in self.symbol_list], dtype=float)
+        has_price = ~np.isnan(prices)
+        for symbol in np.array(self.symbol_list)[~has_price]:
+            self.log_message(f"No price data for {symbol}, skipping.")
 
-            entry_price = self.get_last_price(symbol)
-            if entry_price is None:
-                self.log_message(f"No price data for {symbol}, skipping.")
-                continue
+        # Append this tick's prints to the ring and scan every symbol at once
+        slots = self.history_counts[has_price] % HISTORY_LENGTH
+        self.history[has_price, slots] = prices[has_price]
+        self.history_counts[has_price] += 1
+        rising = swing_highs(self.history, self.history_counts)
 
-            self.log_message(f"Position for {symbol}: {self.get_position(symbol)}")
-            self.data[symbol].append(entry_price)
+        for i in np.flatnonzero(has_price):
+            symbol = self.symbol_list[i]
+            entry_price = prices[i]
+            position = snapshot.position(symbol)
+            self.log_message(f"Position for {symbol}: {position}")
 
-            if len(self.data[symbol]) > 3:
-                temp = self.data[symbol][-3:]
-                if None not in temp and temp[-1] > temp[1] > temp[0]:
+            if self.history_counts[i] > 3:
+                if rising[i]:
+                    temp = last_prints(self.history[i:i + 1], self.history_counts[i:i + 1])[0].tolist()
                     self.log_message(f"Last 3 prints for {symbol}: {temp}")
                     order = self.create_order(symbol, quantity=self.shares_per_ticker[symbol], side="buy")
                     self.submit_order(order)
@@ -88,11 +133,11 @@ class SwingHigh(Strategy):
                     if self.order_numbers[symbol] == 1:
                         self.log_message(f"Entry price for {symbol}: {temp[-1]}")
                         entry_price = temp[-1]  # filled price
-                
-                if self.get_position(symbol) and self.data[symbol][-1] < entry_price * 0.995:
+
+                if position and prices[i] < entry_price * 0.995:
                     self.sell_all(symbol)
                     self.order_numbers[symbol] = 0
-                elif self.get_position(symbol) and self.data[symbol][-1] >= entry_price * 1.015:
+                elif position and prices[i] >= entry_price * 1.015:
                     self.sell_all(symbol)
                     self.order_numbers[symbol] = 0
 
@@ -0,0 +1,245 @@
+"""
+Vectorized simulator for fixed-weight, periodically rebalanced portfolios
+
+Reproduces the DiversifiedLeverage rebalancing rule (whole shares, target value =
+portfolio value * weight, percent fees on both sides) over a price matrix, for every
+combination of rebalance period and weight set at once. Use it to screen weight
+mixes before running the full event-driven Lumibot backtest.
+"""
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def target_quantities(portfolio_value, weights, prices):
+    """
+    Whole-share target holdings for a fixed-weight portfolio
+
+    Same rule as DiversifiedLeverage.rebalance_portfolio: shares = value * weight // price.
+    All arguments broadcast, so this works for one portfolio or a batch of them.
+    """
+    return np.floor(np.asarray(portfolio_value)[..., None] * weights / prices)
+
+
+def random_weight_sets(n_sets, n_assets, seed=None, include=None):
+    """
+    Draw random long-only weight vectors that sum to 1 (uniform on the simplex)
+
+    Parameters:
+    n_sets (int): Number of weight sets to draw
+    n_assets (int): Number of assets per set
+    seed (int): Random seed
+    include (array-like): Optional weight sets placed first, e.g. the current portfolio
+
+    Returns:
+    numpy.ndarray: Array of shape (sets, assets)
+    """
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(n_assets), size=n_sets)
+    if include is not None:
+        weights = np.vstack([np.atleast_2d(include), weights])
+    return weights
+
+
+def lumibot_daily_prices(open_df, backtesting_start, backtesting_end=None):
+    """
+    Select the bars a Lumibot daily backtest iterates over
+
+    Each daily iteration of a pandas-data backtest sees one bar: get_last_price() and
+    portfolio_value use that bar's open and market orders fill at it. The bars iterated are the
+    ones stamped after backtesting_start up to and including backtesting_end, matching the
+    recorded run in lumibot_diversified_leverage_run.csv.
+
+    Parameters:
+    open_df (pandas.DataFrame): Daily opens, one column per symbol
+    backtesting_start (datetime): Backtest start passed to Lumibot
+    backtesting_end (datetime): Optional backtest end passed to Lumibot
+
+    Returns:
+    pandas.DataFrame: Opens indexed by iteration date, the prices for simulate_target_weights()
+    """
+    opens = open_df.dropna()
+    dates = opens.index.tz_localize(None) if opens.index.tz is not None else opens.index
+    first = int(np.searchsorted(dates, pd.Timestamp(backtesting_start), side='right'))
+    last = len(opens) if backtesting_end is None else int(np.searchsorted(dates, pd.Timestamp(backtesting_end), side='right'))
+    if first == last:
+        raise ValueError("open_df has no bars between backtesting_start and backtesting_end")
+    return opens.iloc[first:last]
+
+
+def simulate_target_weights(prices, weight_sets, rebalance_periods, initial_cash=100000.0, fee=0.0,
+                            sizing_prices=None, fill_prices=None):
+    """
+    Simulate every (rebalance period, weight set) pair in one pass over time
+
+    Parameters:
+    prices (array-like): (time, assets) prices used to value the portfolio each bar
+    weight_sets (array-like): (sets, assets) target weights, or a single weight vector
+    rebalance_periods (array-like): Rebalance every N bars, starting on the first bar
+    initial_cash (float): Starting cash
+    fee (float): Fee as a fraction of traded value, charged on buys and sells
+        (TradingFee(percent_fee=0.005) -> fee=0.005)
+    sizing_prices (array-like): Optional (time, assets) prices used to value the portfolio and
+        size orders on rebalance bars, defaults to prices
+    fill_prices (array-like): Optional (time, assets) prices orders fill at, defaults to sizing_prices
+
+    Lumibot's daily backtests size, fill and value at the same bar's open, so its runs need only
+    prices, see lumibot_daily_prices().
+
+    Returns:
+    dict: "equity" (periods, sets, time), "fees" (periods, sets) and "trades" (periods, sets)
+    """
+    prices = np.asarray(prices, dtype=float)
+    sizing_prices = prices if sizing_prices is None else np.asarray(sizing_prices, dtype=float)
+    fill_prices = sizing_prices if fill_prices is None else np.asarray(fill_prices, dtype=float)
+    weights = np.atleast_2d(np.asarray(weight_sets, dtype=float))
+    periods = np.atleast_1d(np.asarray(rebalance_periods, dtype=int))
+
+    if prices.ndim != 2 or not prices.shape == sizing_prices.shape == fill_prices.shape:
+        raise ValueError("prices, sizing_prices and fill_prices must all be (time, assets) matrices")
+    if weights.shape[1] != prices.shape[1]:
+        raise ValueError(f"Weight sets have {weights.shape[1]} assets but prices have {prices.shape[1]}")
+    if np.isnan(prices).any() or np.isnan(sizing_prices).any() or np.isnan(fill_prices).any():
+        raise ValueError("Price matrix contains NaNs, align or drop missing bars first")
+    if (periods < 1).any():
+        raise ValueError("Rebalance periods must be >= 1")
+
+    n_time, n_assets = prices.shape
+    n_periods, n_sets = len(periods), len(weights)
+
+    # Flatten (period, set) into one config axis so each bar is a handful of array ops
+    config_weights = np.broadcast_to(weights, (n_periods, n_sets, n_assets)).reshape(-1, n_assets)
+    config_periods = np.repeat(periods, n_sets)
+
+    shares = np.zeros((n_periods * n_sets, n_assets))
+    cash = np.full(n_periods * n_sets, float(initial_cash))
+    fees = np.zeros(n_periods * n_sets)
+    trades = np.zeros(n_periods * n_sets, dtype=np.int64)
+    equity = np.empty((n_periods * n_sets, n_time))
+
+    for t in range(n_time):
+        rebalance = (t % config_periods) == 0
+        if rebalance.any():
+            sizing_price, fill_price = sizing_prices[t], fill_prices[t]
+            held = shares[rebalance]
+            portfolio_value = cash[rebalance] + held @ sizing_price
+            delta = target_quantities(portfolio_value, config_weights[rebalance], sizing_price) - held
+            cost = (np.abs(delta) @ fill_price) * fee
+
+            shares[rebalance] = held + delta
+            cash[rebalance] -= delta @ fill_price + cost
+            fees[rebalance] += cost
+            trades[rebalance] += np.count_nonzero(delta, axis=1)
+
+        equity[:, t] = cash + shares @ prices[t]
+
+    return {
+        "equity": equity.reshape(n_periods, n_sets, n_time),
+        "fees": fees.reshape(n_periods, n_sets),
+        "trades": trades.reshape(n_periods, n_sets),
+    }
+
+
+def summarize(equity, dates=None, risk_free_rate=0.0):
+    """
+    Lumibot-style tearsheet metrics for a batch of equity curves
+
+    Parameters:
+    equity (numpy.ndarray): (..., time) equity curves
+    dates (pandas.DatetimeIndex): Bar dates, used for CAGR. Defaults to 252 bars a year
+    risk_free_rate (float): Annual risk-free rate for the Sharpe ratio
+
+    Returns:
+    dict: Arrays of total_return, cagr, volatility, sharpe and max_drawdown shaped (...)
+    """
+    equity = np.asarray(equity, dtype=float)
+    total_return = equity[..., -1] / equity[..., 0] - 1
+
+    if dates is not None and len(dates) > 1:
+        years = (dates[-1] - dates[0]).days / 365.25
+    else:
+        years = (equity.shape[-1] - 1) / TRADING_DAYS_PER_YEAR
+    years = max(years, 1e-9)
+    cagr = np.sign(1 + total_return) * np.abs(1 + total_return) ** (1 / years) - 1
+
+    returns = np.diff(equity, axis=-1) / equity[..., :-1]
+    volatility = returns.std(axis=-1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility > 0, (cagr - risk_free_rate) / volatility, 0.0)
+
+    running_max = np.maximum.accumulate(equity, axis=-1)
+    max_drawdown = (1 - equity / running_max).max(axis=-1)
+
+    return {
+        "total_return": total_return,
+        "cagr": cagr,
+        "volatility": volatility,
+        "sharpe": sharpe,
+        "max_drawdown": max_drawdown,
+    }
+
+
+def screen_portfolios(price_df, weight_sets, rebalance_periods, initial_cash=100000.0, fee=0.0,
+                      sizing_prices=None, fill_prices=None, risk_free_rate=0.0):
+    """
+    Simulate and rank every (rebalance period, weight set) pair
+
+    Parameters:
+    price_df (pandas.DataFrame): Prices with a DatetimeIndex and one column per symbol
+    weight_sets (array-like): (sets, assets) weights in price_df column order
+    rebalance_periods (array-like): Rebalance periods in bars
+    initial_cash, fee, sizing_prices, fill_prices: See simulate_target_weights(), DataFrames are
+        aligned to price_df's columns
+    risk_free_rate (float): See summarize()
+
+    Returns:
+    pandas.DataFrame: One row per pair with its weights and metrics, best Sharpe first
+    """
+    weights = np.atleast_2d(np.asarray(weight_sets, dtype=float))
+    periods = np.atleast_1d(np.asarray(rebalance_periods, dtype=int))
+    if isinstance(sizing_prices, pd.DataFrame):
+        sizing_prices = sizing_prices[price_df.columns].to_numpy()
+    if isinstance(fill_prices, pd.DataFrame):
+        fill_prices = fill_prices[price_df.columns].to_numpy()
+
+    result = simulate_target_weights(price_df.to_numpy(), weights, periods, initial_cash=initial_cash,
+                                     fee=fee, sizing_prices=sizing_prices, fill_prices=fill_prices)
+    metrics = summarize(result["equity"], dates=price_df.index, risk_free_rate=risk_free_rate)
+
+    period_index, set_index = np.meshgrid(np.arange(len(periods)), np.arange(len(weights)), indexing='ij')
+    table = pd.DataFrame({
+        "rebalance_period": periods[period_index.ravel()],
+        "weight_set": set_index.ravel(),
+    })
+    table = table.join(pd.DataFrame(weights[set_index.ravel()], columns=price_df.columns))
+    for key, values in metrics.items():
+        table[key] = values.ravel()
+    table["fees"] = result["fees"].ravel()
+    table["trades"] = result["trades"].ravel()
+    return table.sort_values("sharpe", ascending=False, ignore_index=True)
+
+
+if __name__ == "__main__":
+    from datetime import datetime
+
+    from lean_data_source import LeanEquityStore
+    from Diversified_leverage import DiversifiedLeverage
+
+    portfolio = DiversifiedLeverage.parameters["portfolio"]
+    symbols = [asset["symbol"] for asset in portfolio]
+    current_weights = [asset["weight"] for asset in portfolio]
+
+    store = LeanEquityStore()
+    opens = pd.concat({symbol: store.get_frame(symbol)["open"] for symbol in symbols}, axis=1)
+    prices = lumibot_daily_prices(opens, datetime(2024, 1, 1), datetime(2024, 9, 12))
+
+    # Weight set 0 with rebalance_period 4 is the DiversifiedLeverage default
+    results = screen_portfolios(
+        prices,
+        random_weight_sets(5000, len(symbols), seed=42, include=current_weights),
+        rebalance_periods=[1, 2, 4, 8, 16, 32],
+        fee=0.005,
+    )
+    print(results.head(20))
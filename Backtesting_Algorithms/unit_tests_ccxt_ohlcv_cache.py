@@ -0,0 +1,65 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from ccxt_ohlcv_cache import CcxtOhlcvCache, TIMEFRAME_MS, _to_ms
+
+
+class StubExchange:
+    """Stands in for a ccxt exchange: deterministic daily candles and a log of fetches"""
+    id = "stub"
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append(since)
+        step = TIMEFRAME_MS[timeframe]
+        first = -(-since // step) * step
+        return [[t, t / 1e9, t / 1e9 + 1, t / 1e9 - 1, t / 1e9 + 0.5, 10.0]
+                for t in range(first, first + limit * step, step)]
+
+
+class TestCcxtOhlcvCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.exchange = StubExchange()
+        self.cache = CcxtOhlcvCache(self.exchange, self.path, page_limit=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_second_read_comes_from_disk(self):
+        first = self.cache.get_ohlcv("BTC/USDT", "1d", datetime(2024, 1, 1), datetime(2024, 1, 10))
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(self.exchange.calls), 3)  # 10 bars in pages of 4
+
+        cache = CcxtOhlcvCache(StubExchange(), self.path)
+        second = cache.get_ohlcv("BTC/USDT", "1d", datetime(2024, 1, 3), datetime(2024, 1, 5))
+        self.assertEqual(cache.exchange.calls, [])
+        self.assertTrue(second.equals(first.loc["2024-01-03":"2024-01-05"]))
+
+    def test_fetches_only_gaps_and_merges_ranges(self):
+        self.cache.get_ohlcv("BTC/USDT", "1d", datetime(2024, 1, 1), datetime(2024, 1, 5))
+        self.cache.get_ohlcv("BTC/USDT", "1d", datetime(2024, 1, 10), datetime(2024, 1, 12))
+        self.assertEqual(len(self.cache.ranges("BTC/USDT", "1d")), 2)
+
+        self.exchange.calls.clear()
+        df = self.cache.get_ohlcv("BTC/USDT", "1d", datetime(2024, 1, 3), datetime(2024, 1, 15))
+        self.assertEqual(self.exchange.calls, [_to_ms(datetime(2024, 1, 6)), _to_ms(datetime(2024, 1, 13))])
+        self.assertEqual(self.cache.ranges("BTC/USDT", "1d"),
+                         [(_to_ms(datetime(2024, 1, 1)), _to_ms(datetime(2024, 1, 16)))])
+        self.assertEqual(len(df), 13)
+        self.assertTrue(df.index.is_unique and df.index.is_monotonic_increasing)
+
+    def test_keys_are_separate(self):
+        self.cache.get_ohlcv("BTC/USDT", "1d", datetime(2024, 1, 1), datetime(2024, 1, 2))
+        self.cache.get_ohlcv("ETH/USDT", "1d", datetime(2024, 1, 1), datetime(2024, 1, 2))
+        self.cache.get_ohlcv("BTC/USDT", "1h", datetime(2024, 1, 1), datetime(2024, 1, 1, 3))
+        self.assertEqual(len(self.exchange.calls), 3)
+        self.assertEqual(len(self.cache.ranges("BTC/USDT", "1h")), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
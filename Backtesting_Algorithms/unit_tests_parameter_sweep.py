@@ -0,0 +1,52 @@
+import unittest
+from parameter_sweep import expand_grid, collect_symbols, flatten_metrics, METRIC_COLUMNS
+
+
+class TestParameterSweep(unittest.TestCase):
+
+    def test_expand_grid_cartesian_product(self):
+        grid = expand_grid({"rebalance_period": [1, 2], "fast": [5, 10], "symbol": "SPY"})
+        self.assertEqual(grid, [
+            {"rebalance_period": 1, "fast": 5, "symbol": "SPY"},
+            {"rebalance_period": 1, "fast": 10, "symbol": "SPY"},
+            {"rebalance_period": 2, "fast": 5, "symbol": "SPY"},
+            {"rebalance_period": 2, "fast": 10, "symbol": "SPY"},
+        ])
+
+    def test_expand_grid_explicit_list_is_copied(self):
+        params = [{"period": 1}, {"period": 2}]
+        grid = expand_grid(params)
+        self.assertEqual(grid, params)
+        grid[0]["period"] = 3
+        self.assertEqual(params[0]["period"], 1)
+
+    def test_expand_grid_empty_list(self):
+        self.assertEqual(expand_grid([]), [])
+
+    def test_collect_symbols_walks_nested_parameters(self):
+        portfolio = [{"symbol": "TQQQ", "weight": 0.5}, {"symbol": "TMF", "weight": 0.5}]
+        symbols = collect_symbols(
+            {"portfolio": portfolio, "rebalance_period": 4},
+            {"symbols": ["AAPL", "MSFT", 3]},
+            {"universe": {"symbols": {"SPY": 0.6, "TLT": 0.4}}},
+            {"symbol": ["not", "a", "string"]},
+        )
+        self.assertEqual(symbols, ["AAPL", "MSFT", "SPY", "TLT", "TMF", "TQQQ"])
+
+    def test_flatten_metrics(self):
+        result = {"total_return": 0.12, "cagr": 0.3, "volatility": 0.2, "sharpe": 1.5, "romad": 2.0,
+                  "max_drawdown": {"drawdown": 0.15, "date": "2024-04-19"}, "benchmark": "ignored"}
+        self.assertEqual(flatten_metrics(result), {
+            "total_return": 0.12, "cagr": 0.3, "volatility": 0.2, "sharpe": 1.5,
+            "max_drawdown": 0.15, "max_drawdown_date": "2024-04-19", "romad": 2.0,
+        })
+
+    def test_flatten_metrics_scalar_drawdown_and_failed_run(self):
+        row = flatten_metrics({"sharpe": 0.8, "max_drawdown": 0.1})
+        self.assertEqual(row["max_drawdown"], 0.1)
+        self.assertIsNone(row["max_drawdown_date"])
+        self.assertEqual(flatten_metrics(None), dict.fromkeys(METRIC_COLUMNS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+import numpy as np
+import pandas as pd
+from target_weight_simulator import simulate_target_weights, lumibot_daily_prices, screen_portfolios
+
+# DiversifiedLeverage backtested with PandasDataBacktesting over the opens in this file, midnight-stamped
+# daily bars, backtesting_start 2024-01-08, backtesting_end 2024-04-26, TradingFee(percent_fee=0.005) and
+# budget 100000. portfolio_value is self.portfolio_value at the start of each trading iteration.
+LUMIBOT_RUN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lumibot_diversified_leverage_run.csv")
+
+
+def rebalance_loop(prices, weights, period, initial_cash, fee):
+    """Bar-by-bar version of DiversifiedLeverage.rebalance_portfolio"""
+    cash, shares, equity = initial_cash, np.zeros(len(weights)), []
+    for t, price in enumerate(prices):
+        if t % period == 0:
+            portfolio_value = cash + shares @ price
+            for i, weight in enumerate(weights):
+                difference = (portfolio_value * weight) // price[i] - shares[i]
+                cash -= difference * price[i] + abs(difference) * price[i] * fee
+                shares[i] += difference
+        equity.append(cash + shares @ price)
+    return np.array(equity)
+
+
+class TestTargetWeightSimulator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.prices = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, (120, 3)), axis=0))
+        self.weights = np.array([[0.5, 0.3, 0.2], [0.2, 0.2, 0.6]])
+
+    def test_matches_loop(self):
+        result = simulate_target_weights(self.prices, self.weights, [1, 3, 7], initial_cash=10000, fee=0.005)
+        for p, period in enumerate([1, 3, 7]):
+            for s, weights in enumerate(self.weights):
+                expected = rebalance_loop(self.prices, weights, period, 10000, 0.005)
+                np.testing.assert_allclose(result["equity"][p, s], expected, rtol=1e-12)
+
+    def test_lumibot_daily_prices(self):
+        dates = pd.date_range("2024-01-01", periods=5, tz="America/New_York")
+        opens = pd.DataFrame({"A": [1.0, 2.0, 3.0, 4.0, 5.0]}, index=dates)
+        self.assertEqual(list(lumibot_daily_prices(opens, "2024-01-02")["A"]), [3.0, 4.0, 5.0])
+        self.assertEqual(list(lumibot_daily_prices(opens, "2024-01-02", "2024-01-04")["A"]), [3.0, 4.0])
+        with self.assertRaises(ValueError):
+            lumibot_daily_prices(opens, "2024-01-05")
+
+    def test_matches_lumibot_run(self):
+        run = pd.read_csv(LUMIBOT_RUN, index_col="date", parse_dates=True)
+        recorded = run["portfolio_value"].dropna()
+        prices = lumibot_daily_prices(run.drop(columns="portfolio_value"), "2024-01-08", "2024-04-26")
+        self.assertTrue(prices.index.equals(recorded.index))
+
+        weights = [0.20, 0.20, 0.10, 0.25, 0.10, 0.15]
+        equity = simulate_target_weights(prices, weights, [4], initial_cash=100000, fee=0.005)["equity"][0, 0]
+        # Lumibot reports the value before the iteration's orders, which only differs on rebalance bars
+        held = np.arange(len(equity)) % 4 != 0
+        np.testing.assert_allclose(equity[held], recorded.to_numpy()[held], rtol=1e-9)
+
+    def test_screen_portfolios(self):
+        price_df = pd.DataFrame(self.prices, columns=["A", "B", "C"],
+                                index=pd.bdate_range("2024-01-01", periods=len(self.prices)))
+        table = screen_portfolios(price_df, self.weights, [1, 5], fee=0.001)
+        self.assertEqual(len(table), 4)
+        self.assertTrue(table["sharpe"].is_monotonic_decreasing)
+        self.assertEqual(set(table["rebalance_period"]), {1, 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
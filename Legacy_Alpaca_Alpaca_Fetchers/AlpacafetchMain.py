@@ -8,6 +8,7 @@ import time
 from dotenv import load_dotenv
 
 import alpaca_trade_api as alpaca
+from alpaca_trade_api.rest import TimeFrame
 import json
 
 import smtplib
@@ -17,6 +18,8 @@ from email.mime.text import MIMEText
 from datetime import timedelta
 import os.path
 import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Load API key
 ALPACA_API_KEY = os.environ.get('ALPACAKEY')
@@ -40,67 +43,182 @@ TICKERS = tickers
 EMAIL_ADDRESS = os.environ.get("EMAIL_ADDRESS")
 EMAIL_PASSWORD = os.environ.get("EMAIL_PASSWORD")
 
+# Fetch pool configuration
+TICK_DATA_DIR = 'tick_data'
+FETCH_WORKERS = int(os.environ.get('ALPACA_FETCH_WORKERS', 16))
+TICKER_TIMEOUT = 20  # seconds one ticker may take, including rate limit waits
+BAR_BATCH_SIZE = 200  # symbols per multi-symbol minute bars request
+QUOTE_BATCH_SIZE = 200  # symbols per multi-symbol latest quotes request
+LIVE_BAR_MINUTES = 3  # closed minute bars each live cycle asks for, at least the 2 the checks read
+ASKS_KEPT = LIVE_BAR_MINUTES + 1  # minutes of latest-quote asks kept per ticker, the live window and the current minute
+CYCLE_TIMEOUT = 55  # seconds a whole fetch cycle may take, inside the one-minute decision window
+# Data API requests per minute for your plan (200 on the free plan, 10000 on Algo Trader Plus)
+ALPACA_RATE_LIMIT = int(os.environ.get('ALPACA_RATE_LIMIT', 200))
+
+
+class RateLimiter:
+    # Token bucket shared by the fetch threads: at most `rate` requests per `period` seconds
+    def __init__(self, rate, period=60.0):
+        self.rate = rate
+        self.period = period
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        # Waits for a request slot, raises TimeoutError if it would come after the deadline
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.period)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) * self.period / self.rate
+            if deadline is not None and now + wait_time > deadline:
+                raise TimeoutError('rate limit wait is longer than the time left for this ticker')
+            time.sleep(wait_time)
+
+rate_limiter = RateLimiter(ALPACA_RATE_LIMIT)
+
+
+def to_minutes(index):
+    # Minute keys as used in tick_data/*.csv, e.g. '2024-05-01 14:05'
+    return pd.to_datetime(index).strftime('%Y-%m-%d %H:%M')
+
+def fetch_minute_prices(tickers, start, end):
+    # First trade price of every minute for many tickers in one request: the minute bar open
+    rate_limiter.acquire()
+    bars = api.get_bars(list(tickers), TimeFrame.Minute, start = start.isoformat(), end = end.isoformat()).df
+    if bars.empty:
+        return pd.DataFrame(columns=['symbol', 'timestamp', 'price'])
+    if 'symbol' not in bars.columns:
+        bars['symbol'] = tickers[0]
+    return pd.DataFrame({'symbol': bars['symbol'].to_numpy(), 'timestamp': to_minutes(bars.index),
+                         'price': bars['open'].to_numpy()})
+
+def fetch_latest_asks(tickers):
+    # Latest ask of many tickers in one request, keyed by the minute it was quoted in
+    rate_limiter.acquire()
+    quotes = api.get_latest_quotes(list(tickers))
+    asks = pd.DataFrame([(symbol, quote.timestamp, quote.ask_price) for symbol, quote in quotes.items()],
+                        columns=['symbol', 'timestamp', 'ask_price'])
+    # Quote timestamps come back in New York time, bar minutes are UTC
+    asks['timestamp'] = to_minutes(pd.to_datetime(asks['timestamp'].tolist(), utc=True))
+    return asks
+
+# Asks seen by earlier live cycles, one per ticker and minute, so past minutes need no quote requests
+ask_history = pd.DataFrame(columns=['symbol', 'timestamp', 'ask_price'])
+
+def record_asks(asks):
+    # Keep the first ask seen in each minute, as fetch_first_asks does, returns the asks kept
+    global ask_history
+    frames = [frame for frame in (ask_history, asks) if not frame.empty]
+    history = pd.concat(frames) if frames else asks
+    history = history.drop_duplicates(['symbol', 'timestamp'], keep='first')
+    ask_history = history.sort_values(['symbol', 'timestamp'], kind='stable').groupby('symbol').tail(ASKS_KEPT)
+    return ask_history
+
+def fetch_first_asks(ticker, minutes, timeout=TICKER_TIMEOUT):
+    # First ask of each minute, one single-quote request per minute instead of every quote in the window
+    deadline = time.monotonic() + timeout
+    asks = []
+    for minute in minutes:
+        minute_start = pd.Timestamp(minute, tz='UTC')
+        rate_limiter.acquire(deadline)
+        quotes = api.get_quotes(str(ticker), start = minute_start.isoformat(),
+                                end = (minute_start + timedelta(minutes=1)).isoformat(), limit = 1).df
+        if not quotes.empty:
+            asks.append((ticker, minute, quotes['ask_price'].iloc[0]))
+    return pd.DataFrame(asks, columns=['symbol', 'timestamp', 'ask_price'])
+
+def write_csv_atomic(df, path):
+    # Readers never see a half written file, even if a late thread is still writing
+    tmp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+    df.to_csv(tmp_path)
+    os.replace(tmp_path, path)
+
+def collect(futures, deadline, label):
+    # Results of the futures that finish before the deadline, failures and stragglers are reported and skipped
+    done, pending = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+    results = []
+    for future in done:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            print('Skipping {}: {}'.format(futures[future], e))
+    if pending:
+        print('{} {} did not finish in time'.format(len(pending), label))
+    return results
+
+def fetch_tick_data(tickers, windows, latest_asks=False, workers=FETCH_WORKERS, cycle_timeout=CYCLE_TIMEOUT):
+    # Minute prices and asks for every ticker, written to tick_data/{ticker}.csv
+    # Prices are minute bar opens fetched BAR_BATCH_SIZE symbols per request. Asks are the first
+    # quote of the minutes the ROC and ask/LTP checks read, one request per ticker and minute.
+    # With latest_asks the latest quotes, QUOTE_BATCH_SIZE symbols per request, are recorded
+    # under the minute they were quoted in, so once the live loop has run for a few minutes
+    # every minute it reads already has an ask and only the gaps are requested per ticker.
+    # Prices and asks are merged for all tickers in one join. Returns the tickers written this cycle.
+    os.makedirs(TICK_DATA_DIR, exist_ok=True)
+    deadline = time.monotonic() + cycle_timeout
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    futures = {pool.submit(fetch_minute_prices, tickers[i:i + BAR_BATCH_SIZE], start, end): 'bar batch'
+               for i in range(0, len(tickers), BAR_BATCH_SIZE) for start, end in windows}
+    prices = collect(futures, deadline, 'bar batches')
+    prices = pd.concat(prices) if prices else pd.DataFrame(columns=['symbol', 'timestamp', 'price'])
+    prices = prices.sort_values(['symbol', 'timestamp'], kind='stable').drop_duplicates(['symbol', 'timestamp'])
+
+    known = pd.DataFrame(columns=['symbol', 'timestamp', 'ask_price'])
+    if latest_asks:
+        futures = {pool.submit(fetch_latest_asks, tickers[i:i + QUOTE_BATCH_SIZE]): 'quote batch'
+                   for i in range(0, len(tickers), QUOTE_BATCH_SIZE)}
+        latest = collect(futures, deadline, 'quote batches')
+        known = record_asks(pd.concat(latest)) if latest else ask_history
+    known_minutes = set(zip(known['symbol'], known['timestamp']))
+
+    # The 1-minute ROC and compare_ask_ltp read the last two minutes, the 30-minute ROC also the first
+    missing = {}
+    for ticker, minutes in prices.groupby('symbol', sort=False)['timestamp'].agg(list).items():
+        read = minutes[-2:] if latest_asks else sorted(set(minutes[:1] + minutes[-2:]))
+        read = [minute for minute in read if (ticker, minute) not in known_minutes]
+        if read:
+            missing[ticker] = read
+    futures = {pool.submit(fetch_first_asks, ticker, minutes): ticker for ticker, minutes in missing.items()}
+    asks = collect(futures, deadline, 'tickers')
+    # Do not wait for stragglers, tickers that have not started are dropped
+    pool.shutdown(wait=False, cancel_futures=True)
+    asks = pd.concat(asks) if asks else pd.DataFrame(columns=['symbol', 'timestamp', 'ask_price'])
+    if latest_asks:
+        asks = record_asks(asks)
+
+    merged = pd.merge(prices, asks, how='inner', on=['symbol', 'timestamp'])
+    for ticker, df in merged.groupby('symbol', sort=False):
+        write_csv_atomic(df.set_index('timestamp')[['price', 'ask_price']],
+                         os.path.join(TICK_DATA_DIR, '{}.csv'.format(ticker)))
+    written = set(merged['symbol'])
+    print('Tick data for {} of {} tickers ({:.0%}) this cycle: {} with prices, {} with asks'.format(
+        len(written), len(tickers), len(written) / max(len(tickers), 1),
+        prices['symbol'].nunique(), asks['symbol'].nunique()))
+    return [ticker for ticker in tickers if ticker in written]
+
 def get_minute_data(tickers):
-    
-    def save_min_data(ticker):
-        prices = api.get_trades(str(ticker), start = ((dt.now().astimezone(timezone('America/New_York'))) - timedelta(minutes=2)).isoformat(),
-                                        end = ((dt.now().astimezone(timezone('America/New_York')))).isoformat(), 
-                                        limit = 10000).df[['price']]
-        prices.index = pd.to_datetime(prices.index, format = '%Y-%m-%d').strftime('%Y-%m-%d %H:%M')
-        prices = prices[~prices.index.duplicated(keep='first')]
-
-        quotes = api.get_quotes(str(ticker), start = ((dt.now().astimezone(timezone('America/New_York'))) - timedelta(minutes=2)).isoformat(),
-                                        end = ((dt.now().astimezone(timezone('America/New_York')))).isoformat(), 
-                                        limit = 10000).df[['ask_price']]
-        quotes.index = pd.to_datetime(quotes.index, format = '%Y-%m-%d').strftime('%Y-%m-%d %H:%M')
-        quotes = quotes[~quotes.index.duplicated(keep='first')]
-
-        df = pd.merge(prices, quotes, how= 'inner', left_index=True, right_index= True)
-        df.to_csv('tick_data/{}.csv'.format(ticker))
-        
-    for ticker in tickers:
-        save_min_data(ticker)
+    # Whole minutes, so the window always holds LIVE_BAR_MINUTES closed bars stamped at their start
+    now = dt.now().astimezone(timezone('America/New_York'))
+    minute = now.replace(second=0, microsecond=0)
+    return fetch_tick_data(tickers, [(minute - timedelta(minutes=LIVE_BAR_MINUTES), now)], latest_asks=True)
 
 def get_past30_data(tickers):
-    
-    def save_30_data(ticker):
-        prices_1 = api.get_trades(str(ticker), start = ((dt.now().astimezone(timezone('America/New_York'))) - timedelta(minutes=30)).isoformat(),
-                                        end = ((dt.now().astimezone(timezone('America/New_York'))) - timedelta(minutes=28, seconds = 30)).isoformat(), 
-                                        limit = 10000).df[['price']]
-        prices_2 = api.get_trades(str(ticker), start = ((dt.now().astimezone(timezone('America/New_York'))) - timedelta(minutes=1, seconds = 30)).isoformat(),
-                                        end = ((dt.now().astimezone(timezone('America/New_York')))).isoformat(), 
-                                        limit = 10000).df[['price']]
-        
-        prices_1.index = pd.to_datetime(prices_1.index, format = '%Y-%m-%d').strftime('%Y-%m-%d %H:%M')
-        prices_2.index = pd.to_datetime(prices_2.index, format = '%Y-%m-%d').strftime('%Y-%m-%d %H:%M')
-        
-        prices = pd.concat([prices_1, prices_2])
-        prices = prices[~prices.index.duplicated(keep='first')]
-
-        quotes_1 = api.get_quotes(str(ticker), start = ((dt.now().astimezone(timezone('America/New_York'))) - timedelta(minutes=30)).isoformat(),
-                                        end = ((dt.now().astimezone(timezone('America/New_York'))) - timedelta(minutes=28, seconds = 30)).isoformat(), 
-                                        limit = 10000).df[['ask_price']]
-        quotes_2 = api.get_quotes(str(ticker), start = ((dt.now().astimezone(timezone('America/New_York'))) - timedelta(minutes=1, seconds = 30)).isoformat(),
-                                        end = ((dt.now().astimezone(timezone('America/New_York')))).isoformat(), 
-                                        limit = 10000).df[['ask_price']]
-        
-        quotes_1.index = pd.to_datetime(quotes_1.index, format = '%Y-%m-%d').strftime('%Y-%m-%d %H:%M')
-        quotes_2.index = pd.to_datetime(quotes_2.index, format = '%Y-%m-%d').strftime('%Y-%m-%d %H:%M')
-        
-        quotes = pd.concat([quotes_1, quotes_2])
-        quotes = quotes[~quotes.index.duplicated(keep='first')]
-        
-        df = pd.merge(prices, quotes, how= 'inner', left_index=True, right_index= True)
-        df.to_csv('tick_data/{}.csv'.format(ticker))
-    
-    for ticker in tickers:
-        save_30_data(ticker)
+    now = dt.now().astimezone(timezone('America/New_York'))
+    return fetch_tick_data(tickers, [(now - timedelta(minutes=30), now - timedelta(minutes=28, seconds = 30)),
+                                     (now - timedelta(minutes=1, seconds = 30), now)])
 
 def ROC(ask, timeframe):
         if timeframe == 30:
-            rocs = (ask[ask.shape[0] - 1] - ask[0])/(ask[0])
+            rocs = (ask.iloc[-1] - ask.iloc[0])/(ask.iloc[0])
         else:
-            rocs = (ask[ask.shape[0] - 1] - ask[ask.shape[0] -2])/(ask[ask.shape[0] - 2])
+            rocs = (ask.iloc[-1] - ask.iloc[-2])/(ask.iloc[-2])
         return rocs*1000
 
 # Returns a list of most recent ROCs for all tickers
@@ -109,7 +227,7 @@ def return_ROC_list(tickers, timeframe):
     for i in range(len(tickers)):
         df = pd.read_csv('tick_data/{}.csv'.format(tickers[i]))
         df.set_index('timestamp', inplace= True)
-        df.index = pd.to_datetime(df.index, format ='%Y-%m-%d').strftime('%Y-%m-%d %H:%M')
+        df.index = pd.to_datetime(df.index, format ='%Y-%m-%d %H:%M').strftime('%Y-%m-%d %H:%M')
         ROC_tickers.append(ROC(df['ask_price'], timeframe)) # [-1] forlast value (latest)
     return ROC_tickers
 
@@ -129,7 +247,7 @@ def compare_ask_ltp(tickers, timeframe):
                 buy_stock_init = tickers[max_ROC_index]
                 df = pd.read_csv('tick_data/{}.csv'.format(buy_stock_init))
                 df.set_index('timestamp', inplace= True)
-                df.index = pd.to_datetime(df.index, format ='%Y-%m-%d').strftime('%Y-%m-%d %H:%M')
+                df.index = pd.to_datetime(df.index, format ='%Y-%m-%d %H:%M').strftime('%Y-%m-%d %H:%M')
 
                 # list to keep track of number of ask_prices > price
                 buy_condition = []
@@ -266,7 +384,13 @@ def main():
                 # check if we have made the first ever trade yet, if yes, timeframe = 1 min, else trade at 10:00 am
                 if os.path.isfile('FirstTrade.csv'):
                     if float(api.get_account().cash) > 10:
-                        get_minute_data(tickers)
+                        # Only rank the tickers whose data was refreshed this cycle
+                        tickers = get_minute_data(tickers)
+                        if not tickers:
+                            # compare_ask_ltp has nothing to rank and would hand buy() None
+                            print('No tick data refreshed this cycle')
+                            time.sleep(2)
+                            continue
                         stock_to_buy = algo(tickers)
 
                         if stock_to_buy == 0:
@@ -327,7 +451,11 @@ def main():
                         time_to_10 = int(str(dt.strptime('10:00:00', '%H:%M:%S') - dt.strptime(((dt.now().astimezone(timezone('America/New_York')))).strftime('%H:%M:%S'), '%H:%M:%S')).split(':')[1])*60 + int(str(dt.strptime('10:00:00', '%H:%M:%S') - dt.strptime(((dt.now().astimezone(timezone('America/New_York')))).strftime('%H:%M:%S'), '%H:%M:%S')).split(':')[2])
                         time.sleep(time_to_10 - 20)
 
-                    get_past30_data(tickers)
+                    tickers = get_past30_data(tickers)
+                    if not tickers:
+                        print('No tick data refreshed for the first trade')
+                        time.sleep(2)
+                        continue
                     stock_to_buy = algo(tickers)
 
                     if stock_to_buy == 0:
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+import pandas as pd
+
+# The module builds its REST client at import, which needs some key
+os.environ.setdefault('ALPACAKEY', 'test')
+os.environ.setdefault('ALPACASECRETKEY', 'test')
+import AlpacafetchMain
+
+TICKERS = ['AAA', 'BBB']
+SESSION_START = datetime(2024, 5, 1, 14, 0, tzinfo=timezone.utc)
+
+
+def ask_at(ticker, minute):
+    """Deterministic ask rising every minute, different per ticker"""
+    step = (minute - SESSION_START) // timedelta(minutes=1)
+    return 100.0 + 10 * TICKERS.index(ticker) + step
+
+
+class FakeAlpaca:
+    """Stands in for alpaca.REST: closed minute bars stamped at the minute start, quotes at `now`"""
+
+    def __init__(self):
+        self.now = SESSION_START
+        self.quote_requests = []
+
+    def get_bars(self, tickers, timeframe, start, end):
+        start, end = pd.Timestamp(start).tz_convert('UTC'), pd.Timestamp(end).tz_convert('UTC')
+        minutes = pd.date_range(start.ceil('min'), end.floor('min') - timedelta(minutes=1), freq='min')
+        rows = [(minute, ticker, ask_at(ticker, minute) - 1) for ticker in tickers for minute in minutes]
+        df = pd.DataFrame(rows, columns=['timestamp', 'symbol', 'open']).set_index('timestamp')
+        return SimpleNamespace(df=df)
+
+    def get_latest_quotes(self, tickers):
+        minute = self.now.replace(second=0)
+        # Quote timestamps come back in New York time
+        stamp = pd.Timestamp(self.now).tz_convert('America/New_York')
+        return {ticker: SimpleNamespace(timestamp=stamp, ask_price=ask_at(ticker, minute)) for ticker in tickers}
+
+    def get_quotes(self, ticker, start, end, limit):
+        minute = pd.Timestamp(start).to_pydatetime()
+        self.quote_requests.append((ticker, minute))
+        return SimpleNamespace(df=pd.DataFrame({'ask_price': [ask_at(ticker, minute)]}, index=[minute]))
+
+
+class TestGetMinuteData(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.path = tempfile.mkdtemp()
+        os.chdir(self.path)
+        self.api = FakeAlpaca()
+        fake_api = self.api
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return fake_api.now if tz is None else fake_api.now.astimezone(tz)
+
+        self.patches = [mock.patch.object(AlpacafetchMain, 'api', self.api),
+                        mock.patch.object(AlpacafetchMain, 'dt', FrozenDatetime),
+                        mock.patch.object(AlpacafetchMain, 'ask_history', AlpacafetchMain.ask_history.iloc[:0])]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.path)
+
+    def run_cycle(self, now):
+        self.api.now = now
+        return AlpacafetchMain.get_minute_data(list(TICKERS))
+
+    def test_first_cycle_has_asks_for_the_minutes_read(self):
+        written = self.run_cycle(datetime(2024, 5, 1, 14, 6, 20, tzinfo=timezone.utc))
+        self.assertEqual(written, TICKERS)
+
+        df = pd.read_csv('tick_data/AAA.csv', index_col='timestamp')
+        self.assertEqual(list(df.index[-2:]), ['2024-05-01 14:04', '2024-05-01 14:05'])
+        self.assertEqual(list(df['ask_price'].iloc[-2:]), [104.0, 105.0])
+        self.assertEqual(list(df['price'].iloc[-2:]), [103.0, 104.0])
+
+        rocs = AlpacafetchMain.return_ROC_list(list(TICKERS), 1)
+        self.assertAlmostEqual(rocs[0], (105 - 104) / 104 * 1000)
+        self.assertAlmostEqual(rocs[1], (115 - 114) / 114 * 1000)
+        self.assertEqual(AlpacafetchMain.compare_ask_ltp(list(TICKERS), 1), 'AAA')
+
+    def test_later_cycles_reuse_recorded_asks(self):
+        self.run_cycle(datetime(2024, 5, 1, 14, 6, 20, tzinfo=timezone.utc))
+        requests = len(self.api.quote_requests)
+
+        # The 14:06 latest quote seen last cycle covers the newest closed bar
+        self.run_cycle(datetime(2024, 5, 1, 14, 7, 5, tzinfo=timezone.utc))
+        self.assertEqual(len(self.api.quote_requests), requests)
+
+        df = pd.read_csv('tick_data/BBB.csv', index_col='timestamp')
+        self.assertEqual(list(df.index[-2:]), ['2024-05-01 14:05', '2024-05-01 14:06'])
+        rocs = AlpacafetchMain.return_ROC_list(list(TICKERS), 1)
+        self.assertAlmostEqual(rocs[1], (116 - 115) / 115 * 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
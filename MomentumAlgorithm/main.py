@@ -14,14 +14,18 @@ class MomentumAlgorithm(QCAlgorithm):
             "FND", "JEF", "KHC", "KR", "LILA", "LILAK", "LPX", "MA", "MCO", "NU", "OXY", "SIRI", "SPY", "TMUS", "ULTA", "VOO", "VRSN"
         ]
         
-        # Add equities
-        for symbol in self.symbols:
-            self.add_equity(symbol, Resolution.DAILY)
-        
         self.period = 2  # Momentum period in days
         self.current_asset = None
         self.quantity = 0
 
+        # Add equities with a ROC indicator each. The engine updates them on every bar,
+        # so on_data reads momentums instead of requesting history per symbol.
+        self.rocs = {}
+        for symbol in self.symbols:
+            equity_symbol = self.add_equity(symbol, Resolution.DAILY).symbol
+            self.rocs[symbol] = self.roc(equity_symbol, self.period, Resolution.DAILY)
+            self.warm_up_indicator(equity_symbol, self.rocs[symbol], Resolution.DAILY)
+
     def on_data(self, data: Slice):
         # Calculate momentums every period days
         momentums = self.get_assets_momentums()
@@ -56,23 +60,41 @@ class MomentumAlgorithm(QCAlgorithm):
 
     def get_assets_momentums(self):
         momentums = []
-        for symbol in self.symbols:
-            history = self.history(symbol, self.period + 1, Resolution.DAILY)
-            if len(history) < self.period + 1:
+        not_ready = []
+        for symbol, roc in self.rocs.items():
+            if not roc.is_ready:
+                not_ready.append(symbol)
                 continue
-            
-            prices = history['close'].values
-            if len(prices) < 2:
+            momentums.append({
+                "symbol": symbol,
+                "return": roc.current.value,
+                "price": self.securities[symbol].price
+            })
+
+        if not_ready:
+            momentums.extend(self.get_history_momentums(not_ready))
+        return momentums
+
+    def get_history_momentums(self, symbols):
+        # Fallback for indicators that could not be warmed up (e.g. recent listings):
+        # one history request for all of them instead of one per symbol
+        history = self.history(symbols, self.period + 1, Resolution.DAILY)
+        if history.empty:
+            return []
+
+        closes = history['close'].unstack(level=0)
+        momentums = []
+        for symbol in closes.columns:
+            prices = closes[symbol].dropna().values
+            if len(prices) < self.period + 1:
                 continue
-            
+
             start_price = prices[0]
             end_price = prices[-1]
-            momentum_return = (end_price - start_price) / start_price
-            
             momentums.append({
-                "symbol": symbol,
-                "return": momentum_return,
+                "symbol": symbol.value,
+                "return": (end_price - start_price) / start_price,
                 "price": end_price
             })
-        
+
         return momentums
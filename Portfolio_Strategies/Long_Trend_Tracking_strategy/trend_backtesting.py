@@ -3,12 +3,15 @@ from lumibot.backtesting import YahooDataBacktesting
 from lumibot.strategies import Strategy
 from lumibot.traders import Trader
 from dotenv import load_dotenv
-import numpy as np
-import pandas as pd
 import os
 import requests
 from tenacity import retry, stop_after_attempt, wait_fixed
 import logging
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from strategy_helpers import MarketSnapshot
+from indicators import atr, adx, crossover
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO, 
@@ -65,20 +68,13 @@ class BacktestTrend(Strategy):
         
         return batch_data
     
-    def calculate_ATR(self, df):
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        return tr.rolling(Config.ATR_PERIOD).mean()
-    
-    def is_tradable(self, symbol):
+    def is_tradable(self, symbol, snapshot):
         try:
             history = self.get_historical_prices(symbol, 1, "day")
             if history is None or history.df.empty:
                 return False
             volume = history.df['volume'].iloc[0]
-            last_price = self.get_last_price(symbol)
+            last_price = snapshot.last_price(symbol)
             return volume * last_price > self.min_liquidity
         except Exception as e:
             self.logger.error(f"Error checking if {symbol} is tradable: {str(e)}")
@@ -88,33 +84,6 @@ class BacktestTrend(Strategy):
         risk_amount = self.portfolio_value * Config.RISK_PER_TRADE
         return int(risk_amount / atr) if atr > 0 else 0
     
-    def calculate_ADX(self, df, period=14):
-        df = df.copy()
-        df['high_low'] = df['high'] - df['low']
-        df['high_prev_close'] = abs(df['high'] - df['close'].shift(1))
-        df['low_prev_close'] = abs(df['low'] - df['close'].shift(1))
-        df['tr'] = df[['high_low', 'high_prev_close', 'low_prev_close']].max(axis=1)
-        
-        df['plus_dm'] = np.where(
-            (df['high'] - df['high'].shift(1)) > (df['low'].shift(1) - df['low']),
-            df['high'] - df['high'].shift(1), 0)
-        df['minus_dm'] = np.where(
-            (df['low'].shift(1) - df['low']) > (df['high'] - df['high'].shift(1)),
-            df['low'].shift(1) - df['low'], 0)
-        
-        # Smoothing
-        df['tr_smooth'] = df['tr'].ewm(alpha=1/period, adjust=False).mean()
-        df['plus_smooth'] = df['plus_dm'].ewm(alpha=1/period, adjust=False).mean()
-        df['minus_smooth'] = df['minus_dm'].ewm(alpha=1/period, adjust=False).mean()
-        
-        df['plus_di'] = (df['plus_smooth'] / df['tr_smooth']) * 100
-        df['minus_di'] = (df['minus_smooth'] / df['tr_smooth']) * 100
-        df['dx'] = (abs(df['plus_di'] - df['minus_di']) / 
-                   (df['plus_di'] + df['minus_di'])) * 100
-        df['adx'] = df['dx'].ewm(alpha=1/period, adjust=False).mean()
-        
-        return df[['adx', 'plus_di', 'minus_di']].iloc[-1]
-
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))  # 🆕 Error recovery
     def fetch_sector_data(self, symbol):
         url = f"https://financialmodelingprep.com/api/v3/profile/{symbol}?apikey={Config.FMP_API_KEY}"
@@ -126,12 +95,10 @@ class BacktestTrend(Strategy):
             self.logger.error(f"Sector data fetch failed for {symbol}: {e}")
             return 'Unknown'
 
-    def calculate_sector_exposure(self):
+    def calculate_sector_exposure(self, snapshot):
         sector_values = {}
-        # Get all positions and extract symbols
-        positions = self.get_positions()
-        
-        for position in positions:
+        # Positions and their prices come from this iteration's snapshot
+        for position in snapshot.positions.values():
             symbol = position.symbol
             if symbol not in self.sector_map:
                 self.sector_map[symbol] = self.fetch_sector_data(symbol)
@@ -139,16 +106,18 @@ class BacktestTrend(Strategy):
             sector = self.sector_map[symbol]
             
             # Calculate the market value of the position
-            market_value = position.quantity * self.get_last_price(symbol)  # Replace with the correct calculation
+            market_value = position.quantity * snapshot.last_price(symbol)
             sector_values[sector] = sector_values.get(sector, 0) + market_value
                     
         total_value = self.portfolio_value
         return {sector: value / total_value for sector, value in sector_values.items()} if total_value > 0 else {}
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-    def submit_order(self, order):
-        # Calculate transaction costs
+    def submit_order(self, order, snapshot=None):
+        # Calculate transaction costs, pricing from the iteration's snapshot when there is one
+        # (orders from outside on_trading_iteration fetch a fresh price)
+        last_price = snapshot.last_price(order.symbol) if snapshot is not None else self.get_last_price(order.asset)
         cost = Config.TRANSACTION_COST_PER_SHARE * order.quantity
-        slippage = order.quantity * self.get_last_price(order.symbol) * Config.SLIPPAGE_RATE
+        slippage = order.quantity * last_price * Config.SLIPPAGE_RATE
         total_cost = cost + slippage
         
         self.transaction_costs += total_cost
@@ -181,16 +150,18 @@ class BacktestTrend(Strategy):
                 return
                 
             spy_data = batch_data["SPY"].df
-            market_trend = self.calculate_ADX(spy_data)
+            market_adx = adx(spy_data['high'], spy_data['low'], spy_data['close'], self.adx_window)[0].iloc[-1]
             
-            if market_trend.adx < Config.ADX_THRESHOLD:
-                self.logger.info(f"Market ADX below threshold: {market_trend.adx} - not trading")
+            if market_adx < Config.ADX_THRESHOLD:
+                self.logger.info(f"Market ADX below threshold: {market_adx} - not trading")
                 return  # Don't trade in range-bound markets
                 
-            sector_allocation = self.calculate_sector_exposure()
-            
             # Fixed iteration through symbols when self.symbols is a list
             symbols_to_check = self.symbols if isinstance(self.symbols, list) else list(self.symbols.keys())
+
+            # One batched price request and one positions listing for the whole iteration
+            snapshot = MarketSnapshot(self, symbols_to_check, include_positions=True)
+            sector_allocation = self.calculate_sector_exposure(snapshot)
             
             for symbol in symbols_to_check:
                 if symbol not in batch_data:
@@ -201,7 +172,7 @@ class BacktestTrend(Strategy):
                 if symbol not in self.sector_map:
                     self.sector_map[symbol] = self.fetch_sector_data(symbol)
                     
-                if not self.is_tradable(symbol):
+                if not self.is_tradable(symbol, snapshot):
                     self.logger.info(f"{symbol} not tradable - insufficient liquidity")
                     continue
                     
@@ -214,25 +185,24 @@ class BacktestTrend(Strategy):
                     self.logger.warning(f"Insufficient data for {symbol} - need at least 2 days")
                     continue
                 
-                current_crossover = (df['9_ema'].iloc[-1] > df['21_ema'].iloc[-1]) 
-                prev_crossover = (df['9_ema'].iloc[-2] < df['21_ema'].iloc[-2])
-                signal = "BUY" if current_crossover and prev_crossover else None
+                # 9 EMA closing above the 21 EMA after being strictly below it
+                signal = "BUY" if crossover(df['9_ema'], df['21_ema'], strict=True).iloc[-1] == 1 else None
                 
-                atr = self.calculate_ATR(df).iloc[-1]
-                position_size = self.calculate_position_size(atr)
+                symbol_atr = atr(df['high'], df['low'], df['close'], Config.ATR_PERIOD).iloc[-1]
+                position_size = self.calculate_position_size(symbol_atr)
                 
                 sector = self.sector_map[symbol]
                 if sector_allocation.get(sector, 0) >= Config.SECTOR_LIMIT:
                     self.logger.info(f"Sector {sector} exposure limit reached - skipping {symbol}")
                     continue
                     
-                self.execute_trade(symbol, signal, position_size)
+                self.execute_trade(symbol, signal, position_size, snapshot)
         except Exception as e:
             self.logger.error(f"Error in trading iteration: {str(e)}")
             # Continue operation despite errors
     
-    def execute_trade(self, symbol, signal, quantity):
-        position = self.get_position(symbol)
+    def execute_trade(self, symbol, signal, quantity, snapshot):
+        position = snapshot.position(symbol)
         
         if signal == "BUY":
             for i in range(3):
@@ -244,7 +214,7 @@ class BacktestTrend(Strategy):
                         type="trailing_stop",
                         trail_percent=Config.TRAILING_STOP_MULTIPLIER
                     )
-                    self.submit_order(order)
+                    self.submit_order(order, snapshot)
                 except Exception as e:
                     self.logger.error(f"Order failed: {e}")
                     
@@ -256,7 +226,7 @@ class BacktestTrend(Strategy):
                 type="trailing_stop",
                 trail_percent=Config.TRAILING_STOP_MULTIPLIER
             )
-            self.submit_order(order)
+            self.submit_order(order, snapshot)
    
     def emergency_shutdown(self):
         self.logger.critical("Initiating emergency shutdown")
@@ -11,9 +11,11 @@ load_dotenv()
 #Backtesting configurations
 from lumibot.entities import Asset, Order
 from lumibot.strategies import Strategy
-from lumibot.backtesting import CcxtBacktesting, YahooDataBacktesting
+from lumibot.backtesting import YahooDataBacktesting
 
-import ccxt
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Backtesting_Algorithms'))
+from ccxt_ohlcv_cache import CachedCcxtBacktesting
 
 ALPACA_API_KEY = os.getenv("APCA_API_KEY_ID")
 ALPACA_SECRET_KEY = os.getenv("APCA_API_SECRET_KEY")
@@ -193,9 +195,9 @@ def run_backtest(symbol, start_date, end_date, backtest_type="yahoo", base_bet=1
             end_date
         )
     elif backtest_type.lower() == "ccxt":
-        # Use CCXT for backtesting
-        CcxtBacktesting.MIN_TIMESTEP = "day"
-        backtesting = CcxtBacktesting(
+        # Use CCXT for backtesting, with bars read through the local OHLCV cache
+        CachedCcxtBacktesting.MIN_TIMESTEP = "day"
+        backtesting = CachedCcxtBacktesting(
             start_date,
             end_date,
         )
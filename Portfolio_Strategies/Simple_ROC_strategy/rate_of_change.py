@@ -15,8 +15,12 @@ from email.mime.text import MIMEText
 from datetime import timedelta
 import os.path
 import glob
+import sys
 import yfinance as yf
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from indicators import roc
+
 # Load API key
 
 load_dotenv()
@@ -87,11 +91,9 @@ def get_past30_data(tickers):
 
 # Calculate Rate of Change (ROC) for a given timeframe
 def ROC(close, timeframe):
-    if timeframe == 30:
-        rocs = (close.iloc[-1] - close.iloc[0]) / close.iloc[0]
-    else:
-        rocs = (close.iloc[-1] - close.iloc[-2]) / close.iloc[-2]
-    return rocs * 1000
+    # The 30 minute window measures from its first bar, otherwise from the previous bar
+    length = len(close) - 1 if timeframe == 30 else 1
+    return roc(close.to_numpy(), length)[-1] * 1000
 
 # Returns a list of most recent ROCs for all tickers
 def return_ROC_list(tickers):
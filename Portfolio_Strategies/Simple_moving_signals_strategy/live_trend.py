@@ -6,6 +6,10 @@ from lumibot.traders import Trader
 import numpy as np
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from strategy_helpers import MarketSnapshot
 
 
 from dotenv import load_dotenv
@@ -33,7 +37,8 @@ class Trend(Strategy):
         # Define the symbols and dynamically calculate the quantity based on the cash available
         cash = 100000  # $1M
         symbols = ["AAPL", "MSFT", "GOOG"] #just samples
-        prices = {symbol: self.get_last_price(symbol) for symbol in symbols} #Potential warning generator
+        snapshot = MarketSnapshot(self, symbols)
+        prices = snapshot.prices
         quantities = {symbol: cash // (len(symbols) * prices[symbol]) for symbol in symbols}
         print(f"Symbols: {symbols}")
         print(f"Quantities: {quantities}")
@@ -55,14 +60,14 @@ class Trend(Strategy):
             print(f"Signal for {symbol}: {self.signal}")
 
             if self.signal == 'BUY':
-                pos = self.get_position(symbol)
+                pos = snapshot.position(symbol)
                 if pos is not None:
                     self.sell_all()
                     
                 order = self.create_order(symbol, quantity, "buy")
                 self.submit_order(order)
             elif self.signal == 'SELL':
-                pos = self.get_position(symbol)
+                pos = snapshot.position(symbol)
                 if pos is not None:
                     self.sell_all()
                     
@@ -1,4 +1,3 @@
-import backtrader as bt
 import matplotlib.pyplot as plt 
 from dotenv import load_dotenv
 load_dotenv()
@@ -42,13 +41,24 @@ EMAIL_RECEIVER = os.environ.get('YOUR_EMAIL_ADDRESS')
 paper = True
 
 import yfinance as yf
-import backtrader as bt
 import pandas as pd
+import numpy as np
 import pytz
+import sys
 import time
 import threading
+from functools import partial
 
-# Strategy Class for SMA Crossover
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from indicators import MACrossover
+
+# SMA crossover settings, same as SmaCross in backtest_sma_crossover.py
+FAST_SMA = 13
+SLOW_SMA = 25
+ORDER_SIZE = 100
+COMMISSION = 0.001
+POLL_INTERVAL = 60  # seconds between minute-bar fetches
+REPORT_WINDOW = 15  # minutes between statistics reports
 
 trading_api = tradeapi.REST(API_KEY, API_SECRET, APCA_API_BASE_URL, 'v2')
 
@@ -83,58 +93,170 @@ def mail_alert(mail_content, sleep_time):
     session.quit()
     time.sleep(sleep_time)
 
-class SmaCross(bt.Strategy):
-    params = dict(pfast=13, pslow=25)
+class SymbolState:
+    """Rolling SMA crossover and trade statistics for one ticker, updated with new bars only"""
 
     def __init__(self):
-        sma1 = bt.ind.SMA(period=self.p.pfast)
-        sma2 = bt.ind.SMA(period=self.p.pslow)
-        self.crossover = bt.ind.CrossOver(sma1, sma2)
-
-    def next(self):
-        if not self.position:
-            if self.crossover > 0:  # Buy signal
-                self.buy(size=100)  # Example: buy 100 shares
-        elif self.crossover < 0:  # Sell signal
-            self.sell(size=100)  # Example: sell 100 shares
-
-    def stop(self):
-        # Strategy statistics after the strategy execution
-        total_value = self.broker.getvalue()
-        print(f"Final Portfolio Value: {total_value}")
-        print(f"Strategy Return: {100 * (total_value - self.starting_value) / self.starting_value}%")
-
-# Analyzer for Strategy Statistics
-def add_analyzers(cerebro):
-    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trade_analyzer")
-    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name="sharpe_ratio")
-
-async def fetch_minute_data(ticker):
-    loop = asyncio.get_event_loop()
-    end = dt.now()
-    start = end - timedelta(days=1)
-    try:
-        data = await loop.run_in_executor(None, yf.download, ticker, start, end, '1m')
-    except KeyError:
-        print(f"Data for ticker {ticker} is not available.")
-        return None  # Return None if data is not available
-    return data
-
-# Function to accumulate data for 15 minutes and run cerebro
-async def accumulate_and_run_cerebro(ticker):
-    accumulated_data = pd.DataFrame()
-    end_time = dt.now() + timedelta(minutes=15)
-    
-    while dt.now() < end_time:
-        data = await fetch_minute_data(ticker)
-        if data is not None and not data.empty:
-            accumulated_data = pd.concat([accumulated_data, data])
+        self.crossover = MACrossover(FAST_SMA, SLOW_SMA)
+        self.last_timestamp = None
+
+        # Simulated position, orders fill at the next bar's open like backtrader market orders
+        self.position = 0
+        self.entry_price = 0.0
+        self.entry_commission = 0.0
+        self.pending = None
+
+        self.total_trades = 0
+        self.won = 0
+        self.lost = 0
+        self.won_pnl = 0.0
+        self.lost_pnl = 0.0
+        self.max_return = 0.0
+        self.max_loss = 0.0
+        self.return_sum = 0.0
+        self.return_sq_sum = 0.0
+
+    def ingest(self, bars):
+        """Feed new bars (Open/Close columns, ascending timestamps) through the crossover"""
+        opens = bars['Open'].to_numpy(dtype=float)
+        closes = bars['Close'].to_numpy(dtype=float)
+        signals = self.crossover.update_many(closes)[:, 0]
+
+        for open_price, signal in zip(opens, signals):
+            self._fill_pending(open_price)
+            if not self.position:
+                if signal > 0:
+                    self.pending = 'buy'
+            elif signal < 0:
+                self.pending = 'sell'
+        self.last_timestamp = bars.index[-1]
+
+    def _fill_pending(self, price):
+        if self.pending == 'buy':
+            self.position = ORDER_SIZE
+            self.entry_price = price
+            self.entry_commission = price * ORDER_SIZE * COMMISSION
+        elif self.pending == 'sell':
+            pnl = (price - self.entry_price) * ORDER_SIZE - self.entry_commission - price * ORDER_SIZE * COMMISSION
+            self._record_trade(pnl, pnl / (self.entry_price * ORDER_SIZE))
+            self.position = 0
+        self.pending = None
+
+    def _record_trade(self, pnl, trade_return):
+        self.total_trades += 1
+        if pnl > 0:
+            self.won += 1
+            self.won_pnl += pnl
+            self.max_return = max(self.max_return, pnl)
         else:
+            self.lost += 1
+            self.lost_pnl += pnl
+            self.max_loss = min(self.max_loss, pnl)
+        self.return_sum += trade_return
+        self.return_sq_sum += trade_return ** 2
+
+    def statistics(self):
+        """Trade statistics over the bars ingested so far"""
+        total_trades = self.total_trades
+        avg_percent_gain = round(self.won_pnl / self.won, 2) if self.won > 0 else 0
+        avg_percent_loss = round(self.lost_pnl / self.lost, 2) if self.lost > 0 else 0
+
+        sharpe_ratio = "N/A"
+        if total_trades > 1:
+            mean = self.return_sum / total_trades
+            variance = (self.return_sq_sum - total_trades * mean ** 2) / (total_trades - 1)
+            if variance > 0:
+                sharpe_ratio = round(mean / np.sqrt(variance), 2)
+
+        return {
+            "total_trades": total_trades,
+            "win_rate": round((self.won / total_trades) * 100, 2) if total_trades > 0 else 0,
+            "avg_percent_gain": avg_percent_gain,
+            "avg_percent_loss": avg_percent_loss,
+            "gain_loss_ratio": round(avg_percent_gain / -avg_percent_loss, 2) if avg_percent_loss != 0 else float('inf'),
+            "max_return": round(self.max_return, 2),
+            "max_loss": round(self.max_loss, 2),
+            "sharpe_ratio": sharpe_ratio,
+        }
+
+
+class StreamingSmaEngine:
+    """
+    Streaming SMA crossover for a universe of tickers
+
+    One yfinance request per poll serves every ticker and only asks for bars since the
+    oldest bar already ingested. Bars are deduplicated by timestamp, so each bar goes
+    through the indicators exactly once.
+    """
+
+    def __init__(self, tickers):
+        self.tickers = list(tickers)
+        self.states = {ticker: SymbolState() for ticker in self.tickers}
+        self.session_date = None
+        self.last_refresh = None
+        self.lock = asyncio.Lock()
+
+    def fetch_start(self):
+        last_seen = [state.last_timestamp for state in self.states.values()]
+        if all(timestamp is not None for timestamp in last_seen):
+            return min(last_seen)
+        return dt.now() - timedelta(days=1)
+
+    async def refresh(self):
+        """Fetch and ingest new minute bars, at most once per POLL_INTERVAL for all callers"""
+        async with self.lock:
+            if self.last_refresh is not None and time.monotonic() - self.last_refresh < POLL_INTERVAL:
+                return
+            loop = asyncio.get_running_loop()
+            download = partial(yf.download, self.tickers, start=self.fetch_start(), interval='1m',
+                               group_by='ticker', progress=False)
+            try:
+                data = await loop.run_in_executor(None, download)
+            except Exception as e:
+                print(f"Minute data download failed: {e}")
+                data = None
+            self.last_refresh = time.monotonic()
+            if data is not None and not data.empty:
+                self.ingest(data)
+
+    def ingest(self, data):
+        """Route new, completed bars of a multi-ticker download to each ticker's state"""
+        # The bar of the current minute is still forming
+        now = pd.Timestamp.now(tz=data.index.tz)
+        data = data[data.index < now.floor('min')]
+        data = data[~data.index.duplicated(keep='last')]
+        if data.empty:
+            return
+
+        # Statistics cover one trading session, like the one-day download they replace
+        session_date = data.index[-1].date()
+        if session_date != self.session_date:
+            self.session_date = session_date
+            self.states = {ticker: SymbolState() for ticker in self.tickers}
+        data = data[data.index.date == session_date]
+
+        available = set(data.columns.get_level_values(0))
+        for ticker, state in self.states.items():
+            if ticker not in available:
+                continue
+            bars = data[ticker][['Open', 'Close']].dropna()
+            if state.last_timestamp is not None:
+                bars = bars[bars.index > state.last_timestamp]
+            if not bars.empty:
+                state.ingest(bars)
+
+
+# Function to stream bars for REPORT_WINDOW minutes and report the ticker's statistics
+async def stream_and_report(ticker, engine):
+    end_time = dt.now() + timedelta(minutes=REPORT_WINDOW)
+
+    while dt.now() < end_time:
+        await engine.refresh()
+        if engine.states[ticker].last_timestamp is None:
             print(f"No data for {ticker}, trying again in 1 minute.")
-        await asyncio.sleep(60)
-    
-    if not accumulated_data.empty:
-        run_cerebro_with_data(ticker, accumulated_data)
+        await asyncio.sleep(POLL_INTERVAL)
+
+    strategy_statistics(engine.states[ticker].statistics(), ticker)
 
 # Function to send orders if the results from run_cerebro are profitable : gain_loss_ratio > 1 and avg_percent_gain > 0
 def send_order(ticker, gain_loss_ratio, avg_percent_gain):
@@ -180,103 +302,107 @@ def sell_order(ticker, gain_loss_ratio, avg_percent_gain):
             tickers_sent.remove(ticker)
             total_sell_orders += 1
 
-# Run Cerebro for a stock with fetched data - 15 minutes - fails to run within the time zone
-def run_cerebro_with_data(ticker, data):
-
-    cerebro = bt.Cerebro()
-    cerebro.addstrategy(SmaCross)
-
-    # Convert the Yahoo Finance data to Backtrader data feed
-    data_bt = bt.feeds.PandasData(dataname=data)
-    cerebro.adddata(data_bt)
-
-    # Set starting cash and commission
-    cerebro.broker.setcash(10000.0)
-    cerebro.broker.setcommission(commission=0.001)
-
-    # Add analyzers for trade statistics
-    add_analyzers(cerebro)
-
-    # Run the strategy
-    results = cerebro.run()
-
-    # Print strategy statistics after each execution
-    strategy_statistics(results, ticker)
-
-# Function to calculate and display strategy statistics for a data collected from the past 15 minutes
-def strategy_statistics(results, ticker):
-    strat = results[0]
-    trade_analysis = strat.analyzers.trade_analyzer.get_analysis()
-    sharpe_ratio = strat.analyzers.sharpe_ratio.get_analysis().get('sharperatio', None)
-
-    # Total number of trades
-    total_trades = trade_analysis.total.closed
-
-    # Win Rate
-    win_rate = round((trade_analysis.won.total / total_trades) * 100, 2) if total_trades > 0 else 0
-
-    # Average Percent Gain and Loss
-    avg_percent_gain = round(trade_analysis.won.pnl.average, 2) if trade_analysis.won.total > 0 else 0
-    avg_percent_loss = round(trade_analysis.lost.pnl.average, 2) if trade_analysis.lost.total > 0 else 0
-
-    # Gain/Loss Ratio
-    gain_loss_ratio = round(avg_percent_gain / -avg_percent_loss, 2) if avg_percent_loss != 0 else float('inf')
-
-    # Max Return and Max Loss
-    max_return = round(trade_analysis.won.pnl.max, 2) if trade_analysis.won.total > 0 else 0
-    max_loss = round(trade_analysis.lost.pnl.max, 2) if trade_analysis.lost.total > 0 else 0
-
-    # Sharpe Ratio
-    sharpe_ratio = round(sharpe_ratio, 2) if sharpe_ratio else "N/A"
-
+# Function to display strategy statistics for the session streamed so far
+def strategy_statistics(stats, ticker):
     print(f"\nStrategy Statistics for {ticker}:")
-    print(f"Total Trades: {total_trades}")
-    print(f"Win Rate: {win_rate}%")
-    print(f"Average % Gain per Trade: {avg_percent_gain}%")
-    print(f"Average % Loss per Trade: {avg_percent_loss}%")
-    print(f"Gain/Loss Ratio: {gain_loss_ratio}")
-    print(f"Max Return: {max_return}%")
-    print(f"Max Loss: {max_loss}%")
-    print(f"Sharpe Ratio: {sharpe_ratio}")
+    print(f"Total Trades: {stats['total_trades']}")
+    print(f"Win Rate: {stats['win_rate']}%")
+    print(f"Average % Gain per Trade: {stats['avg_percent_gain']}%")
+    print(f"Average % Loss per Trade: {stats['avg_percent_loss']}%")
+    print(f"Gain/Loss Ratio: {stats['gain_loss_ratio']}")
+    print(f"Max Return: {stats['max_return']}%")
+    print(f"Max Loss: {stats['max_loss']}%")
+    print(f"Sharpe Ratio (per trade): {stats['sharpe_ratio']}")
     print(f"---------------------------------------------\n")
 
-# Threaded function to fetch data and run the strategy
-async def run_stock_strategy(ticker):
+class MarketClockService:
+    """
+    One market clock and account poller shared by every ticker coroutine
+
+    REST calls run in worker threads so they never block the event loop, and the API
+    call volume stays the same whatever the size of the universe. Ticker coroutines
+    wait on wait_until_open().
+    """
+
+    def __init__(self, api, refresh_interval=60):
+        self.api = api
+        self.refresh_interval = refresh_interval
+        self.clock = None
+        self.account = None
+        self.is_open = None
+        self.initial_equity = None
+        self.open_event = asyncio.Event()
+        self.alert_sent_for = None
+
+    async def wait_until_open(self):
+        await self.open_event.wait()
+
+    async def refresh(self):
+        """Fetch the clock (and the account while the market is closed) once for everyone"""
+        self.clock = await asyncio.to_thread(self.api.get_clock)
+        is_open = self.clock.is_open
+        if not is_open:
+            self.account = await asyncio.to_thread(self.api.get_account)
+
+        if is_open != self.is_open:
+            self.is_open = is_open
+            if is_open:
+                self.open_event.set()
+            else:
+                self.open_event.clear()
+
+    async def report_pre_open(self):
+        openingTime = self.clock.next_open.replace(tzinfo=datetime.timezone.utc).timestamp()
+        currTime = self.clock.timestamp.replace(tzinfo=datetime.timezone.utc).timestamp()
+        timeToOpen = int((openingTime - currTime) / 60)
+
+        equity = int(float(self.account.equity))
+        buying_power = int(float(self.account.buying_power))
+        self.initial_equity = equity
+        initial_total_cash_for_trading = equity + buying_power
+
+        if timeToOpen == 30 and self.alert_sent_for != self.clock.next_open:
+            self.alert_sent_for = self.clock.next_open
+            mail_content = (
+                f'The market opens in 30 minutes. '
+                f'Your initial equity (cash) is: ${self.initial_equity:.2f}. '
+                f'Our Total cash available Before Trading is: ${initial_total_cash_for_trading:.2f}'
+            )
+            await asyncio.to_thread(mail_alert, mail_content, 0)
+
+        print(f"{timeToOpen} minutes til market open.")
+        print(f'Your initial equity (cash) is: ${self.initial_equity:.2f}. ')
+        print(f"Our Total Funding pool with Buying power is  : {initial_total_cash_for_trading}")
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+                if not self.is_open:
+                    await self.report_pre_open()
+            except Exception as e:
+                print(f"Market clock refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+# Per-ticker loop: wait for the shared clock to report the open, then stream and report
+async def run_stock_strategy(ticker, engine, market_clock):
     while True:
-        isOpen = trading_api.get_clock().is_open
-        while not isOpen:
-            clock = trading_api.get_clock()
-            openingTime = clock.next_open.replace(tzinfo=datetime.timezone.utc).timestamp()
-            currTime = clock.timestamp.replace(tzinfo=datetime.timezone.utc).timestamp()
-            timeToOpen = int((openingTime - currTime) / 60)
-            trading_api.initial_equity = int(float(trading_api.get_account().equity))
-            initial_equity = trading_api.initial_equity
-            if timeToOpen == 30:
-                buying_power = int(float(trading_api.get_account().buying_power))
-                initial_total_cash_for_trading = trading_api.initial_equity + buying_power
-                mail_content = (
-                    f'The market opens in 30 minutes. '
-                    f'Your initial equity (cash) is: ${initial_equity:.2f}. '
-                    f'Our Total cash available Before Trading is: ${initial_total_cash_for_trading:.2f}'
-                )
-                mail_alert(mail_content, 60)
-
-            print(f"{timeToOpen} minutes til market open.")
-            equity = int(float(trading_api.get_account().equity))
-            buying_power = int(float(trading_api.get_account().buying_power))
-            initial_total_cash_for_trading = equity + buying_power
-            print(f'Your initial equity (cash) is: ${initial_equity:.2f}. ')                       
-            print(f"Our Total Funding pool with Buying power is  : {initial_total_cash_for_trading}")
-            await asyncio.sleep(60)
-            isOpen = trading_api.get_clock().is_open
-
-        await accumulate_and_run_cerebro(ticker)
+        await market_clock.wait_until_open()
+
+        await stream_and_report(ticker, engine)
 
         await asyncio.sleep(900)
 
 async def run_sma_strategy_async(stock_list):
-    tasks = [run_stock_strategy(ticker) for ticker in stock_list]
-    await asyncio.gather(*tasks)
+    engine = StreamingSmaEngine(stock_list)
+    market_clock = MarketClockService(trading_api)
+    clock_task = asyncio.create_task(market_clock.run())
+    tasks = [run_stock_strategy(ticker, engine, market_clock) for ticker in stock_list]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        clock_task.cancel()
 
 
 #testing 
@@ -21,22 +21,26 @@ class TrendAlgorithm(QCAlgorithm):
         for symbol in self.symbols.keys():
             self.add_equity(symbol, Resolution.DAILY)
         
+        # 9/21 SMAs of GLD updated by Lean on each bar instead of recomputed from history
+        self.fast_sma = self.sma("GLD", 9, Resolution.DAILY)
+        self.slow_sma = self.sma("GLD", 21, Resolution.DAILY)
+        self.set_warm_up(22, Resolution.DAILY)
+        self.previous_smas = None
+        
         self.signal = None
 
     def on_data(self, data: Slice):
         if not data.contains_key("GLD"):
             return
         
-        # Get GLD historical data
-        history = self.history("GLD", 22, Resolution.DAILY)
-        if len(history) < 22:
+        if not (self.fast_sma.is_ready and self.slow_sma.is_ready):
             return
         
-        closes = history['close'].values
-        ma9 = np.mean(closes[-9:])
-        ma21 = np.mean(closes[-21:])
-        prev_ma9 = np.mean(closes[-10:-1]) if len(closes) >= 10 else ma9
-        prev_ma21 = np.mean(closes[-22:-1]) if len(closes) >= 22 else ma21
+        ma9, ma21 = self.fast_sma.current.value, self.slow_sma.current.value
+        prev_ma9, prev_ma21 = self.previous_smas or (ma9, ma21)
+        self.previous_smas = (ma9, ma21)
+        if self.is_warming_up:
+            return
         
         signal = None
         if ma9 > ma21 and prev_ma9 <= prev_ma21:
@@ -1,26 +1,198 @@
 
 import requests
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import pytz
 import time
 import os
+import hashlib
 from typing import List, Dict, Optional, Any, Tuple
 from tqdm import tqdm
 import json
 
 from config import (
     ALPHA_VANTAGE_API_KEY, EQUITY_DATA_PATH, CRYPTO_DATA_PATH, 
-    LEAN_TIMEZONE_EQUITY, LEAN_TIME_FORMAT
+    LEAN_TIMEZONE_EQUITY, LEAN_TIME_FORMAT,
+    ALPHA_VANTAGE_RATE_LIMIT, ALPHA_VANTAGE_DAILY_LIMIT, ALPHA_VANTAGE_CACHE_PATH
 )
+from fundamentals_store import FundamentalsStore, record_rows, statement_rows
 from utils import (
     setup_logging, ensure_directory_exists, format_lean_date,
     create_lean_tradebar_csv, write_lean_zip_file, get_trading_days,
-    DataValidator, static_tqdm
+    DataValidator, static_tqdm, create_lean_tradebar_csv_text, write_lean_zip_text, RateLimiter
 )
 
 logger = setup_logging()
 
+# How long a cached response stays fresh, per function (seconds). Fundamentals only
+# change with quarterly filings, prices once per session.
+ENDPOINT_TTL = {
+    'TIME_SERIES_INTRADAY': 60 * 60,
+    'TIME_SERIES_DAILY': 12 * 60 * 60,
+    'TIME_SERIES_WEEKLY': 24 * 60 * 60,
+    'TIME_SERIES_MONTHLY': 24 * 60 * 60,
+    'FX_INTRADAY': 60 * 60,
+    'FX_DAILY': 12 * 60 * 60,
+    'CRYPTO_INTRADAY': 60 * 60,
+    'DIGITAL_CURRENCY_DAILY': 12 * 60 * 60,
+    'WTI': 24 * 60 * 60,
+    'BRENT': 24 * 60 * 60,
+    'NATURAL_GAS': 24 * 60 * 60,
+    'OVERVIEW': 24 * 60 * 60,
+    'LISTING_STATUS': 24 * 60 * 60,
+    'EARNINGS': 7 * 24 * 60 * 60,
+    'INCOME_STATEMENT': 7 * 24 * 60 * 60,
+    'BALANCE_SHEET': 7 * 24 * 60 * 60,
+    'CASH_FLOW': 7 * 24 * 60 * 60,
+}
+DEFAULT_TTL = 12 * 60 * 60
+# A month slice of intraday history no longer changes once the month is over
+CLOSED_MONTH_TTL = 365 * 24 * 60 * 60
+
+# outputsize=compact returns the latest 100 data points
+COMPACT_BARS = 100
+OHLCV_FIELDS = ['1. open', '2. high', '3. low', '4. close', '5. volume']
+
+
+def response_ttl(params: Dict) -> float:
+    """Freshness TTL in seconds for a request"""
+    month = params.get('month')
+    if month and month < datetime.now().strftime('%Y-%m'):
+        return CLOSED_MONTH_TTL
+    return ENDPOINT_TTL.get(params.get('function'), DEFAULT_TTL)
+
+
+def time_series_key(data: Dict) -> Optional[str]:
+    """Key of the time series block in a response"""
+    return next((key for key in data if 'Time Series' in key), None)
+
+
+def parse_time_series(time_series: Dict) -> pd.DataFrame:
+    """
+    Time series JSON to an OHLCV frame in one pass over the rows
+
+    Returns:
+    pandas.DataFrame: open, high, low, close, volume as float64, sorted naive DatetimeIndex
+    """
+    columns = ['open', 'high', 'low', 'close', 'volume']
+    if not time_series:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([]), dtype=float)
+    values = np.array([[row.get(field, 0) for field in OHLCV_FIELDS] for row in time_series.values()],
+                      dtype=np.float64)
+    df = pd.DataFrame(values, columns=columns, index=pd.to_datetime(list(time_series.keys())))
+    # Responses come newest first
+    if df.index.is_monotonic_decreasing:
+        return df.iloc[::-1]
+    return df.sort_index()
+
+
+def frame_to_bars(df: pd.DataFrame) -> List[Dict]:
+    """OHLCV frame to the bar dicts the other downloaders use"""
+    tz = pytz.timezone(LEAN_TIMEZONE_EQUITY)
+    return [
+        {'timestamp': timestamp.replace(tzinfo=tz), 'open': bar[0], 'high': bar[1],
+         'low': bar[2], 'close': bar[3], 'volume': int(bar[4])}
+        for timestamp, bar in zip(df.index.to_pydatetime(), df.to_numpy().tolist())
+    ]
+
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """DataValidator.clean_ohlcv_data's checks, on whole columns"""
+    return df[(df['low'] <= df['open']) & (df['open'] <= df['high']) &
+              (df['low'] <= df['close']) & (df['close'] <= df['high']) & (df['volume'] >= 0)]
+
+
+class ResponseCache:
+    """On-disk cache of raw Alpha Vantage responses keyed by function and parameters"""
+
+    def __init__(self, cache_path: str = ALPHA_VANTAGE_CACHE_PATH):
+        self.cache_path = cache_path
+
+    def _path(self, params: Dict) -> str:
+        key_params = {k: v for k, v in params.items() if k != 'apikey'}
+        key = hashlib.sha1(json.dumps(key_params, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.cache_path, key_params.get('function', 'UNKNOWN'), f"{key}.json")
+
+    def _load(self, params: Dict) -> Optional[Dict]:
+        try:
+            with open(self._path(params)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def age(self, params: Dict) -> Optional[float]:
+        """Seconds since the response was fetched, None if it is not cached"""
+        entry = self._load(params)
+        return None if entry is None else time.time() - entry['fetched_at']
+
+    def is_fresh(self, params: Dict) -> bool:
+        age = self.age(params)
+        return age is not None and age < response_ttl(params)
+
+    def get(self, params: Dict, allow_stale: bool = False) -> Optional[Dict]:
+        entry = self._load(params)
+        if entry is None:
+            return None
+        if not allow_stale and time.time() - entry['fetched_at'] >= response_ttl(params):
+            return None
+        return entry['data']
+
+    def put(self, params: Dict, data: Dict):
+        path = self._path(params)
+        ensure_directory_exists(os.path.dirname(path))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'fetched_at': time.time(), 'data': data}, f)
+        os.replace(tmp_path, path)
+
+
+class RequestBudget:
+    """
+    Per-minute and per-day request allowance
+
+    The minute window is a RateLimiter, so requests go out back to back until it is
+    full instead of a fixed pause after each one. The day count is kept on disk so
+    separate runs on the same (UTC) day share it.
+    """
+
+    def __init__(self, per_minute: int = ALPHA_VANTAGE_RATE_LIMIT, per_day: int = ALPHA_VANTAGE_DAILY_LIMIT,
+                 state_path: Optional[str] = os.path.join(ALPHA_VANTAGE_CACHE_PATH, 'budget.json')):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.state_path = state_path
+        self.minute_limiter = RateLimiter(per_minute, 60)
+
+    def _load_day(self) -> Dict:
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        state = {'date': today, 'count': 0}
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    saved = json.load(f)
+                if saved.get('date') == today:
+                    state = saved
+            except (OSError, ValueError):
+                pass
+        return state
+
+    def remaining_today(self) -> int:
+        return max(self.per_day - self._load_day()['count'], 0)
+
+    def acquire(self) -> bool:
+        """Wait for room in the minute window and count the request, False once today's budget is spent"""
+        state = self._load_day()
+        if state['count'] >= self.per_day:
+            return False
+        self.minute_limiter.acquire()
+        state['count'] += 1
+        if self.state_path:
+            ensure_directory_exists(os.path.dirname(self.state_path))
+            with open(self.state_path, 'w') as f:
+                json.dump(state, f)
+        return True
+
+
 class AlphaVantageDownloader:
     """Enhanced Alpha Vantage downloader with comprehensive financial data support"""
     
@@ -30,7 +202,10 @@ class AlphaVantageDownloader:
         
         self.api_key = ALPHA_VANTAGE_API_KEY
         self.base_url = "https://www.alphavantage.co/query"
-        self.rate_limit_delay = 12  # Alpha Vantage: 5 requests per minute for free tier
+        # Alpha Vantage free tier: 5 requests per minute and a daily cap
+        self.cache = ResponseCache()
+        self.budget = RequestBudget()
+        self.fundamentals_store = FundamentalsStore()
         
         # Enhanced capabilities tracking
         self.supported_functions = {
@@ -51,11 +226,20 @@ class AlphaVantageDownloader:
         }
         
     def _make_request(self, params: Dict) -> Dict:
-        """Make API request to Alpha Vantage"""
-        params['apikey'] = self.api_key
+        """Make API request to Alpha Vantage, served from the response cache while it is fresh"""
+        cached = self.cache.get(params)
+        if cached is not None:
+            return cached
+
+        if not self.budget.acquire():
+            logger.warning(f"Alpha Vantage daily budget spent, skipping {params.get('function')} {params.get('symbol', '')}")
+            # A stale answer is still better than none until the budget resets
+            return self.cache.get(params, allow_stale=True) or {}
+
+        request_params = dict(params, apikey=self.api_key)
         
         try:
-            response = requests.get(self.base_url, params=params)
+            response = requests.get(self.base_url, params=request_params)
             response.raise_for_status()
             data = response.json()
             
@@ -64,21 +248,46 @@ class AlphaVantageDownloader:
                 logger.error(f"Alpha Vantage API error: {data['Error Message']}")
                 return {}
             
-            if 'Note' in data:
-                logger.warning(f"Alpha Vantage API note: {data['Note']}")
-                return {}
-            
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
+            if 'Note' in data or 'Information' in data:
+                logger.warning(f"Alpha Vantage API note: {data.get('Note') or data.get('Information')}")
+                return self.cache.get(params, allow_stale=True) or {}
             
+            self.cache.put(params, data)
             return data
             
         except Exception as e:
             logger.error(f"Error making Alpha Vantage request: {str(e)}")
             return {}
+
+    def plan_requests(self, requests_by_key: Dict[str, List[Dict]]) -> Dict[str, List[str]]:
+        """
+        Split groups of requests (e.g. all calls for one symbol) by what they cost today
+
+        Groups whose responses are all fresh in the cache cost nothing. The others are
+        scheduled in order while their stale requests fit in the remaining daily budget,
+        whole groups at a time; the rest are deferred to a later run.
+
+        Parameters:
+        requests_by_key (dict): Group key to the list of request params it needs
+
+        Returns:
+        dict: 'cached', 'scheduled' and 'deferred' lists of group keys
+        """
+        plan = {'cached': [], 'scheduled': [], 'deferred': []}
+        remaining = self.budget.remaining_today()
+        for key, group in requests_by_key.items():
+            stale = sum(not self.cache.is_fresh(params) for params in group)
+            if stale == 0:
+                plan['cached'].append(key)
+            elif stale <= remaining:
+                plan['scheduled'].append(key)
+                remaining -= stale
+            else:
+                plan['deferred'].append(key)
+        return plan
     
-    def get_stock_data(self, symbol: str, resolution: str = 'daily') -> List[Dict]:
-        """Get stock data from Alpha Vantage"""
+    def _stock_params(self, symbol: str, resolution: str = 'daily') -> Dict:
+        """Request parameters for a stock time series"""
         function_map = {
             'minute': 'TIME_SERIES_INTRADAY',
             'daily': 'TIME_SERIES_DAILY',
@@ -95,44 +304,87 @@ class AlphaVantageDownloader:
         if resolution == 'minute':
             params['interval'] = '1min'
         
-        data = self._make_request(params)
-        
-        if not data:
-            return []
-        
-        # Find the time series key
-        time_series_key = None
-        for key in data.keys():
-            if 'Time Series' in key:
-                time_series_key = key
-                break
-        
-        if not time_series_key:
-            logger.error(f"No time series data found for {symbol}")
-            return []
-        
-        time_series = data[time_series_key]
+        return params
+    
+    def _stock_requests(self, symbol: str, resolution: str = 'daily', start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None) -> List[Dict]:
+        """
+        Smallest set of requests covering a date range
+
+        Daily: compact (latest 100 bars) when the range starts inside that window, or when
+        an earlier full response is cached and only its tail needs updating; full otherwise.
+        Intraday: one month= slice per month in the range (closed months stay cached), or
+        compact when the range is only the last 100 minutes. Without a range the request is
+        the same full one as before.
+        """
+        params = self._stock_params(symbol, resolution)
+        now = datetime.now()
         
-        # Convert to our format
-        bars = []
-        for timestamp_str, ohlcv in time_series.items():
-            try:
-                timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d')
+        if resolution == 'minute':
+            if start_date is None:
+                return [params]
+            if now - start_date <= timedelta(minutes=COMPACT_BARS):
+                return [dict(params, outputsize='compact')]
+            months = pd.period_range(start_date, min(end_date or now, now), freq='M')
+            return [dict(params, month=str(month)) for month in months]
+        
+        if resolution != 'daily' or self.cache.is_fresh(params):
+            return [params]
+        
+        since = start_date
+        cached = self.cache.get(params, allow_stale=True)
+        if cached and cached.get(time_series_key(cached) or ''):
+            since = datetime.strptime(max(cached[time_series_key(cached)]), '%Y-%m-%d')
+        # Weekdays overcount trading days, so this stays inside the compact window
+        if since is not None and np.busday_count(since.date(), now.date()) < COMPACT_BARS:
+            return [dict(params, outputsize='compact')]
+        return [params]
+    
+    def get_stock_frame(self, symbol: str, resolution: str = 'daily', start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Stock OHLCV between two dates (inclusive) as a columnar frame
+
+        Parameters:
+        symbol (str): Stock symbol
+        resolution (str): minute, daily, weekly or monthly
+        start_date (datetime): First bar, None for everything returned
+        end_date (datetime): Last bar, None for everything returned
+
+        Returns:
+        pandas.DataFrame: open, high, low, close, volume indexed by naive exchange-time timestamps
+        """
+        full_params = self._stock_params(symbol, resolution)
+        frames = []
+        for params in self._stock_requests(symbol, resolution, start_date, end_date):
+            data = self._make_request(params)
+            key = time_series_key(data) if data else None
+            if not key:
+                continue
+            time_series = data[key]
             
-            timestamp = timestamp.replace(tzinfo=pytz.timezone(LEAN_TIMEZONE_EQUITY))
+            if resolution == 'daily' and params.get('outputsize') == 'compact':
+                # Fold the update into the cached full history so the next run can do the same
+                cached = self.cache.get(full_params, allow_stale=True)
+                if cached and time_series_key(cached) == key:
+                    time_series = {**cached[key], **time_series}
+                    self.cache.put(full_params, dict(cached, **{key: time_series}))
             
-            bars.append({
-                'timestamp': timestamp,
-                'open': float(ohlcv['1. open']),
-                'high': float(ohlcv['2. high']),
-                'low': float(ohlcv['3. low']),
-                'close': float(ohlcv['4. close']),
-                'volume': int(ohlcv['5. volume'])
-            })
+            frames.append(parse_time_series(time_series))
         
-        return sorted(bars, key=lambda x: x['timestamp'])
+        if not frames:
+            logger.error(f"No time series data found for {symbol}")
+            return parse_time_series({})
+        
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        if len(frames) > 1:
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+        return df.loc[start_date:end_date]
+    
+    def get_stock_data(self, symbol: str, resolution: str = 'daily', start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None) -> List[Dict]:
+        """Get stock data from Alpha Vantage"""
+        return frame_to_bars(self.get_stock_frame(symbol, resolution, start_date, end_date))
     
     def get_forex_data(self, from_symbol: str, to_symbol: str, resolution: str = 'daily') -> List[Dict]:
         """Get forex data from Alpha Vantage"""
@@ -622,33 +874,20 @@ class AlphaVantageDownloader:
         
         for symbol in static_tqdm(symbols, desc="Downloading stocks"):
             try:
-                data = self.get_stock_data(symbol, resolution)
+                df = clean_frame(self.get_stock_frame(symbol, resolution, start_date, end_date))
                 
-                if data:
-                    # Filter by date range
-                    filtered_data = [
-                        bar for bar in data 
-                        if start_date <= bar['timestamp'].replace(tzinfo=None) <= end_date
-                    ]
+                if not df.empty:
+                    # Create directory structure
+                    data_path = os.path.join(EQUITY_DATA_PATH, 'alphavantage', resolution)
+                    ensure_directory_exists(data_path)
                     
-                    if filtered_data:
-                        # Clean and validate data
-                        cleaned_data = DataValidator.clean_ohlcv_data(filtered_data)
-                        
-                        if cleaned_data:
-                            # Create directory structure
-                            data_path = os.path.join(EQUITY_DATA_PATH, 'alphavantage', resolution)
-                            ensure_directory_exists(data_path)
-                            
-                            # Save data
-                            output_path = os.path.join(data_path, f"{symbol.lower()}.zip")
-                            csv_filename = f"{symbol.lower()}_{resolution}_trade.csv"
-                            
-                            csv_content = create_lean_tradebar_csv(cleaned_data, symbol, cleaned_data[0]['timestamp'], resolution)
-                            
-                            if csv_content:
-                                write_lean_zip_file(csv_content, output_path, csv_filename)
-                                logger.info(f"Saved {len(csv_content)} bars for {symbol}")
+                    # Save data
+                    output_path = os.path.join(data_path, f"{symbol.lower()}.zip")
+                    csv_filename = f"{symbol.lower()}_{resolution}_trade.csv"
+                    
+                    csv_text = create_lean_tradebar_csv_text(df.index, df.to_numpy(), resolution)
+                    write_lean_zip_text(csv_text, output_path, csv_filename)
+                    logger.info(f"Saved {len(df)} bars for {symbol}")
                 
             except Exception as e:
                 logger.error(f"Error downloading {symbol}: {str(e)}")
@@ -757,33 +996,43 @@ class AlphaVantageDownloader:
             'summary': {'total_symbols': len(symbols), 'successful_downloads': 0}
         }
         
-        for symbol in static_tqdm(symbols, desc="Downloading comprehensive data"):
+        # Only symbols whose stale requests fit in today's budget are fetched, the rest
+        # are left for the next run; fresh responses come from the cache for free
+        symbol_requests = {}
+        for symbol in symbols:
+            symbol_requests[symbol] = self._stock_requests(symbol, 'daily', start_date, end_date)
+            if include_fundamentals:
+                symbol_requests[symbol] += [{'function': 'OVERVIEW', 'symbol': symbol},
+                                            {'function': 'EARNINGS', 'symbol': symbol}]
+            if include_financials:
+                symbol_requests[symbol] += [{'function': function, 'symbol': symbol}
+                                            for function in ('INCOME_STATEMENT', 'BALANCE_SHEET', 'CASH_FLOW')]
+        plan = self.plan_requests(symbol_requests)
+        results['summary']['deferred_symbols'] = plan['deferred']
+        logger.info(f"Request plan: {len(plan['cached'])} symbols cached, {len(plan['scheduled'])} scheduled, "
+                    f"{len(plan['deferred'])} deferred to a later run")
+        
+        store_rows = []
+        
+        for symbol in static_tqdm(plan['cached'] + plan['scheduled'], desc="Downloading comprehensive data"):
             try:
                 symbol_results = {'symbol': symbol, 'downloads': [], 'quality_score': None}
                 
                 # 1. Download OHLCV data
-                ohlcv_data = self.get_stock_data(symbol, 'daily')
-                if ohlcv_data:
-                    # Filter by date range
-                    filtered_data = [
-                        bar for bar in ohlcv_data 
-                        if start_date <= bar['timestamp'].replace(tzinfo=None) <= end_date
-                    ]
+                df = self.get_stock_frame(symbol, 'daily', start_date, end_date)
+                if not df.empty:
+                    results['ohlcv_data'][symbol] = frame_to_bars(df)
+                    symbol_results['downloads'].append('ohlcv')
                     
-                    if filtered_data:
-                        results['ohlcv_data'][symbol] = filtered_data
-                        symbol_results['downloads'].append('ohlcv')
-                        
-                        # Save OHLCV data
-                        cleaned_data = DataValidator.clean_ohlcv_data(filtered_data)
-                        if cleaned_data:
-                            data_path = os.path.join(EQUITY_DATA_PATH, 'alphavantage', 'daily')
-                            ensure_directory_exists(data_path)
-                            output_path = os.path.join(data_path, f"{symbol.lower()}.zip")
-                            csv_filename = f"{symbol.lower()}_daily_trade.csv"
-                            csv_content = create_lean_tradebar_csv(cleaned_data, symbol, cleaned_data[0]['timestamp'], 'daily')
-                            if csv_content:
-                                write_lean_zip_file(csv_content, output_path, csv_filename)
+                    # Save OHLCV data
+                    df = clean_frame(df)
+                    if not df.empty:
+                        data_path = os.path.join(EQUITY_DATA_PATH, 'alphavantage', 'daily')
+                        ensure_directory_exists(data_path)
+                        output_path = os.path.join(data_path, f"{symbol.lower()}.zip")
+                        csv_filename = f"{symbol.lower()}_daily_trade.csv"
+                        write_lean_zip_text(create_lean_tradebar_csv_text(df.index, df.to_numpy(), 'daily'),
+                                            output_path, csv_filename)
                 
                 # 2. Download fundamentals if requested
                 if include_fundamentals:
@@ -797,8 +1046,13 @@ class AlphaVantageDownloader:
                         ensure_directory_exists(fundamentals_path)
                         with open(os.path.join(fundamentals_path, f"{symbol.lower()}_fundamentals.json"), 'w') as f:
                             json.dump(fundamentals, f, indent=2)
+                        
+                        # Overview values are a snapshot as of today
+                        store_rows += record_rows(symbol, 'alphavantage', datetime.now().strftime('%Y-%m-%d'),
+                                                  'snapshot', fundamentals, as_of=datetime.now())
                 
                 # 3. Download earnings data if requested
+                reported_dates = {}
                 if include_fundamentals:
                     earnings = self.get_earnings_data(symbol)
                     if earnings:
@@ -810,6 +1064,16 @@ class AlphaVantageDownloader:
                         ensure_directory_exists(earnings_path)
                         with open(os.path.join(earnings_path, f"{symbol.lower()}_earnings.json"), 'w') as f:
                             json.dump(earnings, f, indent=2)
+                        
+                        # Fiscal periods become known with their earnings release; a fiscal year
+                        # ends with its last quarter, so annual EPS is dated by that release too
+                        reported_dates = {earning['fiscal_date_ending']: earning['reported_date']
+                                          for earning in earnings['quarterly_earnings']
+                                          if earning.get('fiscal_date_ending') and earning.get('reported_date')}
+                        store_rows += statement_rows(symbol, 'alphavantage', earnings['quarterly_earnings'],
+                                                     'quarterly', reported_key='reported_date')
+                        store_rows += statement_rows(symbol, 'alphavantage', earnings['annual_earnings'], 'annual',
+                                                     reported_dates=reported_dates)
                 
                 # 4. Download financial statements if requested
                 if include_financials:
@@ -828,6 +1092,11 @@ class AlphaVantageDownloader:
                         ensure_directory_exists(financials_path)
                         with open(os.path.join(financials_path, f"{symbol.lower()}_financials.json"), 'w') as f:
                             json.dump(financials, f, indent=2)
+                        
+                        for statement in financials.values():
+                            store_rows += statement_rows(symbol, 'alphavantage', statement.get('quarterly_reports'), 'quarterly',
+                                                         reported_dates=reported_dates)
+                            store_rows += statement_rows(symbol, 'alphavantage', statement.get('annual_reports'), 'annual')
                 
                 if symbol_results['downloads']:
                     results['summary']['successful_downloads'] += 1
@@ -839,6 +1108,8 @@ class AlphaVantageDownloader:
                 logger.error(f"Error downloading comprehensive data for {symbol}: {str(e)}")
                 continue
         
+        self.fundamentals_store.upsert(store_rows)
+        
         # Generate summary report
         results['summary']['completion_rate'] = results['summary']['successful_downloads'] / results['summary']['total_symbols']
         
@@ -0,0 +1,285 @@
+"""
+NSE/BSE bhavcopy ingestion
+
+A bhavcopy is an exchange's end-of-day file with one row per traded security, so a whole
+market's history costs one file per trading day instead of one request per symbol. Daily
+files are fetched (or read from a local archive directory) and parsed in parallel, then
+transposed into one Lean daily file per symbol.
+
+Supported layouts:
+- NSE legacy: cm01JAN2024bhav.csv.zip (SYMBOL, SERIES, OPEN, ..., TOTTRDQTY, TIMESTAMP)
+- BSE legacy: EQ010124_CSV.ZIP (SC_CODE, SC_NAME, SC_TYPE, OPEN, ..., NO_OF_SHRS), keyed by scrip code
+- UDiFF (both exchanges from July 2024): BhavCopy_NSE_CM_0_0_0_20240708_F_0000.csv.zip
+
+BSE rows are written under the scrip's latest ticker (the UDiFF TckrSymb of its FinInstrmId
+scrip code), so a range across the layout change gives one continuous file per company.
+"""
+
+import os
+import io
+import zipfile
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+from tqdm import tqdm
+
+from config import BHAVCOPY_PATH, BHAVCOPY_WORKERS, NSE_BHAVCOPY_URL, BSE_BHAVCOPY_URL
+from utils import (
+    setup_logging, ensure_directory_exists, get_trading_days,
+    create_lean_tradebar_csv_text, write_lean_zip_text
+)
+
+logger = setup_logging()
+
+# First trading day published in the UDiFF layout
+UDIFF_START = datetime(2024, 7, 8)
+
+# Column names per layout: symbol, instrument code, security filter, open, high, low, close, volume
+LAYOUTS = {
+    'nse': {'symbol': 'SYMBOL', 'code': 'SYMBOL', 'filter': 'SERIES', 'open': 'OPEN', 'high': 'HIGH',
+            'low': 'LOW', 'close': 'CLOSE', 'volume': 'TOTTRDQTY'},
+    'bse': {'symbol': 'SC_CODE', 'code': 'SC_CODE', 'filter': 'SC_TYPE', 'open': 'OPEN', 'high': 'HIGH',
+            'low': 'LOW', 'close': 'CLOSE', 'volume': 'NO_OF_SHRS'},
+    'udiff': {'symbol': 'TckrSymb', 'code': 'FinInstrmId', 'filter': 'SctySrs', 'open': 'OpnPric',
+              'high': 'HghPric', 'low': 'LwPric', 'close': 'ClsPric', 'volume': 'TtlTradgVol'}
+}
+# Days searched back from today for a recent BSE UDiFF file to map scrip codes to tickers
+TICKER_LOOKBACK_DAYS = 10
+# Rows kept by default: NSE equity series, BSE equity scrips (SC_TYPE Q) and BSE UDiFF groups
+DEFAULT_SERIES = {
+    'nse': ['EQ', 'BE'],
+    'bse': ['Q', 'A', 'B', 'T', 'X', 'XT', 'M', 'MT', 'Z', 'ZP']
+}
+
+
+def bhavcopy_filenames(exchange: str, date: datetime) -> List[str]:
+    """File names a bhavcopy for the date can have, most likely first"""
+    udiff = f"BhavCopy_{exchange.upper()}_CM_0_0_0_{date.strftime('%Y%m%d')}_F_0000.csv"
+    if exchange == 'nse':
+        legacy = f"cm{date.strftime('%d%b%Y').upper()}bhav.csv.zip"
+        udiff += '.zip'
+    else:
+        legacy = f"EQ{date.strftime('%d%m%y')}_CSV.ZIP"
+    return [udiff, legacy] if date >= UDIFF_START else [legacy, udiff]
+
+
+def bhavcopy_url(exchange: str, filename: str, date: datetime) -> str:
+    """Download URL of a bhavcopy file"""
+    if exchange == 'nse':
+        if filename.startswith('BhavCopy'):
+            return f"{NSE_BHAVCOPY_URL}/content/cm/{filename}"
+        return f"{NSE_BHAVCOPY_URL}/content/historical/EQUITIES/{date.year}/{date.strftime('%b').upper()}/{filename}"
+    return f"{BSE_BHAVCOPY_URL}/download/BhavCopy/Equity/{filename}"
+
+
+def read_bhavcopy(path: str) -> bytes:
+    """CSV bytes of a bhavcopy, from inside the zip when it is zipped"""
+    if path.lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            return archive.read(archive.namelist()[0])
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def parse_bhavcopy(data: bytes, exchange: str, date: datetime, series: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Parse one day's bhavcopy into symbol and OHLCV columns
+
+    Parameters:
+    data (bytes): CSV content
+    exchange (str): nse or bse
+    date (datetime): Trading day of the file
+    series (list): Series (NSE) or scrip types/groups (BSE) to keep, defaults to DEFAULT_SERIES
+
+    Returns:
+    pandas.DataFrame: symbol, code (BSE scrip code, the symbol for NSE legacy files), date,
+        open, high, low, close, volume
+    """
+    df = pd.read_csv(io.BytesIO(data), skipinitialspace=True)
+    df.columns = df.columns.str.strip()
+    layout = LAYOUTS['udiff'] if 'TckrSymb' in df.columns else LAYOUTS[exchange]
+    keep = series if series is not None else DEFAULT_SERIES[exchange]
+
+    if layout is LAYOUTS['udiff'] and 'FinInstrmTp' in df.columns:
+        df = df[df['FinInstrmTp'] == 'STK']
+    if keep and layout['filter'] in df.columns:
+        df = df[df[layout['filter']].astype(str).str.strip().isin(keep)]
+
+    frame = pd.DataFrame({
+        'symbol': df[layout['symbol']].astype(str).str.strip().str.upper().to_numpy(),
+        'code': df[layout['code']].astype(str).str.strip().str.upper().to_numpy(),
+        'date': pd.Timestamp(date).normalize()
+    })
+    for field in ['open', 'high', 'low', 'close', 'volume']:
+        frame[field] = pd.to_numeric(df[layout[field]], errors='coerce').to_numpy()
+    return frame.dropna(subset=['open', 'high', 'low', 'close'])
+
+
+def scrip_tickers(df: pd.DataFrame) -> Dict[str, str]:
+    """Latest ticker of each scrip code among rows parsed from UDiFF files (legacy BSE rows have no ticker)"""
+    udiff = df[df['symbol'] != df['code']].sort_values('date', kind='stable')
+    return dict(zip(udiff['code'], udiff['symbol']))
+
+
+class BhavcopyIngestor:
+    """Fetch, parse and transpose an exchange's daily bhavcopies into per-symbol Lean files"""
+
+    def __init__(self, exchange: str, session: Optional[requests.Session] = None,
+                 archive_path: str = BHAVCOPY_PATH, workers: int = BHAVCOPY_WORKERS):
+        self.exchange = exchange
+        self.archive_path = os.path.join(archive_path, exchange)
+        self.workers = workers
+        # Reuse the downloader's session (cookies, headers) with a pool sized for the workers
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('https://', adapter)
+
+    def find_local(self, date: datetime, source: str) -> Optional[str]:
+        """Path of the day's bhavcopy in a local directory, None if it isn't there"""
+        for filename in bhavcopy_filenames(self.exchange, date):
+            for name in (filename, filename.lower(), filename.upper()):
+                path = os.path.join(source, name)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def fetch(self, date: datetime) -> Optional[str]:
+        """Download the day's bhavcopy into the archive directory unless it is already there"""
+        path = self.find_local(date, self.archive_path)
+        if path:
+            return path
+
+        ensure_directory_exists(self.archive_path)
+        for filename in bhavcopy_filenames(self.exchange, date):
+            response = self.session.get(bhavcopy_url(self.exchange, filename, date), timeout=30)
+            if response.status_code == 404:
+                continue
+            response.raise_for_status()
+            path = os.path.join(self.archive_path, filename)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(response.content)
+            os.replace(tmp_path, path)
+            return path
+        # Holidays have no file
+        return None
+
+    def _load_day(self, date: datetime, source: Optional[str], series: Optional[List[str]]) -> Optional[pd.DataFrame]:
+        path = self.find_local(date, source) if source else self.fetch(date)
+        if path is None:
+            return None
+        return parse_bhavcopy(read_bhavcopy(path), self.exchange, date, series)
+
+    def load(self, start_date: datetime, end_date: datetime, source: Optional[str] = None,
+             series: Optional[List[str]] = None) -> pd.DataFrame:
+        """All days' rows between the dates in one frame, days fetched and parsed in parallel"""
+        dates = get_trading_days(start_date, end_date)
+        days = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._load_day, date, source, series): date for date in dates}
+            for future in tqdm(as_completed(futures), total=len(futures), desc=f"Loading {self.exchange.upper()} bhavcopies"):
+                try:
+                    day = future.result()
+                except Exception as e:
+                    logger.error(f"Error loading {self.exchange.upper()} bhavcopy for {futures[future].date()}: {str(e)}")
+                    continue
+                if day is not None and not day.empty:
+                    days.append(day)
+
+        logger.info(f"Loaded {len(days)} {self.exchange.upper()} bhavcopies for {len(dates)} weekdays")
+        if not days:
+            return pd.DataFrame(columns=['symbol', 'code', 'date', 'open', 'high', 'low', 'close', 'volume'])
+        return pd.concat(days, ignore_index=True)
+
+    def reference_tickers(self, source: Optional[str] = None) -> Dict[str, str]:
+        """
+        Scrip code to ticker map from the newest UDiFF bhavcopy in the directory
+
+        Without a local file the latest one published in the last TICKER_LOOKBACK_DAYS days is
+        downloaded, unless the files are read from a source directory.
+        """
+        directory = source or self.archive_path
+        prefix = f"bhavcopy_{self.exchange}_cm"
+        names = sorted(name for name in os.listdir(directory) if name.lower().startswith(prefix)) \
+            if os.path.isdir(directory) else []
+        path = os.path.join(directory, names[-1]) if names else None
+        if path is None and source is None:
+            today = datetime.combine(datetime.now().date(), datetime.min.time())
+            for date in reversed(get_trading_days(today - timedelta(days=TICKER_LOOKBACK_DAYS), today)):
+                path = self.fetch(date)
+                if path and os.path.basename(path).lower().startswith(prefix):
+                    break
+                path = None
+        if path is None:
+            return {}
+
+        date = datetime.strptime(os.path.basename(path).split('_')[6], '%Y%m%d')
+        return scrip_tickers(parse_bhavcopy(read_bhavcopy(path), self.exchange, date, series=[]))
+
+    def resolve_tickers(self, df: pd.DataFrame, source: Optional[str] = None) -> pd.DataFrame:
+        """Key BSE rows by each scrip code's latest ticker, codes without a known ticker keep the code"""
+        tickers = scrip_tickers(df)
+        if not df['code'].isin(list(tickers)).all():
+            tickers = {**self.reference_tickers(source), **tickers}
+        unknown = df.loc[~df['code'].isin(list(tickers)), 'code'].unique()
+        if len(unknown):
+            logger.warning(f"No ticker for {len(unknown)} BSE scrip codes, writing them under the code")
+        df = df.copy()
+        df['symbol'] = df['code'].map(tickers).fillna(df['symbol'])
+        return df
+
+    def ingest(self, start_date: datetime, end_date: datetime, output_path: str,
+               symbols: Optional[List[str]] = None, source: Optional[str] = None,
+               series: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Build per-symbol Lean daily files from the bhavcopies between two dates
+
+        Parameters:
+        start_date (datetime): First day
+        end_date (datetime): Last day
+        output_path (str): Directory for the {symbol}.zip files
+        symbols (list): Symbols (BSE: tickers or scrip codes) to write, None for the whole market
+        source (str): Local directory holding the daily files; None downloads missing days
+            into the archive directory first
+        series (list): Series or scrip groups to keep, see DEFAULT_SERIES
+
+        Returns:
+        dict: Bars written per symbol
+        """
+        df = self.load(start_date, end_date, source, series)
+        if self.exchange == 'bse' and not df.empty:
+            df = self.resolve_tickers(df, source)
+        if symbols is not None:
+            wanted = [symbol.upper() for symbol in symbols]
+            df = df[df['symbol'].isin(wanted) | df['code'].isin(wanted)]
+
+        # Transpose: one stable sort by symbol and date, then split at symbol boundaries
+        df = df.sort_values(['symbol', 'date'], kind='stable').drop_duplicates(['symbol', 'date'], keep='last')
+        ohlcv = df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='float64')
+        ohlcv[:, 4] = np.nan_to_num(ohlcv[:, 4])
+        open_, high, low, close, volume = ohlcv.T
+        valid = (low <= open_) & (open_ <= high) & (low <= close) & (close <= high) & (volume >= 0)
+        names, times, ohlcv = df['symbol'].to_numpy()[valid], df['date'].to_numpy()[valid], ohlcv[valid]
+        if not len(names):
+            logger.warning(f"No {self.exchange.upper()} bhavcopy rows to write")
+            return {}
+
+        bounds = np.flatnonzero(names[1:] != names[:-1]) + 1
+        pieces = zip(np.split(names, bounds), np.split(times, bounds), np.split(ohlcv, bounds))
+        ensure_directory_exists(output_path)
+
+        def write_symbol(piece: Tuple) -> Tuple[str, int]:
+            symbol_names, symbol_times, symbol_ohlcv = piece
+            symbol = symbol_names[0].lower()
+            write_lean_zip_text(create_lean_tradebar_csv_text(symbol_times, symbol_ohlcv, 'daily'),
+                                os.path.join(output_path, f"{symbol}.zip"), f"{symbol}_daily_trade.csv")
+            return symbol_names[0], len(symbol_times)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            written = dict(executor.map(write_symbol, pieces))
+        logger.info(f"Wrote {sum(written.values())} {self.exchange.upper()} bars for {len(written)} symbols")
+        return written
@@ -3,26 +3,157 @@ Binance data downloader for Lean format
 """
 
 from binance.client import Client
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import pytz
 import time
 import os
-from typing import List, Dict, Optional
+import re
+import zipfile
+import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Iterator, Tuple
 from tqdm import tqdm
 
 from config import (
     BINANCE_API_KEY, BINANCE_SECRET_KEY,
     CRYPTO_DATA_PATH, LEAN_TIMEZONE_CRYPTO, LEAN_TIME_FORMAT,
-    BINANCE_RATE_LIMIT
+    BINANCE_RATE_LIMIT, BINANCE_DUMP_URL, BINANCE_DUMP_PATH, BINANCE_IMPORT_WORKERS, BINANCE_FETCH_WORKERS
 )
 from utils import (
     setup_logging, ensure_directory_exists, format_lean_date,
-    create_lean_crypto_csv, write_lean_zip_file, DataValidator
+    create_lean_crypto_csv_text, write_lean_zip_text
 )
 
 logger = setup_logging()
 
+KLINE_PAGE_LIMIT = 1000  # Maximum klines per request
+INTERVAL_MS = {'1m': 60_000, '1h': 3_600_000, '1d': 86_400_000}
+DAY_MS = 86_400_000
+
+# Binance data-dump archives: SYMBOL-interval-YYYY-MM.zip (monthly) or SYMBOL-interval-YYYY-MM-DD.zip (daily)
+ARCHIVE_PATTERN = re.compile(r'^(?P<symbol>[A-Z0-9]+)-(?P<interval>\w+)-(?P<period>\d{4}-\d{2}(?:-\d{2})?)\.zip$')
+
+
+def _to_utc_ms(date: datetime) -> int:
+    """Milliseconds since epoch; naive datetimes are taken as UTC like Binance's kline times"""
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=pytz.UTC)
+    return int(date.timestamp() * 1000)
+
+
+def parse_klines(klines: List[List]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Raw kline lists to arrays in one conversion
+
+    Returns:
+    tuple: (int64 open times in ms, float64 (n, 5) open/high/low/close/volume)
+    """
+    if not klines:
+        return np.empty(0, dtype=np.int64), np.empty((0, 5))
+    rows = np.array([kline[:6] for kline in klines], dtype=object)
+    return rows[:, 0].astype(np.int64), rows[:, 1:6].astype(np.float64)
+
+
+def valid_bars(ohlcv: np.ndarray) -> np.ndarray:
+    """Mask of bars passing DataValidator.validate_ohlcv_data's OHLC and volume checks"""
+    open_, high, low, close, volume = ohlcv.T
+    return (low <= open_) & (open_ <= high) & (low <= close) & (close <= high) & (volume >= 0)
+
+
+def write_minute_days(symbol: str, resolution: str, times: np.ndarray, ohlcv: np.ndarray,
+                      output_root: str = CRYPTO_DATA_PATH) -> int:
+    """Split bars into per-day Lean zips with one grouping pass, returns the number of days written"""
+    if not len(times):
+        return 0
+    symbol_dir = os.path.join(output_root, resolution, symbol.lower())
+    days = times // DAY_MS
+    bounds = np.flatnonzero(np.diff(days)) + 1
+    for day_times, day_ohlcv in zip(np.split(times, bounds), np.split(ohlcv, bounds)):
+        date_str = format_lean_date(datetime.fromtimestamp(int(day_times[0]) // 1000, tz=pytz.UTC))
+        output_path = os.path.join(symbol_dir, f"{date_str}_trade.zip")
+        csv_filename = f"{date_str}_{symbol.lower()}_{resolution}_trade.csv"
+        write_lean_zip_text(create_lean_crypto_csv_text(day_times, day_ohlcv), output_path, csv_filename)
+        logger.debug(f"Saved {len(day_times)} bars for {symbol} on {date_str}")
+    return len(bounds) + 1
+
+
+def read_kline_archive(archive_path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stream the kline CSV out of a Binance data-dump zip straight into arrays
+
+    Newer dumps start with a header row and spot dumps from 2025 on carry
+    microsecond open times; both come back as millisecond times here.
+
+    Returns:
+    tuple: (int64 open times in ms, float64 (n, 5) open/high/low/close/volume)
+    """
+    with zipfile.ZipFile(archive_path) as archive:
+        member = archive.namelist()[0]
+        with archive.open(member) as f:
+            has_header = not f.readline()[:1].isdigit()
+        with archive.open(member) as f:
+            df = pd.read_csv(f, header=None, skiprows=1 if has_header else 0, usecols=range(6),
+                             dtype={0: np.int64, 1: np.float64, 2: np.float64, 3: np.float64,
+                                    4: np.float64, 5: np.float64})
+    times = df[0].to_numpy()
+    if len(times) and times[0] >= 10**14:
+        times = times // 1000
+    return times, df[[1, 2, 3, 4, 5]].to_numpy()
+
+
+def archive_period(name: str) -> Optional[Tuple[datetime, datetime]]:
+    """First and last day covered by an archive file name, None if it is not a kline archive"""
+    match = ARCHIVE_PATTERN.match(name)
+    if match is None:
+        return None
+    period = match.group('period')
+    if len(period) == 10:
+        day = datetime.strptime(period, '%Y-%m-%d')
+        return day, day
+    first = datetime.strptime(period, '%Y-%m')
+    next_month = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, next_month - timedelta(days=1)
+
+
+def find_kline_archives(source_dir: str, symbol: str, interval: str,
+                        start_date: datetime, end_date: datetime) -> List[str]:
+    """
+    Kline archives for a symbol under source_dir (flat, or laid out like data.binance.vision)
+    overlapping the date range. Daily archives are dropped for months that have a monthly one,
+    so every day comes from exactly one file.
+    """
+    prefix = f"{symbol.upper()}-{interval}-"
+    monthly, daily = {}, {}
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            if not name.startswith(prefix):
+                continue
+            period = archive_period(name)
+            if period is None or period[1].date() < start_date.date() or period[0].date() > end_date.date():
+                continue
+            key = name[len(prefix):-len('.zip')]
+            (daily if len(key) == 10 else monthly)[key] = os.path.join(root, name)
+    daily = {key: path for key, path in daily.items() if key[:7] not in monthly}
+    return [path for _, path in sorted({**monthly, **daily}.items())]
+
+
+def _import_kline_archive(archive_path: str, symbol: str, resolution: str, start_ms: int, end_ms: int,
+                          output_root: str):
+    """
+    Worker: convert one archive. Minute archives are written straight to per-day Lean zips
+    and return the number of days; daily/hour archives return their arrays for the caller
+    to merge into the single per-symbol file.
+    """
+    times, ohlcv = read_kline_archive(archive_path)
+    keep = (times >= start_ms) & (times <= end_ms) & valid_bars(ohlcv)
+    times, ohlcv = times[keep], ohlcv[keep]
+    if resolution in ('daily', 'hour'):
+        return times, ohlcv
+    return write_minute_days(symbol, resolution, times, ohlcv, output_root)
+
+
 class BinanceDataDownloader:
     """Download crypto data from Binance and convert to Lean format"""
     
@@ -34,46 +165,57 @@ class BinanceDataDownloader:
         )
         
         self.rate_limit_delay = 60 / BINANCE_RATE_LIMIT
-        
-    def get_klines(self, symbol: str, interval: str, start_date: datetime, end_date: datetime) -> List[Dict]:
-        """Get kline data from Binance"""
-        try:
-            # Convert interval to Binance format
-            binance_interval = self._convert_interval(interval)
-            
-            # Get data from Binance - using timestamps to avoid date parsing issues
-            start_timestamp = int(start_date.timestamp() * 1000)  # Convert to milliseconds
-            end_timestamp = int(end_date.timestamp() * 1000)      # Convert to milliseconds
-            
-            klines = self.client.get_historical_klines(
-                symbol,
-                binance_interval,
-                start_timestamp,
-                end_timestamp
+        self._last_request = 0.0
+
+    def _throttle(self):
+        """Space requests rate_limit_delay apart, counting the time spent parsing and writing"""
+        wait = self._last_request + self.rate_limit_delay - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def iter_kline_pages(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Page through [start_ms, end_ms] at KLINE_PAGE_LIMIT klines per request, yielding parsed arrays"""
+        binance_interval = self._convert_interval(interval)
+        step = INTERVAL_MS[binance_interval]
+        while start_ms <= end_ms:
+            self._throttle()
+            klines = self.client.get_klines(
+                symbol=symbol,
+                interval=binance_interval,
+                startTime=start_ms,
+                endTime=end_ms,
+                limit=KLINE_PAGE_LIMIT
             )
-            
-            # Convert to our format
-            data = []
-            for kline in klines:
-                timestamp = datetime.fromtimestamp(kline[0] / 1000.0, tz=pytz.UTC)
-                
-                data.append({
-                    'timestamp': timestamp,
-                    'open': float(kline[1]),
-                    'high': float(kline[2]),
-                    'low': float(kline[3]),
-                    'close': float(kline[4]),
-                    'volume': float(kline[5])
-                })
-            
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            return data
-            
+            times, ohlcv = parse_klines(klines)
+            if len(times):
+                yield times, ohlcv
+            if len(times) < KLINE_PAGE_LIMIT:
+                break
+            start_ms = int(times[-1]) + step
+
+    def get_kline_arrays(self, symbol: str, interval: str, start_date: datetime, end_date: datetime) -> Tuple[np.ndarray, np.ndarray]:
+        """Klines between two dates as (int64 ms times, float64 OHLCV) arrays, invalid bars dropped"""
+        try:
+            pages = list(self.iter_kline_pages(symbol, interval, _to_utc_ms(start_date), _to_utc_ms(end_date)))
         except Exception as e:
             logger.error(f"Error getting klines for {symbol}: {str(e)}")
-            return []
+            pages = []
+        if not pages:
+            return np.empty(0, dtype=np.int64), np.empty((0, 5))
+        times = np.concatenate([page[0] for page in pages])
+        ohlcv = np.concatenate([page[1] for page in pages])
+        keep = valid_bars(ohlcv)
+        return times[keep], ohlcv[keep]
+
+    def get_klines(self, symbol: str, interval: str, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """Get kline data from Binance"""
+        times, ohlcv = self.get_kline_arrays(symbol, interval, start_date, end_date)
+        timestamps = pd.to_datetime(times, unit='ms', utc=True).to_pydatetime()
+        return [
+            {'timestamp': timestamp, 'open': bar[0], 'high': bar[1], 'low': bar[2], 'close': bar[3], 'volume': bar[4]}
+            for timestamp, bar in zip(timestamps, ohlcv.tolist())
+        ]
     
     def _convert_interval(self, interval: str) -> str:
         """Convert resolution to Binance interval"""
@@ -84,7 +226,7 @@ class BinanceDataDownloader:
         }
         
         return interval_map.get(interval, '1m')
-    
+
     def download_symbol_data(self, symbol: str, resolution: str, start_date: datetime, end_date: datetime,
                            lean_format: bool = True, output_folder: str = "data"):
         """Download and save data for a single symbol"""
@@ -92,80 +234,49 @@ class BinanceDataDownloader:
         
         if resolution == 'daily' or resolution == 'hour':
             # For daily/hour, save all data in one file
-            data = self.get_klines(symbol, resolution, start_date, end_date)
+            times, ohlcv = self.get_kline_arrays(symbol, resolution, start_date, end_date)
             
-            if data:
-                # Clean and validate data
-                cleaned_data = DataValidator.clean_ohlcv_data(data)
+            if len(times):
+                # Determine output path based on format
+                if lean_format:
+                    from config import CRYPTO_DATA_PATH
+                    base_path = CRYPTO_DATA_PATH
+                    csv_filename = f"{symbol.lower()}_{resolution}_trade.csv"
+                else:
+                    # Raw format in data_chest folder
+                    base_path = os.path.join(output_folder, "crypto")
+                    ensure_directory_exists(base_path)
+                    csv_filename = f"{symbol}_{resolution}_raw.csv"
                 
-                if cleaned_data:
-                    # Determine output path based on format
-                    if lean_format:
-                        from config import CRYPTO_DATA_PATH
-                        base_path = CRYPTO_DATA_PATH
-                        csv_filename = f"{symbol.lower()}_{resolution}_trade.csv"
-                    else:
-                        # Raw format in data_chest folder
-                        base_path = os.path.join(output_folder, "crypto")
-                        ensure_directory_exists(base_path)
-                        csv_filename = f"{symbol}_{resolution}_raw.csv"
-                    
-                    output_path = os.path.join(base_path, resolution, f"{symbol.lower()}.zip")
-                    
-                    # Group data by date for processing
-                    daily_data = {}
-                    for bar in cleaned_data:
-                        date_key = bar['timestamp'].strftime(LEAN_TIME_FORMAT)
-                        if date_key not in daily_data:
-                            daily_data[date_key] = []
-                        daily_data[date_key].append(bar)
-                    
-                    # Create CSV content for all dates
-                    all_csv_content = []
-                    for date_key in sorted(daily_data.keys()):
-                        date_bars = daily_data[date_key]
-                        csv_content = create_lean_crypto_csv(date_bars, symbol, date_bars[0]['timestamp'], resolution)
-                        all_csv_content.extend(csv_content)
-                    
-                    if all_csv_content:
-                        write_lean_zip_file(all_csv_content, output_path, csv_filename)
-                        logger.info(f"Saved {len(all_csv_content)} bars for {symbol} {resolution}")
+                output_path = os.path.join(base_path, resolution, f"{symbol.lower()}.zip")
+                write_lean_zip_text(create_lean_crypto_csv_text(times, ohlcv), output_path, csv_filename)
+                logger.info(f"Saved {len(times)} bars for {symbol} {resolution}")
         
         else:
-            # For minute/second, save data by date
-            current_date = start_date
-            
-            while current_date <= end_date:
-                date_start = current_date.replace(hour=0, minute=0, second=0)
-                date_end = current_date.replace(hour=23, minute=59, second=59)
-                
-                data = self.get_klines(symbol, resolution, date_start, date_end)
-                
-                if data:
-                    # Clean and validate data
-                    cleaned_data = DataValidator.clean_ohlcv_data(data)
-                    
-                    if cleaned_data:
-                        # Create directory structure
-                        symbol_dir = os.path.join(CRYPTO_DATA_PATH, resolution, symbol.lower())
-                        ensure_directory_exists(symbol_dir)
-                        
-                        # Create file paths
-                        date_str = format_lean_date(current_date)
-                        output_path = os.path.join(symbol_dir, f"{date_str}_trade.zip")
-                        csv_filename = f"{date_str}_{symbol.lower()}_{resolution}_trade.csv"
-                        
-                        # Convert to Lean format
-                        csv_content = create_lean_crypto_csv(cleaned_data, symbol, current_date, resolution)
-                        
-                        if csv_content:
-                            write_lean_zip_file(csv_content, output_path, csv_filename)
-                            logger.debug(f"Saved {len(csv_content)} bars for {symbol} on {date_str}")
-                
-                current_date += timedelta(days=1)
-                
-                # Rate limiting
-                time.sleep(self.rate_limit_delay)
+            # For minute/second, page through the whole range and save data by date.
+            # Whole days are written as soon as a page moves past them.
+            range_start = _to_utc_ms(start_date.replace(hour=0, minute=0, second=0, microsecond=0))
+            range_end = _to_utc_ms(end_date.replace(hour=23, minute=59, second=59, microsecond=0))
+            pending_times, pending_ohlcv = [], []
+            days_written = 0
+            try:
+                for times, ohlcv in self.iter_kline_pages(symbol, resolution, range_start, range_end):
+                    current_day = times[-1] // DAY_MS
+                    keep = valid_bars(ohlcv)
+                    pending_times.append(times[keep])
+                    pending_ohlcv.append(ohlcv[keep])
+
+                    times, ohlcv = np.concatenate(pending_times), np.concatenate(pending_ohlcv)
+                    complete = times // DAY_MS < current_day
+                    days_written += write_minute_days(symbol, resolution, times[complete], ohlcv[complete])
+                    pending_times, pending_ohlcv = [times[~complete]], [ohlcv[~complete]]
+            except Exception as e:
+                logger.error(f"Error getting klines for {symbol}: {str(e)}")
+
+            if pending_times:
+                days_written += write_minute_days(symbol, resolution, np.concatenate(pending_times),
+                                                  np.concatenate(pending_ohlcv))
+            logger.info(f"Saved {days_written} days of {resolution} bars for {symbol}")
     
     def download_multiple_symbols(self, symbols: List[str], resolution: str, start_date: datetime, end_date: datetime):
         """Download data for multiple symbols"""
@@ -204,6 +315,137 @@ class BinanceDataDownloader:
         logger.info(f"Crypto download completed: {len(downloaded_files)} files")
         return downloaded_files
     
+    def fetch_kline_archives(self, symbol: str, interval: str, start_date: datetime, end_date: datetime,
+                             base_url: str = BINANCE_DUMP_URL, dump_path: str = BINANCE_DUMP_PATH,
+                             workers: int = BINANCE_FETCH_WORKERS) -> List[str]:
+        """
+        Mirror the data-dump archives covering a date range into dump_path
+
+        Whole past months come as one monthly archive, the current month as daily
+        archives. Files already in dump_path are not downloaded again, and archives the
+        mirror does not have (before listing, or not published yet) are skipped.
+        """
+        symbol = symbol.upper()
+        today = datetime.now(timezone.utc).date()
+        current_month = today.replace(day=1)
+        wanted = []
+        month = start_date.date().replace(day=1)
+        while month <= end_date.date():
+            if month < current_month:
+                wanted.append(('monthly', f"{month:%Y-%m}"))
+            else:
+                day = max(month, start_date.date())
+                while day <= min(end_date.date(), today - timedelta(days=1)):
+                    wanted.append(('daily', f"{day:%Y-%m-%d}"))
+                    day += timedelta(days=1)
+            month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+        def fetch(frequency, period):
+            name = f"{symbol}-{interval}-{period}.zip"
+            relative = f"data/spot/{frequency}/klines/{symbol}/{interval}/{name}"
+            local_path = os.path.join(dump_path, *relative.split('/'))
+            if os.path.exists(local_path):
+                return local_path
+            with requests.get(f"{base_url.rstrip('/')}/{relative}", stream=True, timeout=60) as response:
+                if response.status_code == 404:
+                    return None
+                response.raise_for_status()
+                ensure_directory_exists(os.path.dirname(local_path))
+                tmp_path = f"{local_path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+                os.replace(tmp_path, local_path)
+            return local_path
+
+        paths = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fetch, frequency, period) for frequency, period in wanted]
+            for future in as_completed(futures):
+                try:
+                    path = future.result()
+                    if path:
+                        paths.append(path)
+                except Exception as e:
+                    logger.error(f"Error fetching {symbol} {interval} archive: {str(e)}")
+        logger.info(f"{len(paths)} of {len(wanted)} {symbol} {interval} archives available locally")
+        return sorted(paths)
+
+    def import_kline_archives(self, symbols: List[str], resolution: str, start_date: datetime, end_date: datetime,
+                              source: Optional[str] = None, workers: int = BINANCE_IMPORT_WORKERS,
+                              output_root: str = CRYPTO_DATA_PATH) -> Dict[str, int]:
+        """
+        Bulk import from Binance's public kline data dumps instead of the REST API
+
+        Parameters:
+        symbols (list): Binance symbols, e.g. BTCUSDT
+        resolution (str): minute, hour or daily
+        start_date (datetime): First day to import, naive datetimes are UTC
+        end_date (datetime): Last day to import
+        source (str): Directory holding the archive zips (flat or mirrored layout), or the base
+            URL of data.binance.vision or a mirror to download them from first. Defaults to
+            BINANCE_DUMP_URL.
+        workers (int): Processes converting archives in parallel
+        output_root (str): Lean crypto data root
+
+        Returns:
+        dict: Per symbol, days written for minute data or bars written for daily/hour
+        """
+        source = source or BINANCE_DUMP_URL
+        interval = self._convert_interval(resolution)
+        start_ms = _to_utc_ms(start_date.replace(hour=0, minute=0, second=0, microsecond=0))
+        end_ms = _to_utc_ms(end_date.replace(hour=23, minute=59, second=59, microsecond=0))
+
+        archives = []
+        for symbol in symbols:
+            if source.startswith(('http://', 'https://')):
+                self.fetch_kline_archives(symbol, interval, start_date, end_date, source)
+                source_dir = BINANCE_DUMP_PATH
+            else:
+                source_dir = source
+            archives += [(symbol, path) for path in find_kline_archives(source_dir, symbol, interval, start_date, end_date)]
+        logger.info(f"Importing {len(archives)} {interval} archives for {len(symbols)} symbols with {workers} workers")
+
+        imported = {symbol: 0 for symbol in symbols}
+        pieces = {symbol: [] for symbol in symbols}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_import_kline_archive, path, symbol, resolution, start_ms, end_ms, output_root): (symbol, path)
+                for symbol, path in archives
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Importing archives"):
+                symbol, path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error importing {os.path.basename(path)}: {str(e)}")
+                    continue
+                if isinstance(result, tuple):
+                    pieces[symbol].append(result)
+                else:
+                    imported[symbol] += result
+
+        if resolution in ('daily', 'hour'):
+            # One file per symbol, so these are merged here rather than in the workers
+            for symbol, symbol_pieces in pieces.items():
+                if not symbol_pieces:
+                    continue
+                times = np.concatenate([piece[0] for piece in symbol_pieces])
+                ohlcv = np.concatenate([piece[1] for piece in symbol_pieces])
+                order = np.argsort(times, kind='stable')
+                times, ohlcv = times[order], ohlcv[order]
+                unique = np.append(times[1:] != times[:-1], True)
+                times, ohlcv = times[unique], ohlcv[unique]
+                output_path = os.path.join(output_root, resolution, f"{symbol.lower()}.zip")
+                csv_filename = f"{symbol.lower()}_{resolution}_trade.csv"
+                write_lean_zip_text(create_lean_crypto_csv_text(times, ohlcv), output_path, csv_filename)
+                imported[symbol] = len(times)
+
+        for symbol, count in imported.items():
+            unit = 'bars' if resolution in ('daily', 'hour') else 'days'
+            logger.info(f"Imported {count} {resolution} {unit} for {symbol}")
+        return imported
+
     def get_available_symbols(self) -> List[str]:
         """Get list of available USDT trading pairs"""
         try:
@@ -17,6 +17,7 @@ from bs4 import BeautifulSoup
 from config import (
     EQUITY_DATA_PATH, LEAN_TIMEZONE_EQUITY, LEAN_TIME_FORMAT
 )
+from bhavcopy import BhavcopyIngestor
 from utils import (
     setup_logging, ensure_directory_exists, format_lean_date,
     create_lean_tradebar_csv, write_lean_zip_file, get_trading_days,
@@ -177,6 +178,27 @@ class BSEIndiaDownloader:
                 logger.error(f"Error downloading {symbol}: {str(e)}")
                 continue
     
+    def download_bhavcopies(self, start_date: datetime, end_date: datetime, symbols: Optional[List[str]] = None,
+                            source: Optional[str] = None) -> Dict[str, int]:
+        """
+        Build equity daily files from BSE's daily bhavcopies instead of per-symbol requests
+        
+        Files before July 2024 identify scrips by BSE code (e.g. 500325), later ones by ticker;
+        codes are mapped to tickers so each company gets one file named like download_equity_symbols'.
+        
+        Parameters:
+        start_date (datetime): First day
+        end_date (datetime): Last day
+        symbols (list): Tickers or scrip codes to write, None for every equity in the files
+        source (str): Local directory of bhavcopy files, None downloads them (reusing this session)
+        
+        Returns:
+        dict: Bars written per symbol
+        """
+        data_path = os.path.join(EQUITY_DATA_PATH, 'india', 'bse', 'equity', 'daily')
+        ingestor = BhavcopyIngestor('bse', session=self.session)
+        return ingestor.ingest(start_date, end_date, data_path, symbols=symbols, source=source)
+    
     def get_company_info(self, symbol: str) -> Dict:
         """Get company information for a BSE listed stock"""
         try:
@@ -178,3 +178,38 @@ BINANCE_RATE_LIMIT = 1200  # requests per minute
 # Timezone configuration
 LEAN_TIMEZONE_EQUITY = 'America/New_York'
 LEAN_TIMEZONE_CRYPTO = 'UTC'
+
+# Binance public data dumps (monthly/daily kline zips, or a local mirror of them)
+BINANCE_DUMP_URL = os.getenv('BINANCE_DUMP_URL', 'https://data.binance.vision')
+BINANCE_DUMP_PATH = os.getenv('BINANCE_DUMP_PATH', os.path.join(DATA_ROOT, 'crypto', 'binance_dumps'))
+BINANCE_IMPORT_WORKERS = int(os.getenv('BINANCE_IMPORT_WORKERS', os.cpu_count() or 4))
+BINANCE_FETCH_WORKERS = int(os.getenv('BINANCE_FETCH_WORKERS', 8))  # concurrent archive downloads
+
+# Alpha Vantage request budget and response cache
+ALPHA_VANTAGE_DAILY_LIMIT = int(os.getenv('ALPHA_VANTAGE_DAILY_LIMIT', 25))  # requests per day (free tier)
+ALPHA_VANTAGE_CACHE_PATH = os.getenv('ALPHA_VANTAGE_CACHE_PATH', os.path.join(DATA_ROOT, 'cache', 'alphavantage'))
+
+# Tiingo parallel client
+TIINGO_WORKERS = int(os.getenv('TIINGO_WORKERS', 8))  # concurrent requests, also the connection pool size
+TIINGO_BATCH_SIZE = 50  # tickers per multi-ticker crypto/forex request
+
+# Unified fundamentals store (one parquet table per source)
+FUNDAMENTALS_STORE_PATH = os.path.join(DATA_ROOT, 'fundamentals', 'store')
+
+# Yahoo Finance batch downloads
+YAHOO_BATCH_SIZE = 50  # tickers per yf.download request
+
+# Stooq bulk archives (d_us_txt.zip, h_world_txt.zip, ... from stooq.com/db/h/)
+STOOQ_ARCHIVE_TIMEZONE = 'Europe/Warsaw'  # TIME column of intraday archives is CET/CEST
+STOOQ_IMPORT_WORKERS = int(os.getenv('STOOQ_IMPORT_WORKERS', os.cpu_count() or 4))
+
+# Investing.com instrument lookup cache and concurrency
+INVESTING_INSTRUMENT_CACHE = os.path.join(INVESTING_DATA_PATH, 'instruments.json')
+INVESTING_WORKERS = 4  # concurrent fetches
+INVESTING_RATE_LIMIT = 60  # requests per minute across all workers
+
+# NSE/BSE daily bhavcopy files (one file per trading day with every symbol)
+BHAVCOPY_PATH = os.path.join(DATA_ROOT, 'india', 'bhavcopy')  # downloaded files, by exchange
+BHAVCOPY_WORKERS = 8
+NSE_BHAVCOPY_URL = 'https://nsearchives.nseindia.com'
+BSE_BHAVCOPY_URL = 'https://www.bseindia.com'
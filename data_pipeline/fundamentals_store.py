@@ -0,0 +1,181 @@
+"""
+Unified fundamentals store
+
+Fundamentals from every source are normalized into one long, columnar table keyed by
+(symbol, period, field, source), one parquet file per source. Upserts replace rows with
+the same key; cross-sectional queries ("all P/E for the universe as of date X") run on
+the in-memory columns instead of opening one JSON file per symbol.
+"""
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import List, Dict, Optional, Iterable
+
+from config import FUNDAMENTALS_STORE_PATH
+from utils import setup_logging, ensure_directory_exists
+
+logger = setup_logging()
+
+KEY_COLUMNS = ['symbol', 'period', 'field', 'source']
+COLUMNS = KEY_COLUMNS + ['period_type', 'value', 'as_of']
+# Days from a fiscal period's end until its values are assumed public when a source has no
+# filing or reported date (the 10-Q deadline is 40-45 days, the 10-K one 60-90)
+FILING_LAG_DAYS = {'quarterly': 45, 'annual': 90}
+
+
+def _to_float(value) -> Optional[float]:
+    """Numeric value of a field, None for text, 'None' and empty values"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(number) else number
+
+
+def record_rows(symbol: str, source: str, period: str, period_type: str, record: Dict,
+                as_of=None, skip: Iterable[str] = ()) -> List[Dict]:
+    """
+    Rows for every numeric field of one flat record (an overview, one statement period, ...)
+
+    Parameters:
+    symbol (str): Ticker
+    source (str): Data source, e.g. alphavantage
+    period (str): Period the values belong to, YYYY-MM-DD (fiscal period end or snapshot date)
+    period_type (str): annual, quarterly or snapshot
+    record (dict): Field name to value, non-numeric values are dropped
+    as_of (datetime): When the values became known (filing or reported date). Defaults to the
+        period date plus FILING_LAG_DAYS for statements, so backtests never see them early,
+        and to the period date for snapshots
+    skip (iterable): Field names to leave out
+
+    Returns:
+    list: Row dicts in the store's columns
+    """
+    if as_of is None:
+        as_of = pd.Timestamp(period) + pd.Timedelta(days=FILING_LAG_DAYS.get(period_type, 0))
+    as_of = pd.Timestamp(as_of)
+    rows = []
+    for field, value in record.items():
+        if field in skip:
+            continue
+        number = _to_float(value)
+        if number is not None:
+            rows.append({'symbol': symbol.upper(), 'period': str(period)[:10], 'field': field, 'source': source,
+                         'period_type': period_type, 'value': number, 'as_of': as_of})
+    return rows
+
+
+def statement_rows(symbol: str, source: str, reports: List[Dict], period_type: str,
+                   date_key: str = 'fiscal_date_ending', reported_key: Optional[str] = None,
+                   reported_dates: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """
+    Rows for a list of statement periods, each dated by date_key
+
+    A period is known from its reported_key value if present, else from reported_dates
+    (period to reported date, e.g. from the earnings calendar), else after FILING_LAG_DAYS.
+    """
+    rows = []
+    for report in reports or []:
+        period = report.get(date_key)
+        if not period:
+            continue
+        as_of = report.get(reported_key) if reported_key else None
+        if not as_of and reported_dates:
+            as_of = reported_dates.get(str(period)[:10])
+        rows += record_rows(symbol, source, period, period_type, report, as_of=as_of or None,
+                            skip=(date_key, reported_key))
+    return rows
+
+
+class FundamentalsStore:
+    """Columnar fundamentals table with upserts and cross-sectional queries"""
+
+    def __init__(self, path: str = FUNDAMENTALS_STORE_PATH):
+        self.path = path
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _file(self, source: str) -> str:
+        return os.path.join(self.path, f"{source}.parquet")
+
+    def sources(self) -> List[str]:
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name[:-len('.parquet')] for name in os.listdir(self.path) if name.endswith('.parquet'))
+
+    def _table(self, source: str) -> pd.DataFrame:
+        """One source's rows, read from disk once and then kept in memory"""
+        if source not in self._tables:
+            if os.path.exists(self._file(source)):
+                self._tables[source] = pd.read_parquet(self._file(source))
+            else:
+                self._tables[source] = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in
+                                                     zip(COLUMNS, [object] * 5 + ['float64', 'datetime64[ns]'])})
+        return self._tables[source]
+
+    def upsert(self, rows: List[Dict]) -> int:
+        """Insert rows, replacing any stored row with the same (symbol, period, field, source); returns the row count"""
+        if not rows:
+            return 0
+        new = pd.DataFrame(rows, columns=COLUMNS)
+        new['as_of'] = pd.to_datetime(new['as_of'])
+        with self._lock:
+            for source, source_rows in new.groupby('source', sort=False):
+                table = pd.concat([self._table(source), source_rows], ignore_index=True)
+                table = table.drop_duplicates(KEY_COLUMNS, keep='last')
+                table = table.sort_values(['field', 'symbol', 'period'], ignore_index=True)
+                ensure_directory_exists(self.path)
+                tmp_path = f"{self._file(source)}.tmp"
+                table.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, self._file(source))
+                self._tables[source] = table
+        logger.info(f"Upserted {len(new)} fundamentals rows")
+        return len(new)
+
+    def query(self, fields: Optional[List[str]] = None, symbols: Optional[List[str]] = None,
+              sources: Optional[List[str]] = None) -> pd.DataFrame:
+        """Rows matching the given fields, symbols and sources (None matches everything)"""
+        tables = [self._table(source) for source in (sources or self.sources())]
+        if not tables:
+            return self._table('')
+        df = pd.concat(tables, ignore_index=True) if len(tables) > 1 else tables[0]
+        mask = np.ones(len(df), dtype=bool)
+        if fields is not None:
+            mask &= df['field'].isin(fields).to_numpy()
+        if symbols is not None:
+            mask &= df['symbol'].isin([symbol.upper() for symbol in symbols]).to_numpy()
+        return df[mask]
+
+    def cross_section(self, field: str, as_of: Optional[datetime] = None, sources: Optional[List[str]] = None,
+                      symbols: Optional[List[str]] = None, period_type: Optional[str] = None) -> pd.Series:
+        """
+        Latest known value of one field for every symbol as of a date
+
+        Only rows known by as_of count, and of those the latest period wins. Ties between
+        sources on the same period go to the first one in sources, whichever reported first.
+
+        Returns:
+        pandas.Series: Values indexed by symbol
+        """
+        sources = sources or self.sources()
+        df = self.query([field], symbols, sources)
+        if period_type is not None:
+            df = df[df['period_type'] == period_type]
+        if as_of is not None:
+            df = df[df['as_of'] <= pd.Timestamp(as_of)]
+        if df.empty:
+            return pd.Series(dtype='float64', name=field)
+        rank = df['source'].map({source: i for i, source in enumerate(sources)})
+        df = df.assign(rank=-rank).sort_values(['period', 'rank'])
+        latest = df.drop_duplicates('symbol', keep='last').set_index('symbol')['value'].sort_index()
+        return latest.rename(field)
+
+    def history(self, symbol: str, field: str, source: Optional[str] = None) -> pd.Series:
+        """All periods of one field for one symbol, indexed by period"""
+        df = self.query([field], [symbol], [source] if source else None)
+        return df.sort_values(['period', 'as_of']).drop_duplicates('period', keep='last').set_index('period')['value']
@@ -24,11 +24,15 @@ import pandas as pd
 import zipfile
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Callable, Iterable
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
 
 try:
     import investpy
+    from investpy.utils.search_obj import SearchObj
     INVESTPY_AVAILABLE = True
 except ImportError:
     INVESTPY_AVAILABLE = False
@@ -37,12 +41,100 @@ except ImportError:
 from config import (
     INVESTING_DATA_PATH, DEFAULT_INVESTING_STOCKS,
     DEFAULT_INVESTING_FOREX, DEFAULT_INVESTING_COMMODITIES, DEFAULT_INVESTING_CRYPTO,
-    DEFAULT_INVESTING_INDICES
+    DEFAULT_INVESTING_INDICES, INVESTING_INSTRUMENT_CACHE, INVESTING_WORKERS, INVESTING_RATE_LIMIT
+)
+from utils import (
+    convert_to_lean_format, create_zip_file, setup_logging, format_symbol_for_lean, DataValidator,
+    RateLimiter, ensure_directory_exists
 )
-from utils import convert_to_lean_format, create_zip_file, setup_logging, format_symbol_for_lean, DataValidator
 
 logger = setup_logging()
 
+# Instrument kind to investpy's bundled listing, the column its by-name getter matches and the SearchObj pair_type
+LOCAL_LISTINGS = {
+    'stock': ('stocks.csv', 'symbol', 'stocks'),
+    'forex': ('currency_crosses.csv', 'name', 'currencies'),
+    'commodity': ('commodities.csv', 'name', 'commodities'),
+    'crypto': ('cryptos.csv', 'name', 'cryptos'),
+    'index': ('indices.csv', 'name', 'indices'),
+    'etf': ('etfs.csv', 'name', 'etfs')
+}
+
+
+def clean_history(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows passing DataValidator's OHLC checks, with a zero Volume column where investpy has none"""
+    if 'Volume' not in df.columns:
+        df = df.assign(Volume=0)
+    valid = (df['Low'] <= df['Open']) & (df['Open'] <= df['High']) & \
+            (df['Low'] <= df['Close']) & (df['Close'] <= df['High']) & (df['Volume'].fillna(0) >= 0)
+    return df[valid]
+
+
+def find_instrument(listing: pd.DataFrame, kind: str, name: str, country: Optional[str] = None) -> Optional[Dict]:
+    """
+    SearchObj fields of a name in one of investpy's bundled listings, matched exactly as its by-name getters do
+
+    Parameters:
+    listing (pandas.DataFrame): Contents of the kind's LOCAL_LISTINGS file
+    kind (str): One of LOCAL_LISTINGS
+    name (str): Symbol (stocks) or name as given to the get_* methods
+    country (str): Country for stocks, indices and ETFs
+
+    Returns:
+    dict: SearchObj constructor arguments, None when the listing has no such instrument
+    """
+    _, column, pair_type = LOCAL_LISTINGS[kind]
+    matches = listing[listing[column].astype(str).str.lower() == name.strip().lower()]
+    if country and 'country' in matches.columns:
+        matches = matches[matches['country'].astype(str).str.lower() == country.strip().lower()]
+    if 'def_stock_exchange' in matches.columns:
+        # investpy's ETF getter defaults to the fund's main exchange
+        matches = matches.sort_values('def_stock_exchange', ascending=False, kind='stable')
+    if matches.empty:
+        return None
+
+    row = matches.iloc[0]
+    # SearchObj titles stocks, ETFs and currency crosses by symbol, the rest by name, like the getters do
+    return {
+        'id_': int(row['id']),
+        'name': row['full_name'] if kind in ('commodity', 'index') else row['name'],
+        'symbol': row['name'] if kind == 'forex' else row.get('symbol'),
+        'country': row.get('country') or None,
+        'tag': row['tag'],
+        'pair_type': pair_type,
+        'exchange': row.get('stock_exchange')
+    }
+
+
+class InstrumentCache:
+    """Persistent (kind, name, country) to Investing.com instrument map, so names are looked up only once"""
+    
+    def __init__(self, path: str = INVESTING_INSTRUMENT_CACHE):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.instruments = json.load(f)
+        except (OSError, ValueError):
+            self.instruments = {}
+    
+    @staticmethod
+    def _key(kind: str, name: str, country: Optional[str]) -> str:
+        return f"{kind}|{(country or '').lower()}|{name.lower()}"
+    
+    def get(self, kind: str, name: str, country: Optional[str] = None) -> Optional[Dict]:
+        return self.instruments.get(self._key(kind, name, country))
+    
+    def put(self, kind: str, name: str, country: Optional[str], fields: Dict):
+        """Store one instrument and rewrite the cache file atomically"""
+        with self.lock:
+            self.instruments[self._key(kind, name, country)] = fields
+            ensure_directory_exists(os.path.dirname(self.path))
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.instruments, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
 class InvestingComDownloader:
     """
     Investing.com data downloader using the investpy library
@@ -62,28 +154,77 @@ class InvestingComDownloader:
         # Create data directory if it doesn't exist
         os.makedirs(self.data_path, exist_ok=True)
         
-        # Rate limiting: 1 second between requests to be respectful
-        self.request_delay = 1.0
-        self.last_request_time = 0
+        # Polite limits shared by all workers: INVESTING_RATE_LIMIT requests per minute
+        self.workers = INVESTING_WORKERS
+        self.rate_limiter = RateLimiter(INVESTING_RATE_LIMIT, 60)
+        self.instruments = InstrumentCache()
+        self.listings = {}
+        self.listings_lock = threading.Lock()
         
         logger.info("Investing.com downloader initialized with investpy library")
     
     def _wait_for_rate_limit(self):
-        """Implement rate limiting between requests"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        
-        if time_since_last_request < self.request_delay:
-            sleep_time = self.request_delay - time_since_last_request
-            logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        """Implement rate limiting between requests (thread-safe)"""
+        self.rate_limiter.acquire()
     
     def _format_date(self, date: datetime) -> str:
         """Format datetime to investpy date format (dd/mm/yyyy)"""
         return date.strftime('%d/%m/%Y')
     
+    def _listing(self, kind: str) -> pd.DataFrame:
+        """investpy's bundled listing for a kind, read once per downloader"""
+        with self.listings_lock:
+            if kind not in self.listings:
+                path = os.path.join(os.path.dirname(investpy.__file__), 'resources', LOCAL_LISTINGS[kind][0])
+                self.listings[kind] = pd.read_csv(path, keep_default_na=False)
+            return self.listings[kind]
+    
+    def _resolve_instrument(self, kind: str, name: str, country: Optional[str] = None) -> Optional[Dict]:
+        """
+        Investing.com instrument for a name, looked up once in investpy's local listings and then read
+        from the instrument cache (no network request either way)
+        
+        Args:
+            kind: One of LOCAL_LISTINGS
+            name: Symbol or name as given to the get_* methods
+            country: Country name for stocks, indices and ETFs
+            
+        Returns:
+            SearchObj fields for the instrument or None if the listing has no exact match
+        """
+        fields = self.instruments.get(kind, name, country)
+        if fields is None:
+            fields = find_instrument(self._listing(kind), kind, name, country)
+            if fields is None:
+                return None
+            self.instruments.put(kind, name, country, fields)
+            logger.info(f"Resolved {name} to Investing.com instrument {fields['id_']} ({fields['name']})")
+        return fields
+    
+    def _fetch_history(self, kind: str, name: str, country: Optional[str], from_date: str, to_date: str,
+                       fallback: Callable[[], pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """Historical data by cached instrument id, or through investpy's by-name getter if the name can't be resolved"""
+        try:
+            fields = self._resolve_instrument(kind, name, country)
+        except Exception as e:
+            logger.warning(f"Instrument lookup failed for {name}: {str(e)}")
+            fields = None
+        self._wait_for_rate_limit()
+        if fields is None:
+            return fallback()
+        return SearchObj(**fields).retrieve_historical_data(from_date=from_date, to_date=to_date)
+    
+    def _run_parallel(self, fn: Callable, items: Iterable, desc: str):
+        """Call fn on each item on the worker pool"""
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(fn, item): item for item in items}
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Error downloading {futures[future]}: {str(e)}")
+    
     def get_stock_data(self, symbol: str, country: str = 'United States', 
                       start_date: datetime = None, end_date: datetime = None) -> Optional[pd.DataFrame]:
         """
@@ -99,8 +240,6 @@ class InvestingComDownloader:
             DataFrame with OHLCV data or None if failed
         """
         try:
-            self._wait_for_rate_limit()
-            
             if start_date is None:
                 start_date = datetime.now() - timedelta(days=365)
             if end_date is None:
@@ -111,11 +250,14 @@ class InvestingComDownloader:
             
             logger.info(f"Fetching stock data for {symbol} ({country}) from {from_date} to {to_date}")
             
-            df = investpy.get_stock_historical_data(
-                stock=symbol,
-                country=country,
-                from_date=from_date,
-                to_date=to_date
+            df = self._fetch_history(
+                'stock', symbol, country, from_date, to_date,
+                lambda: investpy.get_stock_historical_data(
+                    stock=symbol,
+                    country=country,
+                    from_date=from_date,
+                    to_date=to_date
+                )
             )
             
             if df is not None and not df.empty:
@@ -129,7 +271,8 @@ class InvestingComDownloader:
                 })
                 
                 # Validate data
-                if self.validator.validate_ohlcv_data(df):
+                df = clean_history(df)
+                if not df.empty:
                     logger.info(f"Successfully retrieved {len(df)} records for {symbol}")
                     return df
                 else:
@@ -154,8 +297,6 @@ class InvestingComDownloader:
             DataFrame with OHLCV data or None if failed
         """
         try:
-            self._wait_for_rate_limit()
-            
             if start_date is None:
                 start_date = datetime.now() - timedelta(days=365)
             if end_date is None:
@@ -166,15 +307,19 @@ class InvestingComDownloader:
             
             logger.info(f"Fetching forex data for {pair} from {from_date} to {to_date}")
             
-            df = investpy.get_currency_cross_historical_data(
-                currency_cross=pair,
-                from_date=from_date,
-                to_date=to_date
+            df = self._fetch_history(
+                'forex', pair, None, from_date, to_date,
+                lambda: investpy.get_currency_cross_historical_data(
+                    currency_cross=pair,
+                    from_date=from_date,
+                    to_date=to_date
+                )
             )
             
             if df is not None and not df.empty:
                 # Validate data
-                if self.validator.validate_ohlcv_data(df):
+                df = clean_history(df)
+                if not df.empty:
                     logger.info(f"Successfully retrieved {len(df)} records for {pair}")
                     return df
                 else:
@@ -199,8 +344,6 @@ class InvestingComDownloader:
             DataFrame with OHLCV data or None if failed
         """
         try:
-            self._wait_for_rate_limit()
-            
             if start_date is None:
                 start_date = datetime.now() - timedelta(days=365)
             if end_date is None:
@@ -211,15 +354,19 @@ class InvestingComDownloader:
             
             logger.info(f"Fetching commodity data for {commodity} from {from_date} to {to_date}")
             
-            df = investpy.get_commodity_historical_data(
-                commodity=commodity,
-                from_date=from_date,
-                to_date=to_date
+            df = self._fetch_history(
+                'commodity', commodity, None, from_date, to_date,
+                lambda: investpy.get_commodity_historical_data(
+                    commodity=commodity,
+                    from_date=from_date,
+                    to_date=to_date
+                )
             )
             
             if df is not None and not df.empty:
                 # Validate data
-                if self.validator.validate_ohlcv_data(df):
+                df = clean_history(df)
+                if not df.empty:
                     logger.info(f"Successfully retrieved {len(df)} records for {commodity}")
                     return df
                 else:
@@ -244,8 +391,6 @@ class InvestingComDownloader:
             DataFrame with OHLCV data or None if failed
         """
         try:
-            self._wait_for_rate_limit()
-            
             if start_date is None:
                 start_date = datetime.now() - timedelta(days=365)
             if end_date is None:
@@ -256,15 +401,19 @@ class InvestingComDownloader:
             
             logger.info(f"Fetching crypto data for {symbol} from {from_date} to {to_date}")
             
-            df = investpy.get_crypto_historical_data(
-                crypto=symbol,
-                from_date=from_date,
-                to_date=to_date
+            df = self._fetch_history(
+                'crypto', symbol, None, from_date, to_date,
+                lambda: investpy.get_crypto_historical_data(
+                    crypto=symbol,
+                    from_date=from_date,
+                    to_date=to_date
+                )
             )
             
             if df is not None and not df.empty:
                 # Validate data
-                if self.validator.validate_ohlcv_data(df):
+                df = clean_history(df)
+                if not df.empty:
                     logger.info(f"Successfully retrieved {len(df)} records for {symbol}")
                     return df
                 else:
@@ -291,8 +440,6 @@ class InvestingComDownloader:
             DataFrame with OHLCV data or None if failed
         """
         try:
-            self._wait_for_rate_limit()
-            
             if start_date is None:
                 start_date = datetime.now() - timedelta(days=365)
             if end_date is None:
@@ -303,16 +450,20 @@ class InvestingComDownloader:
             
             logger.info(f"Fetching index data for {index} ({country}) from {from_date} to {to_date}")
             
-            df = investpy.get_index_historical_data(
-                index=index,
-                country=country,
-                from_date=from_date,
-                to_date=to_date
+            df = self._fetch_history(
+                'index', index, country, from_date, to_date,
+                lambda: investpy.get_index_historical_data(
+                    index=index,
+                    country=country,
+                    from_date=from_date,
+                    to_date=to_date
+                )
             )
             
             if df is not None and not df.empty:
                 # Validate data
-                if self.validator.validate_ohlcv_data(df):
+                df = clean_history(df)
+                if not df.empty:
                     logger.info(f"Successfully retrieved {len(df)} records for {index}")
                     return df
                 else:
@@ -339,8 +490,6 @@ class InvestingComDownloader:
             DataFrame with OHLCV data or None if failed
         """
         try:
-            self._wait_for_rate_limit()
-            
             if start_date is None:
                 start_date = datetime.now() - timedelta(days=365)
             if end_date is None:
@@ -351,16 +500,20 @@ class InvestingComDownloader:
             
             logger.info(f"Fetching ETF data for {etf} ({country}) from {from_date} to {to_date}")
             
-            df = investpy.get_etf_historical_data(
-                etf=etf,
-                country=country,
-                from_date=from_date,
-                to_date=to_date
+            df = self._fetch_history(
+                'etf', etf, country, from_date, to_date,
+                lambda: investpy.get_etf_historical_data(
+                    etf=etf,
+                    country=country,
+                    from_date=from_date,
+                    to_date=to_date
+                )
             )
             
             if df is not None and not df.empty:
                 # Validate data
-                if self.validator.validate_ohlcv_data(df):
+                df = clean_history(df)
+                if not df.empty:
                     logger.info(f"Successfully retrieved {len(df)} records for {etf}")
                     return df
                 else:
@@ -420,7 +573,7 @@ class InvestingComDownloader:
         """Download multiple stock symbols and save in Lean format"""
         logger.info(f"Starting download of {len(symbols)} stock symbols from {country}")
         
-        for symbol in symbols:
+        def download_one(symbol):
             try:
                 df = self.get_stock_data(symbol, country, start_date, end_date)
                 
@@ -440,13 +593,14 @@ class InvestingComDownloader:
                     
             except Exception as e:
                 logger.error(f"Error downloading {symbol}: {str(e)}")
-                continue
+        
+        self._run_parallel(download_one, symbols, "Downloading from Investing.com")
     
     def download_forex_pairs(self, pairs: List[str], start_date: datetime, end_date: datetime):
         """Download multiple forex pairs and save in Lean format"""
         logger.info(f"Starting download of {len(pairs)} forex pairs")
         
-        for pair in pairs:
+        def download_one(pair):
             try:
                 df = self.get_forex_data(pair, start_date, end_date)
                 
@@ -466,13 +620,14 @@ class InvestingComDownloader:
                     
             except Exception as e:
                 logger.error(f"Error downloading {pair}: {str(e)}")
-                continue
+        
+        self._run_parallel(download_one, pairs, "Downloading from Investing.com")
     
     def download_commodities(self, commodities: List[str], start_date: datetime, end_date: datetime):
         """Download multiple commodities and save in Lean format"""
         logger.info(f"Starting download of {len(commodities)} commodities")
         
-        for commodity in commodities:
+        def download_one(commodity):
             try:
                 df = self.get_commodity_data(commodity, start_date, end_date)
                 
@@ -492,13 +647,14 @@ class InvestingComDownloader:
                     
             except Exception as e:
                 logger.error(f"Error downloading {commodity}: {str(e)}")
-                continue
+        
+        self._run_parallel(download_one, commodities, "Downloading from Investing.com")
     
     def download_crypto_symbols(self, symbols: List[str], start_date: datetime, end_date: datetime):
         """Download multiple crypto symbols and save in Lean format"""
         logger.info(f"Starting download of {len(symbols)} crypto symbols")
         
-        for symbol in symbols:
+        def download_one(symbol):
             try:
                 df = self.get_crypto_data(symbol, start_date, end_date)
                 
@@ -518,13 +674,14 @@ class InvestingComDownloader:
                     
             except Exception as e:
                 logger.error(f"Error downloading {symbol}: {str(e)}")
-                continue
+        
+        self._run_parallel(download_one, symbols, "Downloading from Investing.com")
     
     def download_indices(self, indices: List[str], start_date: datetime, end_date: datetime, country: str = 'United States'):
         """Download multiple indices and save in Lean format"""
         logger.info(f"Starting download of {len(indices)} indices from {country}")
         
-        for index in indices:
+        def download_one(index):
             try:
                 df = self.get_index_data(index, country, start_date, end_date)
                 
@@ -544,13 +701,14 @@ class InvestingComDownloader:
                     
             except Exception as e:
                 logger.error(f"Error downloading {index}: {str(e)}")
-                continue
+        
+        self._run_parallel(download_one, indices, "Downloading from Investing.com")
     
     def download_etfs(self, etfs: List[str], start_date: datetime, end_date: datetime, country: str = 'United States'):
         """Download multiple ETFs and save in Lean format"""
         logger.info(f"Starting download of {len(etfs)} ETFs from {country}")
         
-        for etf in etfs:
+        def download_one(etf):
             try:
                 df = self.get_etf_data(etf, country, start_date, end_date)
                 
@@ -570,7 +728,8 @@ class InvestingComDownloader:
                     
             except Exception as e:
                 logger.error(f"Error downloading {etf}: {str(e)}")
-                continue
+        
+        self._run_parallel(download_one, etfs, "Downloading from Investing.com")
     
     def download_economic_calendar(self, from_date: datetime = None, to_date: datetime = None, 
                                   countries: List[str] = None):
@@ -63,6 +63,9 @@ def main():
                        help='Equity symbols to download (for Alpaca)')
     parser.add_argument('--crypto-symbols', nargs='+', default=DEFAULT_CRYPTO_SYMBOLS,
                        help='Crypto symbols to download (for Binance)')
+    parser.add_argument('--binance-dump', nargs='?', const='', default=None,
+                       help='Import Binance from its public kline data dumps: a directory of archive zips, '
+                            'or a mirror URL (no value: data.binance.vision)')
     parser.add_argument('--option-symbols', nargs='+', default=DEFAULT_OPTION_SYMBOLS,
                        help='Option symbols to download (for yfinance)')
     parser.add_argument('--futures-symbols', nargs='+', default=DEFAULT_FUTURES_SYMBOLS,
@@ -94,6 +97,9 @@ def main():
     
     parser.add_argument('--bse-stocks', nargs='+', default=DEFAULT_BSE_STOCKS,
                        help='BSE India stock symbols')
+    parser.add_argument('--bhavcopy', nargs='?', const='', default=None,
+                       help='Build NSE/BSE equities for the whole market from daily bhavcopy files: a directory '
+                            'holding them (no value: download from the exchanges)')
     
     parser.add_argument('--tiingo-stocks', nargs='+', default=DEFAULT_TIINGO_STOCKS,
                        help='Tiingo stock symbols')
@@ -129,6 +135,10 @@ def main():
                        help='Stooq index symbols')
     parser.add_argument('--stooq-commodities', nargs='+', default=DEFAULT_STOOQ_COMMODITIES,
                        help='Stooq commodity symbols')
+    parser.add_argument('--stooq-archive', default=None,
+                       help='Import a downloaded Stooq bulk archive zip (e.g. d_us_txt.zip)')
+    parser.add_argument('--stooq-universe', nargs='+', default=None,
+                       help='Tickers to import from the Stooq archive (default: all)')
     
     # Date range arguments
     parser.add_argument('--start-date', type=parse_date, default=DEFAULT_START_DATE,
@@ -204,12 +214,21 @@ def main():
         try:
             logger.info("Starting Binance data download...")
             binance_downloader = BinanceDataDownloader()
-            binance_downloader.download_multiple_symbols(
-                args.crypto_symbols, 
-                args.resolution, 
-                args.start_date, 
-                args.end_date
-            )
+            if args.binance_dump is not None:
+                binance_downloader.import_kline_archives(
+                    args.crypto_symbols,
+                    args.resolution,
+                    args.start_date,
+                    args.end_date,
+                    source=args.binance_dump or None
+                )
+            else:
+                binance_downloader.download_multiple_symbols(
+                    args.crypto_symbols, 
+                    args.resolution, 
+                    args.start_date, 
+                    args.end_date
+                )
             logger.info("Binance download completed")
         except Exception as e:
             logger.error(f"Error with Binance download: {str(e)}")
@@ -333,7 +352,10 @@ def main():
             nse_downloader = NSEIndiaDownloader()
             
             # Download equity data
-            nse_downloader.download_equity_symbols(args.nse_stocks, args.start_date, args.end_date)
+            if args.bhavcopy is not None:
+                nse_downloader.download_bhavcopies(args.start_date, args.end_date, source=args.bhavcopy or None)
+            else:
+                nse_downloader.download_equity_symbols(args.nse_stocks, args.start_date, args.end_date)
             
             # Download index data
             nse_downloader.download_index_symbols(args.nse_indices, args.start_date, args.end_date)
@@ -351,7 +373,10 @@ def main():
             bse_downloader = BSEIndiaDownloader()
             
             # Download equity data
-            bse_downloader.download_equity_symbols(args.bse_stocks, args.start_date, args.end_date)
+            if args.bhavcopy is not None:
+                bse_downloader.download_bhavcopies(args.start_date, args.end_date, source=args.bhavcopy or None)
+            else:
+                bse_downloader.download_equity_symbols(args.bse_stocks, args.start_date, args.end_date)
             
             logger.info("BSE India download completed")
         except Exception as e:
@@ -388,6 +413,18 @@ def main():
             if args.source == 'tiingo':
                 sys.exit(1)
     
+    # Import Stooq bulk archives
+    if args.source in ['stooq', 'all'] and args.stooq_archive:
+        try:
+            logger.info("Starting Stooq archive import...")
+            stooq_downloader = StooqDownloader()
+            stooq_downloader.import_archive(args.stooq_archive, args.stooq_universe, args.start_date, args.end_date)
+            logger.info("Stooq archive import completed")
+        except Exception as e:
+            logger.error(f"Error with Stooq archive import: {str(e)}")
+            if args.source == 'stooq':
+                sys.exit(1)
+    
     # Download data from FRED
     if args.source in ['fred', 'all']:
         try:
@@ -20,6 +20,7 @@ import nsepy as nse
 from config import (
     EQUITY_DATA_PATH, LEAN_TIMEZONE_EQUITY, LEAN_TIME_FORMAT
 )
+from bhavcopy import BhavcopyIngestor
 from utils import (
     setup_logging, ensure_directory_exists, format_lean_date,
     create_lean_tradebar_csv, write_lean_zip_file, get_trading_days,
@@ -239,6 +240,24 @@ class NSEIndiaDownloader:
                 logger.error(f"Error downloading {symbol}: {str(e)}")
                 continue
     
+    def download_bhavcopies(self, start_date: datetime, end_date: datetime, symbols: Optional[List[str]] = None,
+                            source: Optional[str] = None) -> Dict[str, int]:
+        """
+        Build equity daily files from NSE's daily bhavcopies instead of per-symbol requests
+        
+        Parameters:
+        start_date (datetime): First day
+        end_date (datetime): Last day
+        symbols (list): NSE symbols to write, None for every equity in the files
+        source (str): Local directory of bhavcopy files, None downloads them (reusing this session)
+        
+        Returns:
+        dict: Bars written per symbol
+        """
+        data_path = os.path.join(EQUITY_DATA_PATH, 'india', 'nse', 'equity', 'daily')
+        ingestor = BhavcopyIngestor('nse', session=self.session)
+        return ingestor.ingest(start_date, end_date, data_path, symbols=symbols, source=source)
+    
     def download_index_symbols(self, indices: List[str], start_date: datetime, end_date: datetime):
         """Download index data for multiple indices"""
         logger.info(f"Starting NSE index download for {len(indices)} indices")
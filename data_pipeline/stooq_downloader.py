@@ -29,15 +29,147 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import time
 import io
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tqdm import tqdm
 
 from config import (
     STOOQ_DATA_PATH, DEFAULT_STOOQ_STOCKS, DEFAULT_STOOQ_FOREX, 
-    DEFAULT_STOOQ_INDICES, DEFAULT_STOOQ_COMMODITIES
+    DEFAULT_STOOQ_INDICES, DEFAULT_STOOQ_COMMODITIES,
+    LEAN_TIMEZONE_EQUITY, STOOQ_ARCHIVE_TIMEZONE, STOOQ_IMPORT_WORKERS
+)
+from utils import (
+    convert_to_lean_format, create_zip_file, setup_logging, format_symbol_for_lean, DataValidator,
+    create_lean_tradebar_csv_text, write_lean_zip_text, ensure_directory_exists
 )
-from utils import convert_to_lean_format, create_zip_file, setup_logging, format_symbol_for_lean, DataValidator
 
 logger = setup_logging()
 
+# <PER> column of the bulk archives to Lean resolution (5-minute archives have no Lean equivalent)
+ARCHIVE_RESOLUTIONS = {'D': 'daily', '60': 'hour'}
+# Archive folder keywords to asset type, e.g. data/daily/us/nasdaq stocks/1/aapl.us.txt
+ARCHIVE_ASSET_TYPES = [('cryptocurrencies', 'crypto'), ('currencies', 'forex'), ('indices', 'index'),
+                       ('commodities', 'cfd'), ('futures', 'cfd')]
+MEMBERS_PER_TASK = 200
+
+
+def archive_symbol(member: str) -> str:
+    """Stooq ticker of an archive member, e.g. AAPL.US for .../aapl.us.txt"""
+    return os.path.splitext(os.path.basename(member))[0].upper()
+
+
+def archive_asset_type(member: str) -> str:
+    """Asset type of an archive member from its folder, equity when nothing matches"""
+    folder = os.path.dirname(member).lower()
+    for keyword, asset_type in ARCHIVE_ASSET_TYPES:
+        if keyword in folder:
+            return asset_type
+    return 'equity'
+
+
+def lean_name(symbol: str, asset_type: str) -> str:
+    """Lean symbol the per-symbol download_* methods save a Stooq ticker under"""
+    if asset_type == 'equity':
+        # download_stock_symbols takes the ticker without its market suffix (AAPL for AAPL.US)
+        symbol = symbol.rsplit('.', 1)[0]
+    elif asset_type == 'index':
+        symbol = symbol.replace('^', '')
+    elif asset_type == 'cfd':
+        symbol = symbol.replace('.F', '')
+    elif asset_type == 'crypto':
+        symbol = symbol.replace('.V', '').replace('USD', '')
+    return format_symbol_for_lean(symbol, asset_type)
+
+
+def select_archive_members(names: List[str], universe: Optional[List[str]] = None) -> List[str]:
+    """
+    Per-symbol text files of an archive, limited to a universe
+
+    Universe entries match the full Stooq ticker (AAPL.US) or the ticker without its
+    market suffix (AAPL); None keeps every symbol.
+    """
+    members = [name for name in names if name.lower().endswith('.txt')]
+    if universe is None:
+        return members
+    wanted = {symbol.upper() for symbol in universe}
+    return [member for member in members
+            if archive_symbol(member) in wanted or archive_symbol(member).rsplit('.', 1)[0] in wanted]
+
+
+def parse_archive_text(source) -> Tuple[str, Optional[str], pd.DatetimeIndex, np.ndarray]:
+    """
+    Parse one bulk archive text file in one read_csv pass
+
+    Lines are <TICKER>,<PER>,<DATE>,<TIME>,<OPEN>,<HIGH>,<LOW>,<CLOSE>,<VOL>,<OPENINT>.
+
+    Returns:
+    tuple: (ticker, resolution, naive Lean-timezone times, float64 (n, 5) OHLCV array);
+        resolution is None for periods Lean has no resolution for
+    """
+    df = pd.read_csv(source, usecols=range(9), dtype={0: str, 1: str, 2: np.int64, 3: np.int64})
+    if df.empty:
+        return '', None, pd.DatetimeIndex([]), np.empty((0, 5))
+    
+    ticker, period = df.iat[0, 0], df.iat[0, 1]
+    date, hhmmss = df.iloc[:, 2].to_numpy(), df.iloc[:, 3].to_numpy()
+    # YYYYMMDD and HHMMSS integers to datetime64 with array arithmetic (no string parsing)
+    days = (date // 10000 - 1970).astype('datetime64[Y]') + (date // 100 % 100 - 1).astype('timedelta64[M]')
+    seconds = hhmmss // 10000 * 3600 + hhmmss // 100 % 100 * 60 + hhmmss % 100
+    times = pd.DatetimeIndex(days.astype('datetime64[D]') + (date % 100 - 1).astype('timedelta64[D]')
+                             + seconds.astype('timedelta64[s]'))
+    if period != 'D':
+        # Intraday bars are stamped in Stooq's local time
+        times = times.tz_localize(STOOQ_ARCHIVE_TIMEZONE, ambiguous='NaT', nonexistent='NaT') \
+            .tz_convert(LEAN_TIMEZONE_EQUITY).tz_localize(None)
+    
+    ohlcv = df.iloc[:, 4:9].to_numpy(dtype='float64')
+    ohlcv[:, 4] = np.nan_to_num(ohlcv[:, 4])
+    return ticker.upper(), ARCHIVE_RESOLUTIONS.get(period), times, ohlcv
+
+
+def _import_archive_members(archive_path: str, members: List[str], start_date: Optional[datetime],
+                            end_date: Optional[datetime], output_path: str, output_format: str) -> Dict[str, int]:
+    """Worker: stream a group of members out of the archive and write each symbol, returns bars per symbol"""
+    written = {}
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in members:
+            try:
+                with archive.open(member) as f:
+                    ticker, resolution, times, ohlcv = parse_archive_text(f)
+            except Exception as e:
+                logger.warning(f"Error parsing {member}: {str(e)}")
+                continue
+            if resolution is None:
+                continue
+            
+            open_, high, low, close, volume = ohlcv.T
+            keep = (low <= open_) & (open_ <= high) & (low <= close) & (close <= high) & (volume >= 0) & ~times.isna()
+            if start_date is not None:
+                keep &= times >= pd.Timestamp(start_date).normalize()
+            if end_date is not None:
+                keep &= times < pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+            times, ohlcv = times[keep], ohlcv[keep]
+            if not len(times):
+                continue
+            
+            asset_type = archive_asset_type(member)
+            if output_format == 'parquet':
+                path = os.path.join(output_path, 'parquet', resolution, f"{ticker.lower()}.parquet")
+                ensure_directory_exists(os.path.dirname(path))
+                frame = pd.DataFrame(ohlcv, columns=['open', 'high', 'low', 'close', 'volume'])
+                frame.insert(0, 'time', times)
+                frame.to_parquet(path, index=False)
+            else:
+                lean_symbol = lean_name(ticker, asset_type)
+                folder = output_path if resolution == 'daily' else os.path.join(output_path, resolution)
+                # Same layout as download_stock_symbols and friends
+                csv_text = "Time,Open,High,Low,Close,Volume\n" + \
+                    create_lean_tradebar_csv_text(times, ohlcv, resolution, asset_type)
+                write_lean_zip_text(csv_text, os.path.join(folder, f"{lean_symbol.lower()}_{asset_type}_stooq.zip"),
+                                    f"{lean_symbol.lower()}_trade.csv")
+            written[ticker] = len(times)
+    return written
+
 class StooqDownloader:
     """
     Stooq data downloader for various financial instruments
@@ -452,6 +584,51 @@ class StooqDownloader:
                 logger.error(f"Error downloading {symbol}: {str(e)}")
                 continue
     
+    def import_archive(self, archive_path: str, universe: Optional[List[str]] = None,
+                       start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                       output_format: str = 'lean', workers: int = STOOQ_IMPORT_WORKERS) -> Dict[str, int]:
+        """
+        Import a Stooq bulk archive (e.g. d_us_txt.zip) from a local file instead of per-symbol requests
+        
+        Args:
+            archive_path: Path of the downloaded archive zip
+            universe: Tickers to import (AAPL.US or AAPL), None for the whole archive
+            start_date: First day to keep, None for the full history
+            end_date: Last day to keep
+            output_format: 'lean' for Lean zips in the Stooq data folder, 'parquet' for one
+                columnar file per symbol under data_path/parquet/<resolution>
+            workers: Processes parsing and writing members in parallel
+            
+        Returns:
+            Bars written per ticker
+        """
+        with zipfile.ZipFile(archive_path) as archive:
+            members = select_archive_members(archive.namelist(), universe)
+        logger.info(f"Importing {len(members)} symbols from {os.path.basename(archive_path)} with {workers} workers")
+        
+        tasks = [members[i:i + MEMBERS_PER_TASK] for i in range(0, len(members), MEMBERS_PER_TASK)]
+        imported = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_import_archive_members, archive_path, task, start_date, end_date,
+                                self.data_path, output_format)
+                for task in tasks
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Importing Stooq archive"):
+                try:
+                    imported.update(future.result())
+                except Exception as e:
+                    logger.error(f"Error importing from {os.path.basename(archive_path)}: {str(e)}")
+        
+        if universe is not None:
+            found = {symbol for ticker in imported for symbol in (ticker, ticker.rsplit('.', 1)[0])}
+            missing = [symbol for symbol in universe if symbol.upper() not in found]
+            if missing:
+                logger.warning(f"Not in archive or without data in range: {', '.join(missing)}")
+        
+        logger.info(f"Imported {sum(imported.values())} bars for {len(imported)} symbols")
+        return imported
+    
     def get_available_symbols(self, market: str = 'US') -> List[str]:
         """
         Get list of available symbols from Stooq
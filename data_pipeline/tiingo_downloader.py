@@ -7,23 +7,26 @@ import requests
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
-import time
 import os
-from typing import List, Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Any, Callable, Iterable
 from tqdm import tqdm
 import json
+from requests.adapters import HTTPAdapter
 
 import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
 from config import (
-    TIINGO_API_KEY, EQUITY_DATA_PATH, CRYPTO_DATA_PATH, LEAN_TIMEZONE_EQUITY, LEAN_TIME_FORMAT
+    TIINGO_API_KEY, EQUITY_DATA_PATH, CRYPTO_DATA_PATH, LEAN_TIMEZONE_EQUITY, LEAN_TIME_FORMAT,
+    TIINGO_RATE_LIMIT, TIINGO_WORKERS, TIINGO_BATCH_SIZE
 )
+from fundamentals_store import FundamentalsStore, record_rows
 from utils import (
     setup_logging, ensure_directory_exists, format_lean_date,
     create_lean_tradebar_csv, write_lean_zip_file, get_trading_days,
-    DataValidator
+    DataValidator, RateLimiter
 )
 
 logger = setup_logging()
@@ -39,13 +42,42 @@ class TiingoDownloader:
         
         self.api_key = TIINGO_API_KEY
         self.base_url = "https://api.tiingo.com/tiingo"
-        self.rate_limit_delay = 0.1  # Tiingo allows high rate limits
+        self.workers = TIINGO_WORKERS
+        # Requests per hour, shared by all worker threads
+        self.rate_limiter = RateLimiter(TIINGO_RATE_LIMIT, 60 * 60)
         
         self.session = requests.Session()
         self.session.headers.update({
             'Content-Type': 'application/json',
             'Authorization': f'Token {self.api_key}'
         })
+        # One pooled connection per worker, so parallel requests reuse connections
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount('https://', adapter)
+        self.fundamentals_store = FundamentalsStore()
+    
+    def _get(self, url: str, params: Optional[Dict] = None):
+        """Rate-limited GET returning the decoded JSON"""
+        self.rate_limiter.acquire()
+        response = self.session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        return response.json()
+    
+    def _run_parallel(self, fn: Callable, items: Iterable, desc: str) -> List:
+        """Call fn on each item on the worker pool, returning the non-empty results in completion order"""
+        items = list(items)
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(fn, item): item for item in items}
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error downloading {futures[future]}: {str(e)}")
+                    continue
+                if result:
+                    results.append(result)
+        return results
     
     def get_stock_data(self, symbol: str, start_date: datetime, end_date: datetime, frequency: str = 'daily') -> List[Dict]:
         """Get stock data from Tiingo"""
@@ -63,10 +95,7 @@ class TiingoDownloader:
                 'format': 'json'
             }
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url, params)
             
             if not data:
                 logger.warning(f"No data found for {symbol}")
@@ -87,87 +116,82 @@ class TiingoDownloader:
                     'volume': int(item['volume']) if item['volume'] else 0
                 })
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
             return bars
             
         except Exception as e:
             logger.error(f"Error getting stock data for {symbol}: {str(e)}")
             return []
     
-    def get_crypto_data(self, symbol: str, start_date: datetime, end_date: datetime, frequency: str = 'daily') -> List[Dict]:
-        """Get crypto data from Tiingo"""
+    def get_crypto_data_batch(self, symbols: List[str], start_date: datetime, end_date: datetime,
+                              frequency: str = 'daily') -> Dict[str, List[Dict]]:
+        """Get crypto data for several tickers in one request, keyed by lower-case ticker"""
         try:
             url = f"{self.base_url}/crypto/prices"
             
             params = {
-                'tickers': symbol,
+                'tickers': ','.join(symbols),
                 'startDate': start_date.strftime('%Y-%m-%d'),
                 'endDate': end_date.strftime('%Y-%m-%d'),
                 'resampleFreq': frequency
             }
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if not data or not data[0].get('priceData'):
-                logger.warning(f"No crypto data found for {symbol}")
-                return []
+            data = self._get(url, params)
             
             # Convert to our format
-            bars = []
-            for item in data[0]['priceData']:
-                timestamp = datetime.strptime(item['date'][:10], '%Y-%m-%d')
-                timestamp = timestamp.replace(tzinfo=pytz.timezone(LEAN_TIMEZONE_EQUITY))
-                
-                bars.append({
-                    'timestamp': timestamp,
-                    'open': float(item['open']),
-                    'high': float(item['high']),
-                    'low': float(item['low']),
-                    'close': float(item['close']),
-                    'volume': float(item['volume']) if item['volume'] else 0
-                })
-            
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            return bars
+            results = {}
+            for ticker_data in data or []:
+                bars = []
+                for item in ticker_data.get('priceData') or []:
+                    timestamp = datetime.strptime(item['date'][:10], '%Y-%m-%d')
+                    timestamp = timestamp.replace(tzinfo=pytz.timezone(LEAN_TIMEZONE_EQUITY))
+                    
+                    bars.append({
+                        'timestamp': timestamp,
+                        'open': float(item['open']),
+                        'high': float(item['high']),
+                        'low': float(item['low']),
+                        'close': float(item['close']),
+                        'volume': float(item['volume']) if item['volume'] else 0
+                    })
+                if bars:
+                    results[ticker_data['ticker'].lower()] = bars
+            
+            for symbol in symbols:
+                if symbol.lower() not in results:
+                    logger.warning(f"No crypto data found for {symbol}")
+            
+            return results
             
         except Exception as e:
-            logger.error(f"Error getting crypto data for {symbol}: {str(e)}")
-            return []
+            logger.error(f"Error getting crypto data for {', '.join(symbols)}: {str(e)}")
+            return {}
     
-    def get_forex_data(self, pair: str, start_date: datetime, end_date: datetime, frequency: str = 'daily') -> List[Dict]:
-        """Get forex data from Tiingo"""
+    def get_crypto_data(self, symbol: str, start_date: datetime, end_date: datetime, frequency: str = 'daily') -> List[Dict]:
+        """Get crypto data from Tiingo"""
+        return self.get_crypto_data_batch([symbol], start_date, end_date, frequency).get(symbol.lower(), [])
+    
+    def get_forex_data_batch(self, pairs: List[str], start_date: datetime, end_date: datetime,
+                             frequency: str = 'daily') -> Dict[str, List[Dict]]:
+        """Get forex data for several pairs in one request, keyed by lower-case pair"""
         try:
-            url = f"{self.base_url}/fx/{pair}/prices"
+            url = f"{self.base_url}/fx/prices"
             
             params = {
+                'tickers': ','.join(pairs),
                 'startDate': start_date.strftime('%Y-%m-%d'),
                 'endDate': end_date.strftime('%Y-%m-%d'),
                 'resampleFreq': frequency
             }
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url, params)
             
-            if not data:
-                logger.warning(f"No forex data found for {pair}")
-                return []
-            
-            # Convert to our format
-            bars = []
-            for item in data:
+            # Convert to our format; bars of all pairs come back in one list
+            results = {}
+            for item in data or []:
                 timestamp = datetime.strptime(item['date'][:10], '%Y-%m-%d')
                 timestamp = timestamp.replace(tzinfo=pytz.timezone(LEAN_TIMEZONE_EQUITY))
                 
-                bars.append({
+                results.setdefault(item['ticker'].lower(), []).append({
                     'timestamp': timestamp,
                     'open': float(item['open']),
                     'high': float(item['high']),
@@ -176,24 +200,26 @@ class TiingoDownloader:
                     'volume': 0  # Forex doesn't have volume
                 })
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
+            for pair in pairs:
+                if pair.lower() not in results:
+                    logger.warning(f"No forex data found for {pair}")
             
-            return bars
+            return results
             
         except Exception as e:
-            logger.error(f"Error getting forex data for {pair}: {str(e)}")
-            return []
+            logger.error(f"Error getting forex data for {', '.join(pairs)}: {str(e)}")
+            return {}
+    
+    def get_forex_data(self, pair: str, start_date: datetime, end_date: datetime, frequency: str = 'daily') -> List[Dict]:
+        """Get forex data from Tiingo"""
+        return self.get_forex_data_batch([pair], start_date, end_date, frequency).get(pair.lower(), [])
     
     def get_fundamentals(self, symbol: str) -> Dict:
         """Get fundamental data for a symbol"""
         try:
             url = f"{self.base_url}/fundamentals/{symbol}/statements"
             
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url)
             
             if not data:
                 logger.warning(f"No fundamentals found for {symbol}")
@@ -208,15 +234,25 @@ class TiingoDownloader:
                 'fundamentals': data
             }
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
             return fundamentals
             
         except Exception as e:
             logger.error(f"Error getting fundamentals for {symbol}: {str(e)}")
             return {}
     
+    def _fundamental_rows(self, symbol: str, statements: List[Dict]) -> List[Dict]:
+        """Fundamentals store rows from the statements endpoint's per-period dataCode/value lists"""
+        rows = []
+        for statement in statements or []:
+            if not isinstance(statement, dict) or not statement.get('date'):
+                continue
+            # quarter 0 is the fiscal year
+            period_type = 'annual' if statement.get('quarter') == 0 else 'quarterly'
+            record = {item['dataCode']: item.get('value')
+                      for section in (statement.get('statementData') or {}).values() for item in section}
+            rows += record_rows(symbol, 'tiingo', statement['date'], period_type, record)
+        return rows
+    
     def get_income_statement(self, symbol: str, period: str = 'annual', limit: int = 5) -> Dict:
         """Get income statement data for a symbol"""
         try:
@@ -227,10 +263,7 @@ class TiingoDownloader:
                 'limit': limit
             }
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url, params)
             
             if not data:
                 logger.warning(f"No income statement data found for {symbol}")
@@ -244,9 +277,6 @@ class TiingoDownloader:
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
             return income_statement
             
         except Exception as e:
@@ -263,10 +293,7 @@ class TiingoDownloader:
                 'limit': limit
             }
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url, params)
             
             if not data:
                 logger.warning(f"No balance sheet data found for {symbol}")
@@ -280,9 +307,6 @@ class TiingoDownloader:
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
             return balance_sheet
             
         except Exception as e:
@@ -299,10 +323,7 @@ class TiingoDownloader:
                 'limit': limit
             }
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url, params)
             
             if not data:
                 logger.warning(f"No cash flow data found for {symbol}")
@@ -316,9 +337,6 @@ class TiingoDownloader:
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
             return cash_flow
             
         except Exception as e:
@@ -330,10 +348,7 @@ class TiingoDownloader:
         try:
             url = f"{self.base_url}/options/{symbol}"
             
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url)
             
             if not data:
                 logger.warning(f"No options data found for {symbol}")
@@ -346,9 +361,6 @@ class TiingoDownloader:
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
             return options_data
             
         except Exception as e:
@@ -369,10 +381,7 @@ class TiingoDownloader:
                 'resampleFreq': frequency
             }
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url, params)
             
             if not data:
                 logger.warning(f"No bonds data found for {symbol}")
@@ -396,9 +405,6 @@ class TiingoDownloader:
                     'duration': 0.0  # Not available in basic data
                 })
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
             return bars
             
         except Exception as e:
@@ -488,10 +494,7 @@ class TiingoDownloader:
             if symbol:
                 params['tickers'] = symbol
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._get(url, params)
             
             if not data:
                 logger.warning("No news found")
@@ -511,107 +514,71 @@ class TiingoDownloader:
                     'tickers': item.get('tickers', [])
                 })
             
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
             return news_items
             
         except Exception as e:
             logger.error(f"Error getting news: {str(e)}")
             return []
     
+    def _save_bars(self, name: str, data: List[Dict], data_path: str, frequency: str, asset_type: str = 'equity') -> int:
+        """Clean bars and write them as one Lean zip, returns the number of bars written"""
+        # Clean and validate data
+        cleaned_data = DataValidator.clean_ohlcv_data(data)
+        
+        if not cleaned_data:
+            return 0
+        
+        # Create directory structure
+        ensure_directory_exists(data_path)
+        
+        # Save data
+        output_path = os.path.join(data_path, f"{name.lower()}.zip")
+        csv_filename = f"{name.lower()}_{frequency}_trade.csv"
+        
+        csv_content = create_lean_tradebar_csv(cleaned_data, name, cleaned_data[0]['timestamp'], frequency, asset_type)
+        
+        if csv_content:
+            write_lean_zip_file(csv_content, output_path, csv_filename)
+            logger.info(f"Saved {len(csv_content)} bars for {name}")
+        return len(csv_content)
+    
     def download_stock_symbols(self, symbols: List[str], start_date: datetime, end_date: datetime, frequency: str = 'daily'):
         """Download stock data for multiple symbols"""
         logger.info(f"Starting Tiingo stock download for {len(symbols)} symbols")
+        data_path = os.path.join(EQUITY_DATA_PATH, 'tiingo', 'stocks', frequency)
         
-        for symbol in tqdm(symbols, desc="Downloading Tiingo stocks"):
-            try:
-                data = self.get_stock_data(symbol, start_date, end_date, frequency)
-                
-                if data:
-                    # Clean and validate data
-                    cleaned_data = DataValidator.clean_ohlcv_data(data)
-                    
-                    if cleaned_data:
-                        # Create directory structure
-                        data_path = os.path.join(EQUITY_DATA_PATH, 'tiingo', 'stocks', frequency)
-                        ensure_directory_exists(data_path)
-                        
-                        # Save data
-                        output_path = os.path.join(data_path, f"{symbol.lower()}.zip")
-                        csv_filename = f"{symbol.lower()}_{frequency}_trade.csv"
-                        
-                        csv_content = create_lean_tradebar_csv(cleaned_data, symbol, cleaned_data[0]['timestamp'], frequency, 'equity')
-                        
-                        if csv_content:
-                            write_lean_zip_file(csv_content, output_path, csv_filename)
-                            logger.info(f"Saved {len(csv_content)} bars for {symbol}")
-                
-            except Exception as e:
-                logger.error(f"Error downloading {symbol}: {str(e)}")
-                continue
+        # The daily endpoint takes one ticker per call, so symbols run in parallel
+        def download_symbol(symbol):
+            data = self.get_stock_data(symbol, start_date, end_date, frequency)
+            return self._save_bars(symbol, data, data_path, frequency, 'equity') if data else 0
+        
+        self._run_parallel(download_symbol, symbols, "Downloading Tiingo stocks")
     
     def download_crypto_symbols(self, symbols: List[str], start_date: datetime, end_date: datetime, frequency: str = 'daily'):
         """Download crypto data for multiple symbols"""
         logger.info(f"Starting Tiingo crypto download for {len(symbols)} symbols")
+        data_path = os.path.join(CRYPTO_DATA_PATH, 'tiingo', frequency)
+        batches = [tuple(symbols[i:i + TIINGO_BATCH_SIZE]) for i in range(0, len(symbols), TIINGO_BATCH_SIZE)]
         
-        for symbol in tqdm(symbols, desc="Downloading Tiingo crypto"):
-            try:
-                data = self.get_crypto_data(symbol, start_date, end_date, frequency)
-                
-                if data:
-                    # Clean and validate data
-                    cleaned_data = DataValidator.clean_ohlcv_data(data)
-                    
-                    if cleaned_data:
-                        # Create directory structure
-                        data_path = os.path.join(CRYPTO_DATA_PATH, 'tiingo', frequency)
-                        ensure_directory_exists(data_path)
-                        
-                        # Save data
-                        output_path = os.path.join(data_path, f"{symbol.lower()}.zip")
-                        csv_filename = f"{symbol.lower()}_{frequency}_trade.csv"
-                        
-                        csv_content = create_lean_tradebar_csv(cleaned_data, symbol, cleaned_data[0]['timestamp'], frequency, 'crypto')
-                        
-                        if csv_content:
-                            write_lean_zip_file(csv_content, output_path, csv_filename)
-                            logger.info(f"Saved {len(csv_content)} bars for {symbol}")
-                
-            except Exception as e:
-                logger.error(f"Error downloading {symbol}: {str(e)}")
-                continue
+        def download_batch(batch):
+            data = self.get_crypto_data_batch(list(batch), start_date, end_date, frequency)
+            return sum(self._save_bars(symbol, data[symbol.lower()], data_path, frequency, 'crypto')
+                       for symbol in batch if symbol.lower() in data)
+        
+        self._run_parallel(download_batch, batches, "Downloading Tiingo crypto")
     
     def download_forex_pairs(self, pairs: List[str], start_date: datetime, end_date: datetime, frequency: str = 'daily'):
         """Download forex data for multiple pairs"""
         logger.info(f"Starting Tiingo forex download for {len(pairs)} pairs")
+        data_path = os.path.join(EQUITY_DATA_PATH, 'forex', 'tiingo', frequency)
+        batches = [tuple(pairs[i:i + TIINGO_BATCH_SIZE]) for i in range(0, len(pairs), TIINGO_BATCH_SIZE)]
         
-        for pair in tqdm(pairs, desc="Downloading Tiingo forex"):
-            try:
-                data = self.get_forex_data(pair, start_date, end_date, frequency)
-                
-                if data:
-                    # Clean and validate data
-                    cleaned_data = DataValidator.clean_ohlcv_data(data)
-                    
-                    if cleaned_data:
-                        # Create directory structure
-                        data_path = os.path.join(EQUITY_DATA_PATH, 'forex', 'tiingo', frequency)
-                        ensure_directory_exists(data_path)
-                        
-                        # Save data
-                        output_path = os.path.join(data_path, f"{pair.lower()}.zip")
-                        csv_filename = f"{pair.lower()}_{frequency}_trade.csv"
-                        
-                        csv_content = create_lean_tradebar_csv(cleaned_data, pair, cleaned_data[0]['timestamp'], frequency, 'forex')
-                        
-                        if csv_content:
-                            write_lean_zip_file(csv_content, output_path, csv_filename)
-                            logger.info(f"Saved {len(csv_content)} bars for {pair}")
-                
-            except Exception as e:
-                logger.error(f"Error downloading {pair}: {str(e)}")
-                continue
+        def download_batch(batch):
+            data = self.get_forex_data_batch(list(batch), start_date, end_date, frequency)
+            return sum(self._save_bars(pair, data[pair.lower()], data_path, frequency, 'forex')
+                       for pair in batch if pair.lower() in data)
+        
+        self._run_parallel(download_batch, batches, "Downloading Tiingo forex")
     
     def download_fundamentals(self, symbols: List[str]):
         """Download fundamental data for multiple symbols"""
@@ -641,6 +608,9 @@ class TiingoDownloader:
                 json.dump(fundamentals_data, f, indent=2, default=str)
             
             logger.info(f"Saved fundamentals for {len(fundamentals_data)} symbols")
+            
+            self.fundamentals_store.upsert([row for fundamentals in fundamentals_data for row in
+                                            self._fundamental_rows(fundamentals['symbol'], fundamentals['fundamentals'])])
     
     def download_options_data(self, symbols: List[str]):
         """Download options data for multiple symbols"""
@@ -708,64 +678,47 @@ class TiingoDownloader:
         """Download comprehensive stock data including OHLCV, fundamentals, and quality assessment"""
         logger.info(f"Starting comprehensive Tiingo stock download for {len(symbols)} symbols")
         
-        results = []
+        data_path = os.path.join(EQUITY_DATA_PATH, 'tiingo', 'comprehensive', frequency)
+        store_rows = []
         
-        for symbol in tqdm(symbols, desc="Downloading comprehensive stock data"):
-            try:
-                # Get OHLCV data
-                ohlcv_data = self.get_stock_data(symbol, start_date, end_date, frequency)
+        def download_symbol(symbol):
+            # Get OHLCV data
+            ohlcv_data = self.get_stock_data(symbol, start_date, end_date, frequency)
+            ohlcv_records = self._save_bars(symbol, ohlcv_data, data_path, frequency) if ohlcv_data else 0
+            if not ohlcv_records:
+                return None
+            
+            # Get fundamentals if requested
+            fundamentals_data = {}
+            
+            if include_fundamentals:
+                fundamentals_data = self.get_comprehensive_fundamentals(symbol)
+            
+            # Save fundamentals data separately
+            if fundamentals_data:
+                fundamentals_path = os.path.join(EQUITY_DATA_PATH, 'fundamentals', 'tiingo', 'comprehensive')
+                ensure_directory_exists(fundamentals_path)
                 
-                if ohlcv_data:
-                    # Clean and validate data
-                    cleaned_data = DataValidator.clean_ohlcv_data(ohlcv_data)
-                    
-                    if cleaned_data:
-                        # Create directory structure
-                        data_path = os.path.join(EQUITY_DATA_PATH, 'tiingo', 'comprehensive', frequency)
-                        ensure_directory_exists(data_path)
-                        
-                        # Save OHLCV data
-                        output_path = os.path.join(data_path, f"{symbol.lower()}.zip")
-                        csv_filename = f"{symbol.lower()}_{frequency}_trade.csv"
-                        
-                        csv_content = create_lean_tradebar_csv(cleaned_data, symbol, cleaned_data[0]['timestamp'], frequency)
-                        
-                        if csv_content:
-                            write_lean_zip_file(csv_content, output_path, csv_filename)
-                            
-                            # Get fundamentals if requested
-                            fundamentals_data = {}
-                            quality_score = None
-                            
-                            if include_fundamentals:
-                                fundamentals_data = self.get_comprehensive_fundamentals(symbol)
-                            
-                            # Store results
-                            result = {
-                                'symbol': symbol,
-                                'ohlcv_records': len(csv_content),
-                                'fundamentals_available': bool(fundamentals_data),
-                                'quality_score': None,
-                                'timestamp': datetime.now().isoformat()
-                            }
-                            
-                            results.append(result)
-                            
-                            # Save fundamentals data separately
-                            if fundamentals_data:
-                                fundamentals_path = os.path.join(EQUITY_DATA_PATH, 'fundamentals', 'tiingo', 'comprehensive')
-                                ensure_directory_exists(fundamentals_path)
-                                
-                                fundamentals_file = os.path.join(fundamentals_path, f"{symbol.lower()}_fundamentals.json")
-                                
-                                with open(fundamentals_file, 'w') as f:
-                                    json.dump(fundamentals_data, f, indent=2, default=str)
-                            
-                            logger.info(f"Saved comprehensive data for {symbol}: {len(csv_content)} records")
+                fundamentals_file = os.path.join(fundamentals_path, f"{symbol.lower()}_fundamentals.json")
+                
+                with open(fundamentals_file, 'w') as f:
+                    json.dump(fundamentals_data, f, indent=2, default=str)
+                
+                basic_fundamentals = fundamentals_data.get('basic_fundamentals') or {}
+                store_rows.extend(self._fundamental_rows(symbol, basic_fundamentals.get('fundamentals')))
             
-            except Exception as e:
-                logger.error(f"Error downloading comprehensive data for {symbol}: {str(e)}")
-                continue
+            logger.info(f"Saved comprehensive data for {symbol}: {ohlcv_records} records")
+            return {
+                'symbol': symbol,
+                'ohlcv_records': ohlcv_records,
+                'fundamentals_available': bool(fundamentals_data),
+                'quality_score': None,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        results = self._run_parallel(download_symbol, symbols, "Downloading comprehensive stock data")
+        results.sort(key=lambda result: symbols.index(result['symbol']))
+        self.fundamentals_store.upsert(store_rows)
         
         # Save summary report
         if results:
@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import alpha_vantage_downloader
+from alpha_vantage_downloader import AlphaVantageDownloader, RequestBudget, ResponseCache, CLOSED_MONTH_TTL
+
+DAY = 24 * 60 * 60
+
+
+def daily_response(dates):
+    """TIME_SERIES_DAILY payload for the dates, newest first like the API"""
+    rows = {date: {'1. open': '10.0', '2. high': '11.0', '3. low': '9.0', '4. close': '10.5', '5. volume': '100'}
+            for date in sorted(dates, reverse=True)}
+    return {'Meta Data': {}, 'Time Series (Daily)': rows}
+
+
+def weekdays(start, end):
+    return [day.strftime('%Y-%m-%d') for day in
+            (start + timedelta(days=i) for i in range((end - start).days + 1)) if day.weekday() < 5]
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.path)
+        self.params = {'function': 'TIME_SERIES_DAILY', 'symbol': 'IBM', 'outputsize': 'full'}
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_round_trip_ignores_api_key(self):
+        self.cache.put(dict(self.params, apikey='one'), {'x': 1})
+        self.assertEqual(self.cache.get(dict(self.params, apikey='two')), {'x': 1})
+        self.assertIsNone(self.cache.get(dict(self.params, symbol='MSFT')))
+
+    def test_stale_entries_need_allow_stale(self):
+        self.cache.put(self.params, {'x': 1})
+        self.assertTrue(self.cache.is_fresh(self.params))
+        with mock.patch('time.time', return_value=time.time() + DAY):
+            self.assertFalse(self.cache.is_fresh(self.params))
+            self.assertIsNone(self.cache.get(self.params))
+            self.assertEqual(self.cache.get(self.params, allow_stale=True), {'x': 1})
+
+    def test_closed_months_stay_fresh(self):
+        params = {'function': 'TIME_SERIES_INTRADAY', 'symbol': 'IBM', 'interval': '1min', 'month': '2020-01'}
+        self.cache.put(params, {'x': 1})
+        with mock.patch('time.time', return_value=time.time() + CLOSED_MONTH_TTL - DAY):
+            self.assertTrue(self.cache.is_fresh(params))
+
+
+class TestRequestBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.path, 'budget.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_daily_budget_is_shared_between_runs(self):
+        budget = RequestBudget(per_minute=100, per_day=3, state_path=self.state_path)
+        self.assertTrue(budget.acquire())
+        self.assertTrue(budget.acquire())
+
+        budget = RequestBudget(per_minute=100, per_day=3, state_path=self.state_path)
+        self.assertEqual(budget.remaining_today(), 1)
+        self.assertTrue(budget.acquire())
+        self.assertFalse(budget.acquire())
+        self.assertEqual(budget.remaining_today(), 0)
+
+    def test_minute_window_waits_for_the_oldest_request(self):
+        clock = [1000.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        budget = RequestBudget(per_minute=2, per_day=10, state_path=self.state_path)
+        with mock.patch('time.monotonic', side_effect=lambda: clock[0]), mock.patch('time.sleep', side_effect=sleep):
+            self.assertTrue(budget.acquire())
+            clock[0] += 10
+            self.assertTrue(budget.acquire())
+            self.assertTrue(budget.acquire())
+        self.assertEqual(sleeps, [50.0])
+
+    def test_budget_resets_on_a_new_utc_day(self):
+        yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
+        with open(self.state_path, 'w') as f:
+            json.dump({'date': yesterday, 'count': 3}, f)
+        budget = RequestBudget(per_minute=100, per_day=3, state_path=self.state_path)
+        self.assertEqual(budget.remaining_today(), 3)
+
+
+class TestAlphaVantageDownloader(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        with mock.patch.object(alpha_vantage_downloader, 'ALPHA_VANTAGE_API_KEY', 'test'):
+            self.downloader = AlphaVantageDownloader()
+        self.downloader.cache = ResponseCache(os.path.join(self.path, 'cache'))
+        self.downloader.budget = RequestBudget(per_minute=100, per_day=3,
+                                               state_path=os.path.join(self.path, 'budget.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_plan_requests(self):
+        fresh = {'function': 'OVERVIEW', 'symbol': 'IBM'}
+        self.downloader.cache.put(fresh, {'Symbol': 'IBM'})
+        groups = {
+            'IBM': [fresh],
+            'MSFT': [{'function': 'OVERVIEW', 'symbol': 'MSFT'}, {'function': 'EARNINGS', 'symbol': 'MSFT'}],
+            'AAPL': [{'function': 'OVERVIEW', 'symbol': 'AAPL'}, {'function': 'EARNINGS', 'symbol': 'AAPL'}],
+            'KO': [fresh, {'function': 'EARNINGS', 'symbol': 'KO'}],
+        }
+        # Three requests left today: MSFT takes two, AAPL needs two more and waits, KO needs one
+        self.assertEqual(self.downloader.plan_requests(groups),
+                         {'cached': ['IBM'], 'scheduled': ['MSFT', 'KO'], 'deferred': ['AAPL']})
+
+    def test_stock_requests(self):
+        now = datetime.now()
+        requests_for = self.downloader._stock_requests
+        self.assertEqual(requests_for('IBM', 'daily'), [self.downloader._stock_params('IBM', 'daily')])
+        self.assertEqual(requests_for('IBM', 'daily', now - timedelta(days=30))[0]['outputsize'], 'compact')
+        self.assertEqual(requests_for('IBM', 'daily', now - timedelta(days=400))[0]['outputsize'], 'full')
+
+        self.assertEqual(requests_for('IBM', 'minute', now - timedelta(minutes=30))[0]['outputsize'], 'compact')
+        months = requests_for('IBM', 'minute', datetime(2024, 1, 15), datetime(2024, 3, 2))
+        self.assertEqual([params['month'] for params in months], ['2024-01', '2024-02', '2024-03'])
+
+    def test_stock_requests_update_a_cached_history(self):
+        now = datetime.now()
+        full = self.downloader._stock_params('IBM', 'daily')
+        with mock.patch('time.time', return_value=time.time() - 2 * DAY):
+            self.downloader.cache.put(full, daily_response(weekdays(now - timedelta(days=400), now - timedelta(days=3))))
+        # A year of history is cached, so only the last days are asked for
+        requests = self.downloader._stock_requests('IBM', 'daily', now - timedelta(days=400))
+        self.assertEqual(requests, [dict(full, outputsize='compact')])
+
+    def test_get_stock_frame_folds_compact_update_into_cache(self):
+        now = datetime.now()
+        start = now - timedelta(days=400)
+        old_days = weekdays(start, now - timedelta(days=10))
+        new_days = weekdays(now - timedelta(days=15), now)
+        full = self.downloader._stock_params('IBM', 'daily')
+        with mock.patch('time.time', return_value=time.time() - 2 * DAY):
+            self.downloader.cache.put(full, daily_response(old_days))
+
+        response = mock.Mock()
+        response.json.return_value = daily_response(new_days)
+        with mock.patch('alpha_vantage_downloader.requests.get', return_value=response) as get:
+            df = self.downloader.get_stock_frame('IBM', 'daily', start.replace(hour=0, minute=0, second=0, microsecond=0))
+            self.assertEqual(get.call_count, 1)
+            self.assertEqual(get.call_args.kwargs['params']['outputsize'], 'compact')
+
+            self.assertEqual(list(df.index.strftime('%Y-%m-%d')), sorted(set(old_days) | set(new_days)))
+            self.assertEqual(list(df.columns), ['open', 'high', 'low', 'close', 'volume'])
+            cached = self.downloader.cache.get(full)
+            self.assertEqual(set(cached['Time Series (Daily)']), set(old_days) | set(new_days))
+
+            # The merged history is fresh now, a second read is served from the cache
+            again = self.downloader.get_stock_frame('IBM', 'daily')
+            self.assertEqual(get.call_count, 1)
+            self.assertEqual(len(again), len(df))
+
+    def test_get_stock_frame_without_data(self):
+        response = mock.Mock()
+        response.json.return_value = {'Error Message': 'Invalid API call'}
+        with mock.patch('alpha_vantage_downloader.requests.get', return_value=response):
+            df = self.downloader.get_stock_frame('NOPE', 'daily')
+        self.assertTrue(df.empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
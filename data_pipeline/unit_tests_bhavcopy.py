@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from datetime import datetime
+from bhavcopy import BhavcopyIngestor, bhavcopy_filenames
+
+NSE_LEGACY = "SYMBOL,SERIES,OPEN,HIGH,LOW,CLOSE,LAST,PREVCLOSE,TOTTRDQTY,TOTTRDVAL,TIMESTAMP,TOTALTRADES,ISIN,\n"
+NSE_UDIFF = "TradDt,BizDt,Sgmt,Src,FinInstrmTp,FinInstrmId,ISIN,TckrSymb,SctySrs,OpnPric,HghPric,LwPric,ClsPric,TtlTradgVol\n"
+BSE_LEGACY = "SC_CODE,SC_NAME,SC_GROUP,SC_TYPE,OPEN,HIGH,LOW,CLOSE,LAST,PREVCLOSE,NO_TRADES,NO_OF_SHRS,NET_TURNOV,TDCLOINDI\n"
+BSE_UDIFF = NSE_UDIFF
+
+# Wednesday 3 July 2024 to Tuesday 9 July 2024, with no files on Thursday 4 July (a holiday)
+START, END = datetime(2024, 7, 3), datetime(2024, 7, 9)
+DAYS = [datetime(2024, 7, 3), datetime(2024, 7, 5), datetime(2024, 7, 8), datetime(2024, 7, 9)]
+
+
+def nse_rows(date, price):
+    if date < datetime(2024, 7, 8):
+        return NSE_LEGACY + (
+            f"RELIANCE,EQ,{price},{price + 10},{price - 10},{price + 5},0,0,1000,0,{date:%d-%b-%Y},0,INE002A01018,\n"
+            f"RELIANCE,N1,{price},{price},{price},{price},0,0,5,0,{date:%d-%b-%Y},0,INE002A07XXX,\n"
+        )
+    day = f"{date:%Y-%m-%d}"
+    return NSE_UDIFF + (
+        f"{day},{day},CM,NSE,STK,2885,INE002A01018,RELIANCE,EQ,{price},{price + 10},{price - 10},{price + 5},1000\n"
+        f"{day},{day},CM,NSE,STK,9999,INE002A07XXX,RELIANCE,N1,{price},{price},{price},{price},5\n"
+    )
+
+
+def bse_rows(date, price):
+    if date < datetime(2024, 7, 8):
+        return BSE_LEGACY + (
+            f"500325,RELIANCE IND.,A ,Q,{price},{price + 10},{price - 10},{price + 5},0,0,0,2000,0,\n"
+            f"959999,RIL 8.5% NCD,F ,D,{price},{price},{price},{price},0,0,0,5,0,\n"
+        )
+    day = f"{date:%Y-%m-%d}"
+    return BSE_UDIFF + (
+        f"{day},{day},CM,BSE,STK,500325,INE002A01018,RELIANCE,A,{price},{price + 10},{price - 10},{price + 5},2000\n"
+        f"{day},{day},CM,BSE,STK,959999,INE002A07XXX,RIL85,F,{price},{price},{price},{price},5\n"
+    )
+
+
+def write_bhavcopy(directory, filename, text):
+    path = os.path.join(directory, filename)
+    if filename.lower().endswith('.zip'):
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr(filename[:-4], text)
+    else:
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+def read_zip(path):
+    with zipfile.ZipFile(path) as archive:
+        return archive.namelist(), archive.read(archive.namelist()[0]).decode().splitlines()
+
+
+class TestBhavcopyIngestor(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.source = os.path.join(self.path, 'source')
+        self.output = os.path.join(self.path, 'output')
+        os.makedirs(self.source)
+        for i, date in enumerate(DAYS):
+            price = 100 + 10 * i
+            # The layout in use that day is the first candidate name
+            write_bhavcopy(self.source, bhavcopy_filenames('nse', date)[0], nse_rows(date, price))
+            write_bhavcopy(self.source, bhavcopy_filenames('bse', date)[0], bse_rows(date, price))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def ingest(self, exchange, **kwargs):
+        ingestor = BhavcopyIngestor(exchange, archive_path=os.path.join(self.path, 'archive'), workers=2)
+        return ingestor.ingest(START, END, self.output, source=self.source, **kwargs)
+
+    def expected_rows(self, volume):
+        return [f"{date:%Y%m%d} 00:00,{p * 10000},{(p + 10) * 10000},{(p - 10) * 10000},{(p + 5) * 10000},{volume}"
+                for date, p in zip(DAYS, [100, 110, 120, 130])]
+
+    def test_nse_legacy_and_udiff_give_one_series(self):
+        self.assertEqual(self.ingest('nse'), {'RELIANCE': 4})
+
+        names, rows = read_zip(os.path.join(self.output, 'reliance.zip'))
+        self.assertEqual(names, ['reliance_daily_trade.csv'])
+        self.assertEqual(rows, self.expected_rows(1000))
+
+    def test_bse_scrip_codes_map_to_tickers(self):
+        self.assertEqual(self.ingest('bse'), {'RELIANCE': 4})
+
+        # Same file name download_equity_symbols writes, legacy days included
+        names, rows = read_zip(os.path.join(self.output, 'reliance.zip'))
+        self.assertEqual(names, ['reliance_daily_trade.csv'])
+        self.assertEqual(rows, self.expected_rows(2000))
+        self.assertFalse(os.path.exists(os.path.join(self.output, '500325.zip')))
+
+    def test_series_filter_and_symbols(self):
+        written = self.ingest('bse', series=['F', 'D'], symbols=['959999'])
+        self.assertEqual(written, {'RIL85': 4})
+        _, rows = read_zip(os.path.join(self.output, 'ril85.zip'))
+        self.assertEqual([row.split(',')[0] for row in rows],
+                         ['20240703 00:00', '20240705 00:00', '20240708 00:00', '20240709 00:00'])
+
+    def test_legacy_only_range_uses_reference_udiff_file(self):
+        ingestor = BhavcopyIngestor('bse', archive_path=os.path.join(self.path, 'archive'), workers=2)
+        written = ingestor.ingest(START, datetime(2024, 7, 5), self.output, source=self.source)
+        self.assertEqual(written, {'RELIANCE': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
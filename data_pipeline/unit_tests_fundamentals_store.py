@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from fundamentals_store import FundamentalsStore, record_rows, statement_rows, FILING_LAG_DAYS
+
+
+class TestFundamentalsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = FundamentalsStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_record_rows_default_as_of_lags_the_period(self):
+        rows = record_rows('ibm', 'alphavantage', '2024-03-31', 'quarterly', {'eps': '1.5', 'currency': 'USD'})
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['symbol'], 'IBM')
+        self.assertEqual(rows[0]['as_of'], pd.Timestamp('2024-03-31') + pd.Timedelta(days=FILING_LAG_DAYS['quarterly']))
+        snapshot = record_rows('IBM', 'yahoo', '2024-05-01', 'snapshot', {'pe_ratio': 20})
+        self.assertEqual(snapshot[0]['as_of'], pd.Timestamp('2024-05-01'))
+
+    def test_statement_rows_use_reported_dates(self):
+        reports = [{'fiscal_date_ending': '2024-03-31', 'reported_date': '2024-04-24', 'eps': 1.5},
+                   {'fiscal_date_ending': '2023-12-31', 'eps': 2.0},
+                   {'fiscal_date_ending': '2023-09-30', 'eps': 1.2}]
+        rows = statement_rows('IBM', 'alphavantage', reports, 'quarterly', reported_key='reported_date',
+                              reported_dates={'2023-12-31': '2024-01-24'})
+        self.assertEqual([row['as_of'] for row in rows],
+                         [pd.Timestamp('2024-04-24'), pd.Timestamp('2024-01-24'), pd.Timestamp('2023-11-14')])
+        self.assertEqual({row['field'] for row in rows}, {'eps'})
+
+    def test_upsert_replaces_rows_and_persists(self):
+        self.store.upsert(record_rows('IBM', 'alphavantage', '2024-03-31', 'quarterly', {'eps': 1.5, 'revenue': 100}))
+        self.store.upsert(record_rows('IBM', 'alphavantage', '2024-03-31', 'quarterly', {'eps': 1.6}))
+
+        reopened = FundamentalsStore(self.path)
+        self.assertEqual(reopened.sources(), ['alphavantage'])
+        df = reopened.query(['eps'])
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df['value'].iloc[0], 1.6)
+        self.assertEqual(len(reopened.query(symbols=['ibm'])), 2)
+
+    def test_cross_section(self):
+        self.store.upsert(
+            record_rows('IBM', 'alphavantage', '2024-03-31', 'quarterly', {'eps': 1.5}, as_of='2024-04-24') +
+            record_rows('IBM', 'alphavantage', '2024-06-30', 'quarterly', {'eps': 1.7}, as_of='2024-07-24') +
+            record_rows('MSFT', 'alphavantage', '2024-03-31', 'quarterly', {'eps': 2.9}, as_of='2024-04-25') +
+            # Same period from a second source that reported earlier
+            record_rows('MSFT', 'tiingo', '2024-03-31', 'quarterly', {'eps': 3.0}, as_of='2024-04-20')
+        )
+        latest = self.store.cross_section('eps', sources=['alphavantage', 'tiingo'])
+        self.assertEqual(latest.to_dict(), {'IBM': 1.7, 'MSFT': 2.9})
+
+        # Before IBM's second quarter was reported, and before alphavantage had MSFT
+        self.assertEqual(self.store.cross_section('eps', as_of='2024-05-01', sources=['alphavantage', 'tiingo']).to_dict(),
+                         {'IBM': 1.5, 'MSFT': 2.9})
+        self.assertEqual(self.store.cross_section('eps', as_of='2024-04-22', sources=['alphavantage', 'tiingo']).to_dict(),
+                         {'MSFT': 3.0})
+        self.assertEqual(self.store.cross_section('eps', sources=['tiingo', 'alphavantage']).to_dict(),
+                         {'IBM': 1.7, 'MSFT': 3.0})
+        self.assertTrue(self.store.cross_section('eps', as_of='2024-01-01').empty)
+
+    def test_history(self):
+        self.store.upsert(record_rows('IBM', 'alphavantage', '2024-06-30', 'quarterly', {'eps': 1.7}) +
+                          record_rows('IBM', 'alphavantage', '2024-03-31', 'quarterly', {'eps': 1.5}) +
+                          record_rows('IBM', 'tiingo', '2024-03-31', 'quarterly', {'eps': 1.4}))
+        self.assertEqual(self.store.history('IBM', 'eps', 'alphavantage').to_dict(),
+                         {'2024-03-31': 1.5, '2024-06-30': 1.7})
+        self.assertEqual(list(self.store.history('IBM', 'eps').index), ['2024-03-31', '2024-06-30'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+import investing_com_downloader
+from investing_com_downloader import InstrumentCache, InvestingComDownloader, find_instrument
+
+# Rows in the layout of investpy's bundled resources/*.csv listings
+STOCKS = pd.read_csv(io.StringIO(
+    "country,name,full_name,tag,isin,id,currency,symbol\n"
+    "united states,Apple,Apple Inc,apple-computer-inc,US0378331005,6408,USD,AAPL\n"
+    "mexico,Apple,Apple Inc,apple-computer-inc?cid=32278,US0378331005,32278,MXN,AAPL\n"
+), keep_default_na=False)
+COMMODITIES = pd.read_csv(io.StringIO(
+    "title,country,id,name,full_name,tag,currency,group\n"
+    "Real Time Streaming Futures Quotes,,8830,Gold,Gold Futures,gold,USD,metals\n"
+    "Real Time Streaming Futures Quotes,,8849,Crude Oil WTI,Crude Oil WTI Futures,crude-oil,USD,energy\n"
+), keep_default_na=False)
+APPLE = {'id_': 6408, 'name': 'Apple', 'symbol': 'AAPL', 'country': 'united states',
+         'tag': 'apple-computer-inc', 'pair_type': 'stocks', 'exchange': None}
+
+
+class TestInstrumentLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.path, 'cache', 'instruments.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_find_instrument_matches_exactly(self):
+        self.assertEqual(find_instrument(STOCKS, 'stock', 'aapl', 'United States'), APPLE)
+        self.assertEqual(find_instrument(STOCKS, 'stock', 'AAPL', 'Mexico')['id_'], 32278)
+        self.assertIsNone(find_instrument(STOCKS, 'stock', 'AAP', 'United States'))
+
+        gold = find_instrument(COMMODITIES, 'commodity', 'Gold')
+        self.assertEqual((gold['id_'], gold['name'], gold['pair_type']), (8830, 'Gold Futures', 'commodities'))
+        # No fuzzy match: the default CRUDE_OIL name is left to investpy's by-name getter
+        self.assertIsNone(find_instrument(COMMODITIES, 'commodity', 'CRUDE_OIL'))
+
+    def test_instrument_cache_round_trip(self):
+        cache = InstrumentCache(self.cache_path)
+        self.assertIsNone(cache.get('stock', 'AAPL', 'United States'))
+        cache.put('stock', 'AAPL', 'United States', APPLE)
+
+        reopened = InstrumentCache(self.cache_path)
+        self.assertEqual(reopened.get('stock', 'aapl', 'united states'), APPLE)
+        self.assertIsNone(reopened.get('stock', 'AAPL', 'Mexico'))
+        self.assertEqual(os.listdir(os.path.dirname(self.cache_path)), ['instruments.json'])
+
+    def test_cache_hit_skips_the_lookup(self):
+        with mock.patch.object(investing_com_downloader, 'INVESTPY_AVAILABLE', True), \
+                mock.patch.object(investing_com_downloader, 'INVESTING_DATA_PATH', self.path):
+            downloader = InvestingComDownloader()
+        downloader.instruments = InstrumentCache(self.cache_path)
+
+        with mock.patch.object(downloader, '_listing', return_value=STOCKS) as listing:
+            self.assertEqual(downloader._resolve_instrument('stock', 'AAPL', 'United States'), APPLE)
+            self.assertEqual(listing.call_count, 1)
+            self.assertEqual(downloader._resolve_instrument('stock', 'AAPL', 'United States'), APPLE)
+            self.assertEqual(listing.call_count, 1)
+            # Names without an exact match are not cached
+            self.assertIsNone(downloader._resolve_instrument('stock', 'MISSING', 'United States'))
+            self.assertIsNone(downloader.instruments.get('stock', 'MISSING', 'United States'))
+
+        self.assertEqual(InstrumentCache(self.cache_path).get('stock', 'AAPL', 'United States'), APPLE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from datetime import datetime
+from unittest import mock
+import pandas as pd
+import stooq_downloader
+from stooq_downloader import StooqDownloader, lean_name, parse_archive_text
+
+HEADER = "<TICKER>,<PER>,<DATE>,<TIME>,<OPEN>,<HIGH>,<LOW>,<CLOSE>,<VOL>,<OPENINT>\n"
+DAILY = HEADER + (
+    "AAPL.US,D,20240102,000000,187.15,188.44,183.885,185.64,82488674,0\n"
+    "AAPL.US,D,20240103,000000,184.22,185.88,183.43,184.25,58414460,0\n"
+    "AAPL.US,D,20240104,000000,182.15,183.0872,180.88,181.91,71983570,0\n"
+)
+# 16:00 and 17:00 Warsaw (CET) are 10:00 and 11:00 in New York
+HOURLY = HEADER + (
+    "MSFT.US,60,20240102,160000,373.86,375.9,372.5,374.2,1000,0\n"
+    "MSFT.US,60,20240102,170000,374.2,374.9,370.1,371.0,2000,0\n"
+)
+
+
+def read_zip(path):
+    with zipfile.ZipFile(path) as archive:
+        return archive.namelist(), archive.read(archive.namelist()[0]).decode().splitlines()
+
+
+class TestStooqArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.archive_path = os.path.join(self.path, 'd_us_txt.zip')
+        with zipfile.ZipFile(self.archive_path, 'w') as archive:
+            archive.writestr('data/daily/us/nasdaq stocks/1/aapl.us.txt', DAILY)
+            archive.writestr('data/hourly/us/nasdaq stocks/2/msft.us.txt', HOURLY)
+            archive.writestr('data/daily/us/nasdaq stocks/1/readme.csv', 'not a symbol')
+        with mock.patch.object(stooq_downloader, 'STOOQ_DATA_PATH', os.path.join(self.path, 'stooq')):
+            self.downloader = StooqDownloader()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_parse_archive_text_daily(self):
+        ticker, resolution, times, ohlcv = parse_archive_text(io.StringIO(DAILY))
+        self.assertEqual(ticker, 'AAPL.US')
+        self.assertEqual(resolution, 'daily')
+        self.assertEqual(list(times), list(pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04'])))
+        self.assertEqual(ohlcv.shape, (3, 5))
+        self.assertEqual(list(ohlcv[0]), [187.15, 188.44, 183.885, 185.64, 82488674])
+
+    def test_parse_archive_text_hourly_converts_to_new_york(self):
+        ticker, resolution, times, _ = parse_archive_text(io.StringIO(HOURLY))
+        self.assertEqual(ticker, 'MSFT.US')
+        self.assertEqual(resolution, 'hour')
+        self.assertEqual(list(times), list(pd.to_datetime(['2024-01-02 10:00', '2024-01-02 11:00'])))
+
+    def test_parse_archive_text_unknown_period(self):
+        _, resolution, _, _ = parse_archive_text(io.StringIO(HEADER + "AAPL.US,5,20240102,160500,1,1,1,1,1,0\n"))
+        self.assertIsNone(resolution)
+
+    def test_lean_name_drops_market_suffix(self):
+        self.assertEqual(lean_name('AAPL.US', 'equity'), 'AAPL_EQUITY')
+        self.assertEqual(lean_name('^SPX', 'index'), 'SPX_INDEX')
+
+    def test_import_archive_writes_lean_files(self):
+        imported = self.downloader.import_archive(self.archive_path, start_date=datetime(2024, 1, 3), workers=1)
+        self.assertEqual(imported, {'AAPL.US': 2})
+
+        # Same file name download_stock_symbols writes for AAPL
+        names, rows = read_zip(os.path.join(self.downloader.data_path, 'aapl_equity_equity_stooq.zip'))
+        self.assertEqual(names, ['aapl_equity_trade.csv'])
+        self.assertEqual(rows, ['Time,Open,High,Low,Close,Volume',
+                                '20240103 00:00,1842200,1858800,1834300,1842500,58414460',
+                                '20240104 00:00,1821500,1830872,1808800,1819100,71983570'])
+
+    def test_import_archive_hour_bars_keep_the_date(self):
+        imported = self.downloader.import_archive(self.archive_path, universe=['MSFT'], workers=1)
+        self.assertEqual(imported, {'MSFT.US': 2})
+
+        _, rows = read_zip(os.path.join(self.downloader.data_path, 'hour', 'msft_equity_equity_stooq.zip'))
+        self.assertEqual([row.split(',')[0] for row in rows[1:]], ['20240102 10:00', '20240102 11:00'])
+
+
+if __name__ == '__main__':
+    unittest.main()
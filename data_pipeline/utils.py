@@ -6,8 +6,12 @@ import os
 import csv
 import zipfile
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import pytz
+import threading
+import time
+from collections import deque
 from typing import List, Dict, Optional
 import logging
 from tqdm import tqdm
@@ -66,8 +70,8 @@ def create_lean_tradebar_csv(data: List[Dict], symbol: str, date: datetime, reso
         price_multiplier = LEAN_CRYPTO_PRICE_MULTIPLIER  # 1 for actual prices
     
     for bar in data:
-        if resolution == 'daily':
-            # For daily data, use full date format YYYYMMDD HH:MM
+        if resolution in ('daily', 'hour'):
+            # For daily and hour data, use full date format YYYYMMDD HH:MM
             time_str = bar['timestamp'].strftime("%Y%m%d %H:%M")
         else:
             # For intraday data, use milliseconds since midnight
@@ -158,18 +162,52 @@ def create_lean_quotebar_csv(data: List[Dict], symbol: str, date: datetime, reso
     
     return csv_content
 
-def write_lean_zip_file(csv_content: List[List], output_path: str, csv_filename: str):
-    """Write CSV content to a zip file in Lean format"""
+def create_lean_crypto_csv_text(times_ms, ohlcv) -> str:
+    """
+    Lean crypto CSV text straight from arrays, same rows as create_lean_crypto_csv
+
+    times_ms are int64 UTC milliseconds, ohlcv a float64 (n, 5) array of
+    open, high, low, close, volume.
+    """
+    df = pd.DataFrame(ohlcv, columns=['open', 'high', 'low', 'close', 'volume'])
+    df.insert(0, 'time', pd.to_datetime(times_ms, unit='ms').strftime("%Y%m%d %H:%M"))
+    return df.to_csv(header=False, index=False, lineterminator="\n")
+
+def create_lean_tradebar_csv_text(times, ohlcv, resolution: str, asset_type: str = 'equity') -> str:
+    """
+    Lean TradeBar CSV text straight from arrays, same rows as create_lean_tradebar_csv
+
+    times is a naive DatetimeIndex, ohlcv a float64 (n, 5) array of
+    open, high, low, close, volume.
+    """
+    times = pd.DatetimeIndex(times)
+    if resolution in ('daily', 'hour'):
+        time_col = times.strftime("%Y%m%d %H:%M")
+    else:
+        time_col = (times - times.normalize()) // pd.Timedelta(milliseconds=1)
+    
+    if asset_type in ['equity', 'index', 'future']:
+        prices = np.trunc(ohlcv[:, :4] * LEAN_PRICE_MULTIPLIER).astype(np.int64)
+    else:
+        prices = ohlcv[:, :4] * LEAN_CRYPTO_PRICE_MULTIPLIER
+    
+    df = pd.DataFrame(prices, columns=['open', 'high', 'low', 'close'])
+    df.insert(0, 'time', np.asarray(time_col))
+    df['volume'] = ohlcv[:, 4].astype(np.int64)
+    return df.to_csv(header=False, index=False, lineterminator="\n")
+
+def write_lean_zip_text(csv_text: str, output_path: str, csv_filename: str):
+    """Write already formatted CSV text to a zip file in Lean format"""
     ensure_directory_exists(os.path.dirname(output_path))
     
     with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Create CSV content string
-        csv_string = ""
-        for row in csv_content:
-            csv_string += ",".join(str(item) for item in row) + "\n"
-        
-        # Add CSV to zip file
-        zip_file.writestr(csv_filename, csv_string)
+        zip_file.writestr(csv_filename, csv_text)
+
+def write_lean_zip_file(csv_content: List[List], output_path: str, csv_filename: str):
+    """Write CSV content to a zip file in Lean format"""
+    # Create CSV content string
+    csv_string = "".join(",".join(str(item) for item in row) + "\n" for row in csv_content)
+    write_lean_zip_text(csv_string, output_path, csv_filename)
 
 def validate_symbol(symbol: str, asset_type: str) -> bool:
     """Validate symbol format"""
@@ -205,6 +243,33 @@ def convert_timezone(dt: datetime, from_tz: str, to_tz: str) -> datetime:
     
     return converted_dt
 
+class RateLimiter:
+    """
+    Thread-safe sliding-window limiter: at most max_calls in any period seconds
+
+    Calls go out back to back until the window is full, so a bulk pull uses the
+    whole quota instead of pacing every call evenly.
+    """
+    
+    def __init__(self, max_calls: int, period: float):
+        self.max_calls = max_calls
+        self.period = period
+        self.calls = deque()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a call fits in the window and record it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and self.calls[0] <= now - self.period:
+                    self.calls.popleft()
+                if len(self.calls) < self.max_calls:
+                    self.calls.append(now)
+                    return
+                wait = self.calls[0] + self.period - now
+            time.sleep(wait)
+
 class DataValidator:
     """Data validation utilities"""
     
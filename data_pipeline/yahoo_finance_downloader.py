@@ -1,4 +1,5 @@
 import yfinance as yf
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
@@ -10,21 +11,77 @@ import json
 import requests
 
 from config import (
-    EQUITY_DATA_PATH, CRYPTO_DATA_PATH, LEAN_TIMEZONE_EQUITY, LEAN_TIME_FORMAT
+    EQUITY_DATA_PATH, CRYPTO_DATA_PATH, LEAN_TIMEZONE_EQUITY, LEAN_TIME_FORMAT, YAHOO_BATCH_SIZE
 )
+from fundamentals_store import FundamentalsStore, record_rows
 from utils import (
     setup_logging, ensure_directory_exists, format_lean_date,
-    create_lean_tradebar_csv, write_lean_zip_file, get_trading_days,
-    DataValidator, static_tqdm
+    create_lean_tradebar_csv, create_lean_tradebar_csv_text, write_lean_zip_file, write_lean_zip_text,
+    get_trading_days, DataValidator, static_tqdm
 )
 
 logger = setup_logging()
 
+# Map interval to yfinance format
+YF_INTERVALS = {
+    'minute': '1m',
+    'hour': '1h',
+    'daily': '1d',
+    'weekly': '1wk',
+    'monthly': '1mo'
+}
+YF_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def to_lean_arrays(data: pd.DataFrame):
+    """
+    Naive Lean-timezone times and a float64 (n, 5) OHLCV array from a yfinance frame
+
+    Rows with missing prices (padding from a multi-ticker download) or failing
+    DataValidator's OHLC checks are dropped.
+    """
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is None:
+        index = index.tz_localize(LEAN_TIMEZONE_EQUITY)
+    else:
+        index = index.tz_convert(LEAN_TIMEZONE_EQUITY)
+    
+    ohlcv = data.reindex(columns=YF_COLUMNS).to_numpy(dtype='float64')
+    ohlcv[:, 4] = np.nan_to_num(ohlcv[:, 4])
+    open_, high, low, close, volume = ohlcv.T
+    keep = (low <= open_) & (open_ <= high) & (low <= close) & (close <= high) & (volume >= 0)
+    return index[keep].tz_localize(None), ohlcv[keep]
+
+# Ticker.info keys under the field names the Alpha Vantage overview uses, so both
+# sources line up in the fundamentals store
+INFO_FIELDS = {
+    'marketCap': 'market_cap',
+    'trailingPE': 'pe_ratio',
+    'forwardPE': 'forward_pe',
+    'pegRatio': 'peg_ratio',
+    'bookValue': 'book_value',
+    'dividendRate': 'dividend_per_share',
+    'dividendYield': 'dividend_yield',
+    'trailingEps': 'eps',
+    'revenuePerShare': 'revenue_per_share_ttm',
+    'profitMargins': 'profit_margin',
+    'operatingMargins': 'operating_margin_ttm',
+    'returnOnAssets': 'return_on_assets_ttm',
+    'returnOnEquity': 'return_on_equity_ttm',
+    'targetMeanPrice': 'analyst_target_price',
+    'fiftyTwoWeekHigh': '52_week_high',
+    'fiftyTwoWeekLow': '52_week_low',
+    'fiftyDayAverage': '50_day_moving_average',
+    'twoHundredDayAverage': '200_day_moving_average',
+    'sharesOutstanding': 'shares_outstanding'
+}
+
 class YahooFinanceDownloader:
     """Enhanced Yahoo Finance downloader with support for multiple asset types"""
     
     def __init__(self):
         self.rate_limit_delay = 0.5  # Be respectful to Yahoo Finance
+        self.fundamentals_store = FundamentalsStore()
         
     def get_stock_data(self, symbol: str, start_date: datetime, end_date: datetime, interval: str = '1d') -> List[Dict]:
         """Get stock/ETF/index data from Yahoo Finance with retry logic"""
@@ -39,17 +96,7 @@ class YahooFinanceDownloader:
                     time.sleep(retry_delay * attempt)
                 
                 ticker = yf.Ticker(symbol)
-                
-                # Map interval to yfinance format
-                yf_interval_map = {
-                    'minute': '1m',
-                    'hour': '1h',
-                    'daily': '1d',
-                    'weekly': '1wk',
-                    'monthly': '1mo'
-                }
-                
-                yf_interval = yf_interval_map.get(interval, '1d')
+                yf_interval = YF_INTERVALS.get(interval, '1d')
                 
                 # Download data with longer timeout and error handling
                 data = ticker.history(
@@ -67,26 +114,15 @@ class YahooFinanceDownloader:
                     else:
                         return []  # Final attempt failed
                 
-                # Convert to our format
-                bars = []
-                for timestamp, row in data.iterrows():
-                    # Handle timezone
-                    if hasattr(timestamp, 'tz_localize'):
-                        if timestamp.tz is None:
-                            timestamp = timestamp.tz_localize(LEAN_TIMEZONE_EQUITY)
-                        else:
-                            timestamp = timestamp.tz_convert(LEAN_TIMEZONE_EQUITY)
-                    else:
-                        timestamp = timestamp.replace(tzinfo=pytz.timezone(LEAN_TIMEZONE_EQUITY))
-                    
-                    bars.append({
-                        'timestamp': timestamp,
-                        'open': float(row['Open']),
-                        'high': float(row['High']),
-                        'low': float(row['Low']),
-                        'close': float(row['Close']),
-                        'volume': int(row['Volume']) if not pd.isna(row['Volume']) else 0
-                    })
+                # Convert to our format, the whole index is converted to the Lean timezone at once
+                index = data.index.tz_localize(LEAN_TIMEZONE_EQUITY) if data.index.tz is None \
+                    else data.index.tz_convert(LEAN_TIMEZONE_EQUITY)
+                volume = data['Volume'].fillna(0).astype('int64').tolist()
+                bars = [
+                    {'timestamp': timestamp, 'open': bar[0], 'high': bar[1], 'low': bar[2],
+                     'close': bar[3], 'volume': bar_volume}
+                    for timestamp, bar, bar_volume in zip(index, data[YF_COLUMNS[:4]].to_numpy('float64').tolist(), volume)
+                ]
                 
                 # Success! Rate limiting for next call
                 time.sleep(self.rate_limit_delay)
@@ -128,6 +164,69 @@ class YahooFinanceDownloader:
             logger.error(f"Error getting crypto data for {symbol}: {str(e)}")
             return []
     
+    def get_batch_data(self, symbols: List[str], start_date: datetime, end_date: datetime,
+                       interval: str = 'daily') -> Dict[str, pd.DataFrame]:
+        """
+        Get OHLCV frames for many Yahoo tickers with one yf.download request per YAHOO_BATCH_SIZE tickers
+
+        Tickers that come back empty are retried together, up to three attempts.
+
+        Returns:
+        dict: Ticker to its yfinance frame (Open, High, Low, Close, Volume columns)
+        """
+        max_retries = 3
+        retry_delay = 2
+        frames = {}
+        
+        for i in range(0, len(symbols), YAHOO_BATCH_SIZE):
+            pending = list(symbols[i:i + YAHOO_BATCH_SIZE])
+            
+            for attempt in range(max_retries):
+                if attempt > 0:
+                    logger.info(f"Retry attempt {attempt} for {len(pending)} tickers")
+                    time.sleep(retry_delay * attempt)
+                
+                try:
+                    data = yf.download(
+                        tickers=pending,
+                        start=start_date.strftime('%Y-%m-%d'),
+                        end=end_date.strftime('%Y-%m-%d'),
+                        interval=YF_INTERVALS.get(interval, '1d'),
+                        group_by='ticker',
+                        threads=True,
+                        auto_adjust=False,
+                        prepost=False,
+                        ignore_tz=False,
+                        progress=False
+                    )
+                except Exception as e:
+                    logger.warning(f"Attempt {attempt + 1} failed for {len(pending)} tickers: {str(e)}")
+                    continue
+                
+                if data is not None and not data.empty:
+                    for symbol in pending:
+                        if isinstance(data.columns, pd.MultiIndex):
+                            if symbol not in data.columns.get_level_values(0):
+                                continue
+                            frame = data[symbol]
+                        else:
+                            frame = data
+                        frame = frame.dropna(how='all')
+                        if not frame.empty:
+                            frames[symbol] = frame
+                
+                pending = [symbol for symbol in pending if symbol not in frames]
+                # Rate limiting for next call
+                time.sleep(self.rate_limit_delay)
+                if not pending:
+                    break
+            
+            if pending:
+                logger.warning(f"No data found for {', '.join(pending)}")
+        
+        logger.info(f"Downloaded {len(frames)}/{len(symbols)} tickers from Yahoo Finance")
+        return frames
+    
     def get_options_data(self, symbol: str, expiration_date: Optional[str] = None, option_type: Optional[str] = None) -> Dict:
         """Get options data for a symbol"""
         try:
@@ -295,6 +394,33 @@ class YahooFinanceDownloader:
             logger.error(f"Error getting treasury data for {maturity}: {str(e)}")
             return []
     
+    def get_fundamental_data(self, symbol: str) -> Dict[str, Any]:
+        """Get company overview and valuation fundamentals for a symbol"""
+        try:
+            info = yf.Ticker(symbol).info or {}
+            
+            fundamentals = {
+                'symbol': symbol,
+                'name': info.get('longName') or info.get('shortName', ''),
+                'sector': info.get('sector', ''),
+                'industry': info.get('industry', ''),
+                'currency': info.get('currency', ''),
+                'last_updated': datetime.now().isoformat()
+            }
+            fundamentals.update({field: info.get(key) for key, field in INFO_FIELDS.items()})
+            # yfinance reports dividendYield in percent (0.44 is 0.44%), the other yields are fractions
+            if fundamentals.get('dividend_yield') is not None:
+                fundamentals['dividend_yield'] = fundamentals['dividend_yield'] / 100
+            
+            # Rate limiting
+            time.sleep(self.rate_limit_delay)
+            
+            return fundamentals
+            
+        except Exception as e:
+            logger.error(f"Error getting fundamentals for {symbol}: {str(e)}")
+            return {}
+    
     def get_earnings_data(self, symbol: str) -> Dict:
         """Get earnings data for a symbol"""
         try:
@@ -458,104 +584,63 @@ class YahooFinanceDownloader:
             logger.error(f"Error getting news for {symbol}: {str(e)}")
             return []
     
+    def _save_frame(self, data: pd.DataFrame, name: str, data_path: str, interval: str,
+                    asset_type: str = 'equity') -> int:
+        """Write one yfinance frame as a Lean zip, returns the number of bars written"""
+        times, ohlcv = to_lean_arrays(data)
+        if not len(times):
+            return 0
+        
+        output_path = os.path.join(data_path, f"{name}.zip")
+        csv_filename = f"{name}_{interval}_trade.csv"
+        write_lean_zip_text(create_lean_tradebar_csv_text(times, ohlcv, interval, asset_type), output_path, csv_filename)
+        logger.info(f"Saved {len(times)} bars for {name}")
+        return len(times)
+    
+    def _download_batch(self, tickers: Dict[str, str], interval: str, start_date: datetime, end_date: datetime,
+                        data_path: str, asset_type: str = 'equity'):
+        """Batch download Yahoo tickers and save each under its output name (tickers maps ticker to name)"""
+        frames = self.get_batch_data(list(tickers), start_date, end_date, interval)
+        ensure_directory_exists(data_path)
+        
+        for ticker, name in static_tqdm(tickers.items(), desc="Saving Yahoo Finance bars"):
+            if ticker not in frames:
+                continue
+            try:
+                self._save_frame(frames[ticker], name, data_path, interval, asset_type)
+            except Exception as e:
+                logger.error(f"Error saving {ticker}: {str(e)}")
+    
     def download_stock_symbols(self, symbols: List[str], interval: str, start_date: datetime, end_date: datetime, asset_type: str = 'equity'):
         """Download stock/ETF/index data for multiple symbols"""
         logger.info(f"Starting Yahoo Finance {asset_type} download for {len(symbols)} symbols")
         
-        for symbol in static_tqdm(symbols, desc=f"Downloading {asset_type}"):
-            try:
-                data = self.get_stock_data(symbol, start_date, end_date, interval)
-                
-                if data:
-                    # Clean and validate data
-                    cleaned_data = DataValidator.clean_ohlcv_data(data)
-                    
-                    if cleaned_data:
-                        # Create directory structure
-                        if asset_type == 'crypto':
-                            data_path = os.path.join(CRYPTO_DATA_PATH, 'yahoo', interval)
-                        else:
-                            data_path = os.path.join(EQUITY_DATA_PATH, asset_type, 'yahoo', interval)
-                        
-                        ensure_directory_exists(data_path)
-                        
-                        # Save data
-                        output_path = os.path.join(data_path, f"{symbol.lower().replace('=', '_').replace('-', '_')}.zip")
-                        csv_filename = f"{symbol.lower().replace('=', '_').replace('-', '_')}_{interval}_trade.csv"
-                        
-                        csv_content = create_lean_tradebar_csv(cleaned_data, symbol, cleaned_data[0]['timestamp'], interval)
-                        
-                        if csv_content:
-                            write_lean_zip_file(csv_content, output_path, csv_filename)
-                            logger.info(f"Saved {len(csv_content)} bars for {symbol}")
-                
-            except Exception as e:
-                logger.error(f"Error downloading {symbol}: {str(e)}")
-                continue
+        if asset_type == 'crypto':
+            data_path = os.path.join(CRYPTO_DATA_PATH, 'yahoo', interval)
+        else:
+            data_path = os.path.join(EQUITY_DATA_PATH, asset_type, 'yahoo', interval)
+        
+        tickers = {symbol: symbol.lower().replace('=', '_').replace('-', '_') for symbol in symbols}
+        self._download_batch(tickers, interval, start_date, end_date, data_path)
     
     def download_forex_pairs(self, pairs: List[str], interval: str, start_date: datetime, end_date: datetime):
         """Download forex data for multiple pairs"""
         logger.info(f"Starting Yahoo Finance forex download for {len(pairs)} pairs")
         
-        for pair in static_tqdm(pairs, desc="Downloading forex"):
-            try:
-                data = self.get_forex_data(pair, start_date, end_date, interval)
-                
-                if data:
-                    # Clean and validate data
-                    cleaned_data = DataValidator.clean_ohlcv_data(data)
-                    
-                    if cleaned_data:
-                        # Create directory structure
-                        data_path = os.path.join(EQUITY_DATA_PATH, 'forex', 'yahoo', interval)
-                        ensure_directory_exists(data_path)
-                        
-                        # Save data
-                        clean_pair = pair.replace('=X', '').lower()
-                        output_path = os.path.join(data_path, f"{clean_pair}.zip")
-                        csv_filename = f"{clean_pair}_{interval}_trade.csv"
-                        
-                        csv_content = create_lean_tradebar_csv(cleaned_data, pair, cleaned_data[0]['timestamp'], interval, 'forex')
-                        
-                        if csv_content:
-                            write_lean_zip_file(csv_content, output_path, csv_filename)
-                            logger.info(f"Saved {len(csv_content)} bars for {pair}")
-                
-            except Exception as e:
-                logger.error(f"Error downloading {pair}: {str(e)}")
-                continue
+        data_path = os.path.join(EQUITY_DATA_PATH, 'forex', 'yahoo', interval)
+        # Yahoo Finance forex symbols typically end with =X
+        tickers = {pair if pair.endswith('=X') else f"{pair}=X": pair.replace('=X', '').lower() for pair in pairs}
+        self._download_batch(tickers, interval, start_date, end_date, data_path, 'forex')
     
     def download_crypto_symbols(self, symbols: List[str], start_date: datetime, end_date: datetime, interval: str = 'daily'):
         """Download crypto data for multiple symbols (orchestrator-compatible method)"""
         logger.info(f"Starting Yahoo Finance crypto download for {len(symbols)} symbols")
         
-        for symbol in static_tqdm(symbols, desc="Downloading crypto"):
-            try:
-                data = self.get_crypto_data(symbol, start_date, end_date, interval)
-                
-                if data:
-                    # Clean and validate data
-                    cleaned_data = DataValidator.clean_ohlcv_data(data)
-                    
-                    if cleaned_data:
-                        # Create directory structure
-                        data_path = os.path.join(CRYPTO_DATA_PATH, 'yahoo', interval)
-                        ensure_directory_exists(data_path)
-                        
-                        # Save data
-                        clean_symbol = symbol.replace('-USD', '').lower()
-                        output_path = os.path.join(data_path, f"{clean_symbol}.zip")
-                        csv_filename = f"{clean_symbol}_{interval}_trade.csv"
-                        
-                        csv_content = create_lean_tradebar_csv(cleaned_data, symbol, cleaned_data[0]['timestamp'], interval)
-                        
-                        if csv_content:
-                            write_lean_zip_file(csv_content, output_path, csv_filename)
-                            logger.info(f"Saved {len(csv_content)} bars for {symbol}")
-                
-            except Exception as e:
-                logger.error(f"Error downloading {symbol}: {str(e)}")
-                continue
+        data_path = os.path.join(CRYPTO_DATA_PATH, 'yahoo', interval)
+        # Yahoo Finance crypto symbols typically use -USD format
+        tickers = {symbol if symbol.endswith('-USD') else f"{symbol}-USD": symbol.replace('-USD', '').lower()
+                   for symbol in symbols}
+        self._download_batch(tickers, interval, start_date, end_date, data_path)
     
     def download_fundamentals(self, symbols: List[str]):
         """Download fundamental data for multiple symbols"""
@@ -585,6 +670,12 @@ class YahooFinanceDownloader:
                 json.dump(fundamentals_data, f, indent=2, default=str)
             
             logger.info(f"Saved fundamentals for {len(fundamentals_data)} symbols")
+            
+            # Overview values are a snapshot as of today
+            today = datetime.now().strftime('%Y-%m-%d')
+            self.fundamentals_store.upsert([row for fundamentals in fundamentals_data for row in
+                                            record_rows(fundamentals['symbol'], 'yahoo', today, 'snapshot',
+                                                        fundamentals, as_of=datetime.now())])
     
     def download_earnings(self, symbols: List[str]):
         """Download earnings data for multiple symbols"""
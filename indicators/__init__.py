@@ -0,0 +1,9 @@
+"""
+Shared technical indicators
+
+batch: vectorized functions over (time, symbol) arrays for backtests and screens
+streaming: incremental indicators updated one bar at a time for live loops
+"""
+
+from .batch import sma, ema, rma, bollinger_bands, rsi, macd, true_range, atr, adx, roc, crossover, ma_crossover
+from .streaming import StreamingIndicator, SMA, BollingerBands, EMA, RMA, RSI, MACD, ATR, ADX, ROC, MACrossover
@@ -0,0 +1,228 @@
+"""
+Batch indicators over (time, symbol) arrays
+
+Every function takes 1-D series or 2-D (time, symbol) arrays and returns the same
+shape, so one call covers a whole universe. pandas Series/DataFrames come back as
+pandas objects with the original index and columns. Leading NaNs (a symbol that
+starts trading later than the others) are handled per column.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _as_2d(values):
+    """Return a float (time, symbol) view of values and a function that restores its type"""
+    if isinstance(values, pd.DataFrame):
+        index, columns = values.index, values.columns
+        return values.to_numpy(dtype=float), lambda out: pd.DataFrame(out, index=index, columns=columns)
+    if isinstance(values, pd.Series):
+        index, name = values.index, values.name
+        return values.to_numpy(dtype=float)[:, None], lambda out: pd.Series(out[:, 0], index=index, name=name)
+
+    array = np.asarray(values, dtype=float)
+    if array.ndim == 1:
+        return array[:, None], lambda out: out[:, 0]
+    if array.ndim != 2:
+        raise ValueError(f"Expected a 1-D series or a 2-D (time, symbol) array, got shape {array.shape}")
+    return array, lambda out: out
+
+
+def _shift(array, periods=1):
+    """Shift rows down, filling the top with NaN"""
+    out = np.full_like(array, np.nan)
+    if periods < len(array):
+        out[periods:] = array[:len(array) - periods]
+    return out
+
+
+def _rolling_mean(array, length):
+    """Rolling mean along time, NaN until a column has `length` valid values in the window"""
+    valid = ~np.isnan(array)
+    sums = np.cumsum(np.where(valid, array, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    zero = np.zeros((1, array.shape[1]))
+    sums, counts = np.vstack([zero, sums]), np.vstack([zero, counts])
+
+    out = np.full_like(array, np.nan)
+    window_sums = sums[length:] - sums[:-length]
+    window_counts = counts[length:] - counts[:-length]
+    out[length - 1:] = np.where(window_counts == length, window_sums / length, np.nan)
+    return out
+
+
+def _ewm(array, alpha, seed_length=None):
+    """
+    Exponential smoothing along time, one array op per row for all symbols
+
+    The recursion starts at each column's first valid value, which matches
+    pandas .ewm(alpha=alpha, adjust=False). With seed_length it instead starts from
+    the simple mean of the first seed_length values (TA-Lib / pandas_ta EMA).
+    NaNs after the start keep the previous value.
+    """
+    n_time, n_symbols = array.shape
+    valid = ~np.isnan(array)
+    first_valid = np.where(valid.any(axis=0), valid.argmax(axis=0), n_time)
+
+    if seed_length:
+        seed_at = first_valid + seed_length - 1
+        seed_rows = _rolling_mean(array, seed_length)
+        seed_value = seed_rows[np.minimum(seed_at, n_time - 1), np.arange(n_symbols)]
+    else:
+        seed_at = first_valid
+        seed_value = array[np.minimum(seed_at, n_time - 1), np.arange(n_symbols)]
+
+    out = np.full_like(array, np.nan)
+    state = np.full(n_symbols, np.nan)
+    started = np.zeros(n_symbols, dtype=bool)
+    for t in range(min(seed_at.min(), n_time), n_time):
+        row = array[t]
+        step = started & valid[t]
+        state[step] += alpha * (row[step] - state[step])
+        seeding = seed_at == t
+        state[seeding] = seed_value[seeding]
+        started |= seeding
+        out[t] = state
+    return out
+
+
+def sma(close, length=20):
+    """Simple moving average"""
+    array, wrap = _as_2d(close)
+    return wrap(_rolling_mean(array, length))
+
+
+def ema(close, length=20):
+    """Exponential moving average seeded with the SMA of the first `length` bars (pandas_ta's ema)"""
+    array, wrap = _as_2d(close)
+    return wrap(_ewm(array, 2 / (length + 1), seed_length=length))
+
+
+def rma(values, length=14):
+    """Wilder's moving average, .ewm(alpha=1/length, adjust=False).mean()"""
+    array, wrap = _as_2d(values)
+    return wrap(_ewm(array, 1 / length))
+
+
+def bollinger_bands(close, length=20, num_std=2.0):
+    """
+    Bollinger bands from one pass over the rolling windows (sample std, like pandas)
+
+    Returns:
+    dict: "bbl", "bbm", "bbu", "bbb" (bandwidth, (bbu - bbl) / bbm) and "bbp" (%B), each shaped like close
+    """
+    array, wrap = _as_2d(close)
+    middle = np.full_like(array, np.nan)
+    std = np.full_like(array, np.nan)
+    if len(array) >= length:
+        windows = np.lib.stride_tricks.sliding_window_view(array, length, axis=0)
+        middle[length - 1:] = windows.mean(axis=-1)
+        std[length - 1:] = windows.std(axis=-1, ddof=1)
+
+    upper = middle + num_std * std
+    lower = middle - num_std * std
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bandwidth = (upper - lower) / middle
+        percent_b = (array - lower) / (upper - lower)
+    return {"bbl": wrap(lower), "bbm": wrap(middle), "bbu": wrap(upper), "bbb": wrap(bandwidth), "bbp": wrap(percent_b)}
+
+
+def rsi(close, length=14):
+    """Relative strength index with Wilder smoothing, 0-100"""
+    array, wrap = _as_2d(close)
+    change = array - _shift(array)
+    gain = _ewm(np.where(np.isnan(change), np.nan, np.clip(change, 0, None)), 1 / length)
+    loss = _ewm(np.where(np.isnan(change), np.nan, np.clip(-change, 0, None)), 1 / length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 * gain / (gain + loss)
+    return wrap(out)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """
+    Moving average convergence divergence
+
+    Returns:
+    tuple: (macd, signal, histogram), each shaped like close
+    """
+    array, wrap = _as_2d(close)
+    line = _ewm(array, 2 / (fast + 1), seed_length=fast) - _ewm(array, 2 / (slow + 1), seed_length=slow)
+    signal_line = _ewm(line, 2 / (signal + 1), seed_length=signal)
+    return wrap(line), wrap(signal_line), wrap(line - signal_line)
+
+
+def _true_range(high, low, close):
+    prev_close = _shift(close)
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def true_range(high, low, close):
+    """True range; the first bar, which has no previous close, uses high - low"""
+    high, wrap = _as_2d(high)
+    return wrap(_true_range(high, _as_2d(low)[0], _as_2d(close)[0]))
+
+
+def atr(high, low, close, length=14, wilder=False):
+    """Average true range, a simple mean of the true range (BacktestTrend.calculate_ATR) unless wilder=True"""
+    high, wrap = _as_2d(high)
+    tr = _true_range(high, _as_2d(low)[0], _as_2d(close)[0])
+    return wrap(_ewm(tr, 1 / length) if wilder else _rolling_mean(tr, length))
+
+
+def adx(high, low, close, length=14):
+    """
+    Average directional index, same definition as BacktestTrend.calculate_ADX
+
+    Returns:
+    tuple: (adx, plus_di, minus_di), each shaped like close
+    """
+    high, wrap = _as_2d(high)
+    low, close = _as_2d(low)[0], _as_2d(close)[0]
+
+    up_move = high - _shift(high)
+    down_move = _shift(low) - low
+    # Comparisons against the NaN first row are False, so the first DMs are 0
+    plus_dm = np.where(up_move > down_move, up_move, 0.0)
+    minus_dm = np.where(down_move > up_move, down_move, 0.0)
+
+    alpha = 1 / length
+    tr_smooth = _ewm(_true_range(high, low, close), alpha)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * _ewm(plus_dm, alpha) / tr_smooth
+        minus_di = 100 * _ewm(minus_dm, alpha) / tr_smooth
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return wrap(_ewm(dx, alpha)), wrap(plus_di), wrap(minus_di)
+
+
+def roc(close, length=1):
+    """Rate of change over `length` bars as a fraction, (close / close[-length]) - 1"""
+    array, wrap = _as_2d(close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return wrap(array / _shift(array, length) - 1)
+
+
+def crossover(fast, slow, strict=False):
+    """
+    Crossing signal between two lines as int8
+
+    1 on the bar fast closes above slow after being at or below it, -1 on the bar it
+    closes below after being at or above it, 0 otherwise (including warm-up bars).
+    With strict=True the previous bar must be strictly on the other side, so touching
+    without crossing is not a signal (gld_signal's definition).
+    """
+    fast_values, wrap = _as_2d(fast)
+    slow_values, _ = _as_2d(slow)
+    diff = fast_values - slow_values
+    prev_diff = _shift(diff)
+    with np.errstate(invalid='ignore'):
+        if strict:
+            up, down = (diff > 0) & (prev_diff < 0), (diff < 0) & (prev_diff > 0)
+        else:
+            up, down = (diff > 0) & (prev_diff <= 0), (diff < 0) & (prev_diff >= 0)
+    return wrap(up.astype(np.int8) - down.astype(np.int8))
+
+
+def ma_crossover(close, fast=9, slow=21, strict=False):
+    """SMA crossover signal (e.g. the GLD 9/21 signal), see crossover()"""
+    array, wrap = _as_2d(close)
+    return wrap(crossover(_rolling_mean(array, fast), _rolling_mean(array, slow), strict=strict))
@@ -0,0 +1,285 @@
+"""
+Streaming indicators for live loops
+
+Each indicator keeps its state as arrays over the symbols, so a new bar for the
+whole universe is one update() call. After the same bars, update() returns the same
+values as the last row of the matching batch function. Rows must be complete, so
+forward-fill symbols without a bar before passing them in.
+"""
+
+import numpy as np
+
+
+def _row(values, n_symbols):
+    row = np.asarray(values, dtype=float).reshape(-1)
+    if len(row) != n_symbols:
+        raise ValueError(f"Expected {n_symbols} values per bar, got {len(row)}")
+    return row
+
+
+class StreamingIndicator:
+    """Base class: subclasses implement _update(row) and return the new value"""
+
+    def __init__(self, n_symbols=1):
+        self.n_symbols = n_symbols
+        self.count = 0
+        self.value = np.full(n_symbols, np.nan)
+
+    @property
+    def ready(self):
+        return not np.isnan(self.value).any()
+
+    def update(self, *rows):
+        """Add one bar per symbol and return the current indicator values"""
+        self.value = self._update(*(_row(row, self.n_symbols) for row in rows))
+        self.count += 1
+        return self.value
+
+    def update_many(self, *blocks):
+        """Add a (time, symbol) block of bars, e.g. to warm up from history; returns every row"""
+        blocks = [np.asarray(block, dtype=float).reshape(len(block), -1) for block in blocks]
+        return np.array([np.array(self.update(*rows), copy=True) for rows in zip(*blocks)])
+
+    def _update(self, *rows):
+        raise NotImplementedError
+
+
+class SMA(StreamingIndicator):
+    """Simple moving average over a ring buffer"""
+
+    def __init__(self, length=20, n_symbols=1):
+        super().__init__(n_symbols)
+        self.length = length
+        self.window = np.zeros((length, n_symbols))
+        self.total = np.zeros(n_symbols)
+
+    def _update(self, row):
+        slot = self.count % self.length
+        self.total += row - self.window[slot]
+        self.window[slot] = row
+        if self.count + 1 < self.length:
+            return np.full(self.n_symbols, np.nan)
+        # Re-sum once per lap so the running total does not drift
+        if slot == self.length - 1:
+            self.total = self.window.sum(axis=0)
+        return self.total / self.length
+
+
+class BollingerBands(StreamingIndicator):
+    """
+    Bollinger bands over a sliding window, value is %B
+
+    Mean and variance are updated with the sliding-window form of Welford's algorithm,
+    so each bar costs O(1) per symbol. The bands are kept in .lower, .middle, .upper
+    and .bandwidth. warm() loads the state from a block of history in one step.
+    """
+
+    def __init__(self, length=20, num_std=2.0, n_symbols=1):
+        super().__init__(n_symbols)
+        self.length = length
+        self.num_std = num_std
+        self.window = np.zeros((length, n_symbols))
+        self.mean = np.zeros(n_symbols)
+        self.m2 = np.zeros(n_symbols)
+        self.lower = self.middle = self.upper = self.bandwidth = np.full(n_symbols, np.nan)
+
+    def warm(self, block):
+        """Start from the last `length` rows of a (time, symbol) block instead of replaying it"""
+        block = np.asarray(block, dtype=float).reshape(len(block), -1)[-self.length:]
+        n = len(block)
+        self.window[:n] = block
+        self.count = n
+        self.mean = block.mean(axis=0)
+        self.m2 = ((block - self.mean) ** 2).sum(axis=0)
+        self.value = self._bands(block[-1]) if n == self.length else np.full(self.n_symbols, np.nan)
+        return self.value
+
+    def _update(self, close):
+        slot = self.count % self.length
+        if self.count < self.length:
+            n = self.count + 1
+            delta = close - self.mean
+            self.mean = self.mean + delta / n
+            self.m2 = self.m2 + delta * (close - self.mean)
+        else:
+            old = self.window[slot]
+            new_mean = self.mean + (close - old) / self.length
+            self.m2 = self.m2 + (close - old) * (close - new_mean + old - self.mean)
+            self.mean = new_mean
+        self.window[slot] = close
+        if self.count + 1 == self.length or (self.count + 1) % (self.length * 64) == 0:
+            # Re-anchor from the window now and then so rounding errors cannot accumulate
+            self.mean = self.window.mean(axis=0)
+            self.m2 = ((self.window - self.mean) ** 2).sum(axis=0)
+        return self._bands(close) if self.count + 1 >= self.length else np.full(self.n_symbols, np.nan)
+
+    def _bands(self, close):
+        std = np.sqrt(np.maximum(self.m2, 0) / (self.length - 1))
+        self.middle = self.mean
+        self.upper = self.mean + self.num_std * std
+        self.lower = self.mean - self.num_std * std
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.bandwidth = (self.upper - self.lower) / self.middle
+            return (close - self.lower) / (self.upper - self.lower)
+
+
+class EMA(StreamingIndicator):
+    """
+    Exponential moving average, seeded with the SMA of the first `length` bars unless seed=False
+
+    Each symbol starts at its own first valid value and NaNs afterwards keep the previous
+    value, as in the batch version.
+    """
+
+    def __init__(self, length=20, n_symbols=1, alpha=None, seed=True):
+        super().__init__(n_symbols)
+        self.length = length
+        self.alpha = alpha if alpha is not None else 2 / (length + 1)
+        self.seed = seed
+        self.total = np.zeros(n_symbols)
+        self.seen = np.zeros(n_symbols, dtype=int)
+
+    def _update(self, row):
+        value = self.value.copy()
+        started = ~np.isnan(value)
+        valid = ~np.isnan(row)
+        step = started & valid
+        value[step] += self.alpha * (row[step] - value[step])
+
+        warming = ~started & valid
+        if self.seed:
+            self.total[warming] += row[warming]
+            self.seen[warming] += 1
+            seeding = warming & (self.seen == self.length)
+            value[seeding] = self.total[seeding] / self.length
+        else:
+            value[warming] = row[warming]
+        return value
+
+
+class RMA(EMA):
+    """Wilder's moving average, ewm(alpha=1/length, adjust=False)"""
+
+    def __init__(self, length=14, n_symbols=1):
+        super().__init__(length, n_symbols, alpha=1 / length, seed=False)
+
+
+class RSI(StreamingIndicator):
+    """Relative strength index with Wilder smoothing"""
+
+    def __init__(self, length=14, n_symbols=1):
+        super().__init__(n_symbols)
+        self.prev_close = None
+        self.gain = RMA(length, n_symbols)
+        self.loss = RMA(length, n_symbols)
+
+    def _update(self, close):
+        prev_close, self.prev_close = self.prev_close, close
+        if prev_close is None:
+            return np.full(self.n_symbols, np.nan)
+        change = close - prev_close
+        gain = self.gain.update(np.clip(change, 0, None))
+        loss = self.loss.update(np.clip(-change, 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100 * gain / (gain + loss)
+
+
+class MACD(StreamingIndicator):
+    """MACD line; the signal line and histogram are kept in .signal and .histogram"""
+
+    def __init__(self, fast=12, slow=26, signal=9, n_symbols=1):
+        super().__init__(n_symbols)
+        self.fast = EMA(fast, n_symbols)
+        self.slow = EMA(slow, n_symbols)
+        self.signal_ema = EMA(signal, n_symbols)
+        self.signal = np.full(n_symbols, np.nan)
+        self.histogram = np.full(n_symbols, np.nan)
+
+    def _update(self, close):
+        line = self.fast.update(close) - self.slow.update(close)
+        self.signal = self.signal_ema.update(line)
+        self.histogram = line - self.signal
+        return line
+
+
+class ATR(StreamingIndicator):
+    """Average true range, a simple mean of the true range unless wilder=True"""
+
+    def __init__(self, length=14, n_symbols=1, wilder=False):
+        super().__init__(n_symbols)
+        self.prev_close = None
+        self.average = RMA(length, n_symbols) if wilder else SMA(length, n_symbols)
+
+    def _update(self, high, low, close):
+        tr = high - low
+        if self.prev_close is not None:
+            tr = np.maximum(tr, np.maximum(np.abs(high - self.prev_close), np.abs(low - self.prev_close)))
+        self.prev_close = close
+        return self.average.update(tr)
+
+
+class ADX(StreamingIndicator):
+    """Average directional index; +DI and -DI are kept in .plus_di and .minus_di"""
+
+    def __init__(self, length=14, n_symbols=1):
+        super().__init__(n_symbols)
+        self.prev = None
+        self.tr = RMA(length, n_symbols)
+        self.plus_dm = RMA(length, n_symbols)
+        self.minus_dm = RMA(length, n_symbols)
+        self.dx = RMA(length, n_symbols)
+        self.plus_di = np.full(n_symbols, np.nan)
+        self.minus_di = np.full(n_symbols, np.nan)
+
+    def _update(self, high, low, close):
+        tr = high - low
+        plus_dm = minus_dm = np.zeros(self.n_symbols)
+        if self.prev is not None:
+            prev_high, prev_low, prev_close = self.prev
+            tr = np.maximum(tr, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+            up_move, down_move = high - prev_high, prev_low - low
+            plus_dm = np.where(up_move > down_move, up_move, 0.0)
+            minus_dm = np.where(down_move > up_move, down_move, 0.0)
+        self.prev = (high, low, close)
+
+        tr_smooth = self.tr.update(tr)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.plus_di = 100 * self.plus_dm.update(plus_dm) / tr_smooth
+            self.minus_di = 100 * self.minus_dm.update(minus_dm) / tr_smooth
+            dx = 100 * np.abs(self.plus_di - self.minus_di) / (self.plus_di + self.minus_di)
+        return self.dx.update(dx)
+
+
+class ROC(StreamingIndicator):
+    """Rate of change over `length` bars as a fraction"""
+
+    def __init__(self, length=1, n_symbols=1):
+        super().__init__(n_symbols)
+        self.length = length
+        self.window = np.full((length + 1, n_symbols), np.nan)
+
+    def _update(self, close):
+        self.window[self.count % (self.length + 1)] = close
+        base = self.window[(self.count + 1) % (self.length + 1)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return close / base - 1
+
+
+class MACrossover(StreamingIndicator):
+    """SMA crossover signal, 1 / -1 on the crossing bar and 0 otherwise"""
+
+    def __init__(self, fast=9, slow=21, n_symbols=1):
+        super().__init__(n_symbols)
+        self.fast = SMA(fast, n_symbols)
+        self.slow = SMA(slow, n_symbols)
+        self.prev_diff = np.full(n_symbols, np.nan)
+
+    @property
+    def ready(self):
+        return not np.isnan(self.prev_diff).any()
+
+    def _update(self, close):
+        diff = self.fast.update(close) - self.slow.update(close)
+        prev_diff, self.prev_diff = self.prev_diff, diff
+        with np.errstate(invalid='ignore'):
+            return ((diff > 0) & (prev_diff <= 0)).astype(np.int8) - ((diff < 0) & (prev_diff >= 0)).astype(np.int8)
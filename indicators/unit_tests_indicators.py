@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+import pandas as pd
+from indicators import batch, streaming
+
+
+class TestIndicators(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (300, 4)), axis=0))
+        self.close = pd.DataFrame(close, columns=["GLD", "SPY", "QQQ", "TLT"])
+        self.high = self.close * (1 + rng.uniform(0, 0.01, close.shape))
+        self.low = self.close * (1 - rng.uniform(0, 0.01, close.shape))
+
+    def test_sma_ema_match_pandas(self):
+        pd.testing.assert_frame_equal(batch.sma(self.close, 20), self.close.rolling(20).mean())
+        # pandas_ta's ema: SMA of the first bars, then ewm(adjust=False)
+        seeded = self.close.copy()
+        seeded.iloc[:9] = np.nan
+        seeded.iloc[9] = self.close.iloc[:10].mean()
+        pd.testing.assert_frame_equal(batch.ema(self.close, 10), seeded.ewm(span=10, adjust=False).mean())
+
+    def test_bollinger_bands_match_pandas(self):
+        bands = batch.bollinger_bands(self.close, 21)
+        std = self.close.rolling(21).std()
+        pd.testing.assert_frame_equal(bands["bbu"], self.close.rolling(21).mean() + 2 * std)
+        pd.testing.assert_frame_equal(bands["bbp"], (self.close - bands["bbl"]) / (bands["bbu"] - bands["bbl"]))
+
+        close = self.close.to_numpy()
+        replayed = streaming.BollingerBands(21, n_symbols=close.shape[1])
+        np.testing.assert_allclose(replayed.update_many(close), bands["bbp"], rtol=1e-9)
+        warmed = streaming.BollingerBands(21, n_symbols=close.shape[1])
+        warmed.warm(close[:100])
+        np.testing.assert_allclose(warmed.update_many(close[100:]), bands["bbp"].iloc[100:], rtol=1e-9)
+
+    def test_rsi_matches_wilder(self):
+        change = self.close.diff()
+        gain = change.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+        loss = (-change).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+        pd.testing.assert_frame_equal(batch.rsi(self.close), 100 * gain / (gain + loss))
+
+    def test_atr_adx_match_backtest_trend(self):
+        # BacktestTrend.calculate_ATR / calculate_ADX, one symbol at a time
+        for symbol in self.close.columns:
+            df = pd.DataFrame({"high": self.high[symbol], "low": self.low[symbol], "close": self.close[symbol]})
+            tr = pd.concat([df['high'] - df['low'], np.abs(df['high'] - df['close'].shift()),
+                            np.abs(df['low'] - df['close'].shift())], axis=1).max(axis=1)
+            np.testing.assert_allclose(batch.atr(self.high, self.low, self.close)[symbol], tr.rolling(14).mean())
+
+            up, down = df['high'] - df['high'].shift(1), df['low'].shift(1) - df['low']
+            tr_smooth = tr.ewm(alpha=1 / 14, adjust=False).mean()
+            plus_di = pd.Series(np.where(up > down, up, 0), index=df.index).ewm(alpha=1 / 14, adjust=False).mean() / tr_smooth * 100
+            minus_di = pd.Series(np.where(down > up, down, 0), index=df.index).ewm(alpha=1 / 14, adjust=False).mean() / tr_smooth * 100
+            adx_ref = (abs(plus_di - minus_di) / (plus_di + minus_di) * 100).ewm(alpha=1 / 14, adjust=False).mean()
+            adx, batch_plus_di, _ = batch.adx(self.high, self.low, self.close)
+            np.testing.assert_allclose(adx[symbol], adx_ref)
+            np.testing.assert_allclose(batch_plus_di[symbol], plus_di)
+
+    def test_roc_and_crossover(self):
+        close = self.close["GLD"].to_numpy()
+        # rate_of_change.ROC for a one-bar timeframe, scaled by 1000
+        self.assertAlmostEqual(batch.roc(close)[-1] * 1000, (close[-1] - close[-2]) / close[-2] * 1000)
+
+        # TrendAlgorithm's 9/21 signal on the last bar
+        signal = batch.ma_crossover(self.close)
+        for t in range(22, len(close)):
+            ma9, ma21 = close[t - 8:t + 1].mean(), close[t - 20:t + 1].mean()
+            prev_ma9, prev_ma21 = close[t - 9:t].mean(), close[t - 21:t].mean()
+            expected = 1 if ma9 > ma21 and prev_ma9 <= prev_ma21 else -1 if ma9 < ma21 and prev_ma9 >= prev_ma21 else 0
+            self.assertEqual(signal["GLD"].iloc[t], expected)
+
+    def test_leading_nans_per_symbol(self):
+        close = self.close.copy()
+        close.iloc[:50, 1] = np.nan
+        out = batch.ema(close, 10)
+        pd.testing.assert_series_equal(out.iloc[:, 0], batch.ema(self.close.iloc[:, 0], 10))
+        pd.testing.assert_series_equal(out.iloc[50:, 1], batch.ema(close.iloc[50:, 1], 10))
+
+    def test_streaming_matches_batch(self):
+        close, high, low = self.close.to_numpy(), self.high.to_numpy(), self.low.to_numpy()
+        n = close.shape[1]
+        cases = [
+            (streaming.SMA(20, n), batch.sma(close, 20), (close,)),
+            (streaming.EMA(10, n), batch.ema(close, 10), (close,)),
+            (streaming.RSI(14, n), batch.rsi(close), (close,)),
+            (streaming.MACD(n_symbols=n), batch.macd(close)[0], (close,)),
+            (streaming.ATR(14, n), batch.atr(high, low, close), (high, low, close)),
+            (streaming.ADX(14, n), batch.adx(high, low, close)[0], (high, low, close)),
+            (streaming.ROC(5, n), batch.roc(close, 5), (close,)),
+            (streaming.MACrossover(9, 21, n), batch.ma_crossover(close), (close,)),
+        ]
+        for indicator, expected, inputs in cases:
+            np.testing.assert_allclose(indicator.update_many(*inputs), expected, rtol=1e-9, err_msg=type(indicator).__name__)
+
+        macd = streaming.MACD(n_symbols=n)
+        macd.update_many(close)
+        np.testing.assert_allclose(macd.signal, batch.macd(close)[1][-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
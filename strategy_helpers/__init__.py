@@ -0,0 +1,7 @@
+"""
+Helpers shared by the Lumibot strategies
+
+snapshot: per-iteration batched last prices and positions
+"""
+
+from .snapshot import MarketSnapshot
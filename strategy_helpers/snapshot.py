@@ -0,0 +1,105 @@
+"""
+Per-iteration market snapshot for Lumibot strategies
+
+Create one MarketSnapshot at the top of on_trading_iteration and read prices and
+positions from it instead of calling get_last_price/get_position per symbol. Last
+prices for the whole symbol set come from one batched request (Alpaca's multi-symbol
+latest trades when trading live on Alpaca) and positions from one get_positions()
+listing; both are memoized for the life of the snapshot.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _symbol(asset):
+    return asset if isinstance(asset, str) else asset.symbol
+
+
+class MarketSnapshot:
+    """Batched, memoized last prices and positions for one trading iteration"""
+
+    def __init__(self, strategy, symbols=(), include_positions=False):
+        """
+        Parameters:
+        strategy (Strategy): The running Lumibot strategy
+        symbols (list): Symbols whose last prices are fetched together
+        include_positions (bool): Also price every symbol currently held
+        """
+        self.strategy = strategy
+        self.symbols = [_symbol(symbol) for symbol in symbols]
+        self.include_positions = include_positions
+        self._prices = None
+        self._positions = None
+
+    # ---------- Prices ----------
+
+    @property
+    def prices(self):
+        """Last price per symbol, fetched on first use"""
+        if self._prices is None:
+            symbols = list(self.symbols)
+            if self.include_positions:
+                symbols += [symbol for symbol in self.positions if symbol not in symbols]
+            self._prices = self._fetch_prices(symbols) if symbols else {}
+        return self._prices
+
+    def last_price(self, symbol):
+        """Memoized last price; symbols outside the snapshot are fetched once on demand"""
+        symbol = _symbol(symbol)
+        prices = self.prices
+        if symbol not in prices:
+            prices.update(self._fetch_prices([symbol]))
+        return prices.get(symbol)
+
+    def _fetch_prices(self, symbols):
+        if not self.strategy.is_backtesting:
+            prices = self._fetch_alpaca_latest_trades(symbols)
+            if prices is not None:
+                return prices
+        try:
+            prices = self.strategy.get_last_prices(list(symbols))
+            return {_symbol(asset): price for asset, price in prices.items()}
+        except Exception as e:
+            logger.warning(f"Batched last prices failed, falling back to one request per symbol: {e}")
+            return {symbol: self.strategy.get_last_price(symbol) for symbol in symbols}
+
+    def _fetch_alpaca_latest_trades(self, symbols):
+        """One multi-symbol latest-trade request through the broker's Alpaca data client, if there is one"""
+        get_client = getattr(self.strategy.broker.data_source, "_get_stock_client", None)
+        if get_client is None:
+            return None
+        try:
+            from alpaca.data.requests import StockLatestTradeRequest
+
+            trades = get_client().get_stock_latest_trade(StockLatestTradeRequest(symbol_or_symbols=list(symbols)))
+        except Exception as e:
+            logger.warning(f"Alpaca latest trades request failed: {e}")
+            return None
+        return {symbol: (float(trades[symbol].price) if symbol in trades else None) for symbol in symbols}
+
+    # ---------- Positions ----------
+
+    @property
+    def positions(self):
+        """Open positions by symbol from a single get_positions() call"""
+        if self._positions is None:
+            self._positions = {
+                position.asset.symbol: position
+                for position in self.strategy.get_positions()
+                if position.asset != self.strategy.quote_asset and position.quantity
+            }
+        return self._positions
+
+    def position(self, symbol):
+        """Same as Strategy.get_position(symbol), None when there is no open position"""
+        return self.positions.get(_symbol(symbol))
+
+    def quantity(self, symbol):
+        position = self.position(symbol)
+        return float(position.quantity) if position is not None else 0.0
+
+    def invalidate_positions(self):
+        """Re-read positions on next access, e.g. after orders filled mid-iteration"""
+        self._positions = None